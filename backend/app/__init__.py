@@ -1,3 +1,4 @@
+import os
 from flask import Flask
 from .extensions import db, migrate, login_manager
 from flask_jwt_extended import JWTManager
@@ -5,30 +6,62 @@ from .api.auth import auth_bp
 from .api.cupboard import cupboard_bp
 from .api.ingredients import ingredients_bp
 from .api.recipes import recipes_bp
+from .api.metrics import metrics_bp
+from .api.backup import backup_bp
+from .api.sync import sync_bp
+from .api.jobs import jobs_bp
+from .backup import init_backup
+from .config import CONFIGS
+from .database import init_database
+from .jobs import init_jobs
+from .metrics import init_metrics
+from .query_stats import init_query_stats
+from .replica import init_replica
+from .serialization import init_serialization
+from .summaries import init_summaries
+from .sync import init_sync
 from flask_cors import CORS
 
-def create_app():
+def create_app(config_name: str = None):
     """
-    Initialises the Flask application, configures CORS, initialises the database and
-    the JWT manager and registers API blueprints.
+    Initialises the Flask application, configures CORS, initialises the database, the
+    JWT manager, SQL query instrumentation, request metrics, read replica routing,
+    JSON serialization and compression, the background job pool and the backup, sync,
+    recipe summary and job commands and registers API blueprints.
+
+    Parameters:
+        - config_name (str): The config profile to use, "development", "testing" or
+          "production". Defaults to the APP_ENV environment variable, then "development".
 
     Returns:
         - The configured Flask app instance.
     """
     app = Flask(__name__)
-    app.config.from_object('app.config.Config')
+    app.config.from_object(CONFIGS[config_name or os.getenv('APP_ENV', 'development')])
 
     # allow requests from react app
-    CORS(app, origins=["http://localhost:5173"])
+    CORS(app, origins=["http://localhost:5173"], expose_headers=["ETag", "X-Next-Cursor", "X-Query-Count", "X-Query-Time", "Location", "Retry-After", "X-Write-Token"])
 
-    db.init_app(app)
+    init_database(app)
     migrate.init_app(app, db)
     login_manager.init_app(app)
     jwt = JWTManager(app)
+    init_query_stats(app)
+    init_metrics(app)
+    init_replica(app)
+    init_serialization(app)
+    init_backup(app)
+    init_sync(app)
+    init_summaries(app)
+    init_jobs(app)
 
     app.register_blueprint(auth_bp, url_prefix='/auth')
     app.register_blueprint(cupboard_bp, url_prefix='/cupboard')
     app.register_blueprint(ingredients_bp, url_prefix='/ingredients')
     app.register_blueprint(recipes_bp, url_prefix='/recipes')
+    app.register_blueprint(metrics_bp, url_prefix='/metrics')
+    app.register_blueprint(backup_bp)
+    app.register_blueprint(sync_bp)
+    app.register_blueprint(jobs_bp, url_prefix='/jobs')
 
     return app
\ No newline at end of file
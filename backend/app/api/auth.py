@@ -2,11 +2,14 @@ from flask_jwt_extended import create_access_token
 from flask import request, jsonify, Blueprint
 from app.models import User
 from app import db
+from app.passwords import needs_rehash
+from app.query_stats import query_budget
 from .utils import safe_commit
 
 auth_bp = Blueprint('auth', __name__)
 
 @auth_bp.route('/register', methods=['POST'])
+@query_budget(2)
 def register():
     """
     Register a new user.
@@ -39,6 +42,7 @@ def register():
     return jsonify({"message": "User registered successfully"}), 201
 
 @auth_bp.route('/login', methods=['POST'])
+@query_budget(2)
 def login():
     """
     Authenticate a user and return a JWT token upon successful login.
@@ -63,8 +67,16 @@ def login():
     
     if not user.check_password(password):
         return jsonify({"error": "Invalid credentials"}), 400
+
+    # read before a commit expires the user, which would reload it
+    user_id = user.id
+    # upgrade hashes made with an old method or cost while we know the password,
+    # a failed commit just leaves the old hash in place
+    if needs_rehash(user.password_hash):
+        user.set_password(password)
+        safe_commit()
     
     # generate JWT token and send to client
     # need to use str for identity, otherwise causes 422 error
-    access_token = create_access_token(identity=str(user.id))
+    access_token = create_access_token(identity=str(user_id))
     return jsonify(access_token), 200
\ No newline at end of file
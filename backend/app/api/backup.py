@@ -0,0 +1,59 @@
+from flask import Blueprint, Response, request, stream_with_context
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.backup import export_user
+from app.jobs import spool_upload
+from app.replica import read_replica
+from .jobs import start_job
+
+backup_bp = Blueprint('backup', __name__)
+
+# no query budget, the backup is read while the body streams, after budgets are checked
+@backup_bp.route('/export', methods=['GET'])
+@jwt_required()
+@read_replica
+def export_backup():
+    """
+    Stream a backup of the authenticated user's recipes and cupboard as
+    newline-delimited JSON, read from the database in batches as it's sent.
+
+    Returns:
+        - 200 with the backup as an application/x-ndjson attachment.
+    """
+    user_id = int(get_jwt_identity())
+    response = Response(stream_with_context(export_user(user_id)), mimetype='application/x-ndjson')
+    response.headers['Content-Disposition'] = 'attachment; filename="recipes-backup.ndjson"'
+    return response, 200
+
+@backup_bp.route('/export', methods=['POST'])
+@jwt_required()
+def start_export():
+    """
+    Write a backup of the authenticated user's recipes and cupboard in a background
+    job, for accounts too large to stream in one request. Once the job has succeeded
+    the backup is downloaded from /jobs/<id>/download.
+
+    Returns:
+        - 202 with the job, whose URL is in the Location header.
+        - 503 if too many jobs are waiting.
+    """
+    return start_job(int(get_jwt_identity()), 'export')
+
+@backup_bp.route('/import', methods=['POST'])
+@jwt_required()
+def import_backup():
+    """
+    Restore a backup made by export_backup into the authenticated user's account in a
+    background job. The body is saved to a file as it's received, before the job is
+    created so no transaction is held open during the upload, then read a line at
+    a time and inserted in batches. Ingredients are matched by name and category and
+    created if they don't exist. The restore is a single transaction, so nothing is
+    restored if any line is invalid.
+
+    Returns:
+        - 202 with the job, whose URL is in the Location header. Its result is the number
+          of ingredients created and recipes and cupboard ingredients restored, or its
+          error the number of the first invalid line.
+        - 503 if too many jobs are waiting.
+    """
+    upload = spool_upload(request.stream)
+    return start_job(int(get_jwt_identity()), 'import', files={'import.ndjson': upload})
@@ -2,20 +2,34 @@ from flask import request, jsonify, Blueprint
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.models import Ingredient, UserIngredient
 from app import db
-from .utils import safe_commit
+from app.query_stats import query_budget
+from app.replica import read_replica
+from app.sync import record_tombstones
+from .utils import (
+    safe_commit, chunked, find_missing_ingredients, insert_or_ignore,
+    bump_version, version_etag, not_modified, set_etag, BATCH_MAX_IDS
+)
 
 cupboard_bp = Blueprint('cupboard', __name__)
 
 @cupboard_bp.route('/', methods=['GET'])
+@query_budget(2)
 @jwt_required()
+@read_replica
 def get_cupboard():
     """
     Retrieve the authenticated user's cupboard ingredients.
 
     Returns:
-        - 200 with a list of ingredient objects.
+        - 200 with a list of ingredient objects and an ETag.
+        - 304 if the If-None-Match header matches the cupboard's current ETag.
     """
     user_id = int(get_jwt_identity())
+    etag = version_etag(user_id, 'cupboard')
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
     user_ingredients = (
         db.session.query(Ingredient)
         .join(UserIngredient, Ingredient.id == UserIngredient.ingredient_id)
@@ -23,12 +37,14 @@ def get_cupboard():
         .all()
     )
     
-    return jsonify([
+    response = jsonify([
         { "id": ing.id, "name": ing.name, "category": ing.category.name }
         for ing in user_ingredients
-    ]), 200
+    ])
+    return set_etag(response, etag), 200
 
 @cupboard_bp.route('/', methods=['POST'])
+@query_budget(3)
 @jwt_required()
 def add_to_cupboard():
     """
@@ -53,13 +69,76 @@ def add_to_cupboard():
     
     user_ing = UserIngredient(user_id=user_id, ingredient_id=ing_id)
     db.session.add(user_ing)
+    bump_version(user_id, 'cupboard')
     response, status = safe_commit()
     if response:
         return response, status
     
     return jsonify({"message": "Ingredient added to cupboard"}), 201
 
+@cupboard_bp.route('/batch', methods=['POST'])
+# with BATCH_MAX_IDS of each, two IN chunks each to check and delete ingredients
+@query_budget(8)
+@jwt_required()
+def batch_update_cupboard():
+    """
+    Add and remove many ingredients in the authenticated user's cupboard in a single
+    transaction. Ingredients already in the cupboard are ignored when adding, as are
+    ones not in it when removing. If an ingredient is in both lists it's kept.
+
+    Returns:
+        - 200 with the number of ingredients added and removed.
+        - 400 if add or remove aren't lists of IDs, either has more than BATCH_MAX_IDS,
+          or an added ingredient doesn't exist.
+    """
+    data = request.get_json()
+    add_ids = data.get('add', [])
+    remove_ids = data.get('remove', [])
+
+    for ids in (add_ids, remove_ids):
+        if not isinstance(ids, list) or not all(
+            isinstance(ing_id, int) and not isinstance(ing_id, bool) for ing_id in ids
+        ):
+            return jsonify({"error": "add and remove must be lists of ingredient IDs"}), 400
+        if len(ids) > BATCH_MAX_IDS:
+            return jsonify({"error": f"At most {BATCH_MAX_IDS} ingredients can be added or removed at once"}), 400
+
+    missing = find_missing_ingredients(add_ids)
+    if missing:
+        return jsonify({"error": "Some ingredients don't exist", "missing_ids": missing}), 400
+
+    user_id = int(get_jwt_identity())
+    add_ids = set(add_ids)
+    remove_ids = set(remove_ids) - add_ids
+
+    # one read of the whole cupboard, a user's cupboard is far smaller than the catalog
+    existing = {
+        ing_id for (ing_id,) in
+        db.session.query(UserIngredient.ingredient_id).filter_by(user_id=user_id)
+    }
+    removed_ids = sorted(remove_ids & existing)
+    for chunk in chunked(removed_ids):
+        UserIngredient.query.filter(
+            UserIngredient.user_id == user_id, UserIngredient.ingredient_id.in_(chunk)
+        ).delete(synchronize_session=False)
+
+    new_ids = add_ids - existing
+    # insert or ignore in case a concurrent request added the same ingredient
+    insert_or_ignore(UserIngredient, [
+        {"user_id": user_id, "ingredient_id": ing_id} for ing_id in sorted(new_ids)
+    ])
+    record_tombstones(user_id, 'cupboard', removed_ids)
+    if new_ids or removed_ids:
+        bump_version(user_id, 'cupboard')
+
+    response, status = safe_commit()
+    if response:
+        return response, status
+
+    return jsonify({"added": len(new_ids), "removed": len(removed_ids)}), 200
+
 @cupboard_bp.route('/<int:ingredient_id>', methods=['DELETE'])
+@query_budget(4)
 @jwt_required()
 def delete_from_cupboard(ingredient_id):
     """
@@ -76,6 +155,8 @@ def delete_from_cupboard(ingredient_id):
         return jsonify({"error" :"Ingredient not found in cupboard"}), 404
     
     db.session.delete(user_ing)
+    record_tombstones(user_id, 'cupboard', [ingredient_id])
+    bump_version(user_id, 'cupboard')
     response, status = safe_commit()
     if response:
         return response, status
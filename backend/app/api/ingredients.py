@@ -1,14 +1,89 @@
 from flask import request, jsonify, Blueprint
 from flask_jwt_extended import jwt_required
+from sqlalchemy import func
 from app.models import Ingredient
 from app import db
 from app.enums import CategoryEnum
-from .utils import safe_commit
+from app.catalog import ingredient_catalog
+from app.ingredient_index import get_ingredient_index, ingredient_index
+from app.query_stats import query_budget
+from app.replica import read_replica
+from .utils import safe_commit, parse_ids, parse_number
 
 ingredients_bp = Blueprint('ingredients', __name__)
 
+@ingredients_bp.route('/search', methods=['GET'])
+@query_budget(2)
+@jwt_required()
+def search_ingredients():
+    """
+    Autocomplete ingredient names, tolerating typos.
+
+    Query parameters:
+        - q (str): The (partial) ingredient name to search for.
+        - limit (int): The maximum number of results (default 10, max 100).
+        - category (str): Only return ingredients in this category (optional).
+
+    Returns:
+        - 200 with a list of matching ingredients, best matches first.
+        - 400 if the query is missing or the category or limit are invalid.
+    """
+    query = request.args.get('q', '')
+    limit, error = parse_number('limit', 10)
+    if error:
+        return jsonify({"error": error}), 400
+    category = request.args.get('category')
+
+    if not query.strip():
+        return jsonify({"error": "Query is required"}), 400
+    if not 1 <= limit <= 100:
+        return jsonify({"error": "limit must be between 1 and 100"}), 400
+    if category and category not in CategoryEnum.__members__:
+        return jsonify({"error": "Invalid category"}), 400
+
+    ings = get_ingredient_index().search(
+        query, limit=limit, category=CategoryEnum[category] if category else None
+    )
+
+    return jsonify([
+        {"id": ing_id, "name": name, "category": ing_category.name}
+        for ing_id, name, ing_category in ings
+    ]), 200
+
+@ingredients_bp.route('/batch', methods=['GET'])
+@query_budget(2)
+@jwt_required()
+@read_replica
+def get_ingredients_batch():
+    """
+    Retrieve many ingredients by ID in one request, from the catalog cache and chunked
+    IN queries for the IDs it doesn't hold.
+
+    Query parameters:
+        - ids (str): Comma separated ingredient IDs e.g. "1,2,3", at most BATCH_MAX_IDS.
+
+    Returns:
+        - 200 with the ingredients keyed by ID, in the order requested, and a list of
+          the IDs that don't exist.
+        - 400 if ids is missing, invalid or too long.
+    """
+    ids, error = parse_ids(request.args.get('ids'))
+    if error:
+        return jsonify({"error": error}), 400
+
+    found = ingredient_catalog.get_many(ids)
+    return jsonify({
+        "ingredients": {
+            ing_id: {"id": ing_id, "name": found[ing_id][1], "category": found[ing_id][2].name}
+            for ing_id in ids if ing_id in found
+        },
+        "missing": [ing_id for ing_id in ids if ing_id not in found],
+    }), 200
+
 @ingredients_bp.route('/<string:name>', methods=['GET'])
+@query_budget(2)
 @jwt_required()
+@read_replica
 def get_ingredient(name: str):      
     """
     Retrieve ingredients that match the name given (case-insensitive).
@@ -21,17 +96,18 @@ def get_ingredient(name: str):
         - 404 if no matches are found.
     """  
     # case insensitive search
-    ings = Ingredient.query.filter(Ingredient.name.ilike(name)).all()
+    ings = ingredient_catalog.find_by_name(name)
 
     if len(ings) == 0:
         return jsonify({"error": "Ingredient not found"}), 404
     
     return jsonify([
-        {"id": ing.id, "name": ing.name, "category": ing.category.name }
-        for ing in ings
+        {"id": ing_id, "name": ing_name, "category": ing_category.name }
+        for ing_id, ing_name, ing_category in ings
     ]), 200
 
 @ingredients_bp.route('/', methods=['POST'])
+@query_budget(2)
 @jwt_required()
 def add_ingredient():
     """
@@ -53,14 +129,28 @@ def add_ingredient():
     if category not in CategoryEnum.__members__:
         return jsonify({"error": "Invalid category"}), 400
     
-    existing = Ingredient.query.filter(Ingredient.name.ilike(name), Ingredient.category == category).first()
+    # checked against the database rather than the catalog, whose name lookups can
+    # briefly miss an ingredient another worker just added
+    existing = (
+        db.session.query(Ingredient.id)
+        .filter(func.lower(Ingredient.name) == func.lower(name), Ingredient.category == CategoryEnum[category])
+        .order_by(Ingredient.id)
+        .first()
+    )
     if existing:
         return jsonify({"id": existing.id, "message": "Ingredient already exists"}), 200
     
-    ing = Ingredient(name=name, category=category)
+    ing = Ingredient(name=name, category=CategoryEnum[category])
     db.session.add(ing)
+    db.session.flush()
+    # read before committing, as the commit expires the ingredient and reading it would reload it
+    ing_id, ing_name, ing_category = ing.id, ing.name, ing.category
     response, status = safe_commit()
     if response:
         return response, status
+
+    # added straight to the caches, whose next refresh picks up anything they've missed
+    ingredient_catalog.add(ing_id, ing_name, ing_category)
+    ingredient_index.add(ing_id, ing_name, ing_category)
     
-    return jsonify({"id": ing.id, "message": "Ingredient successfully created"}), 201
\ No newline at end of file
+    return jsonify({"id": ing_id, "message": "Ingredient successfully created"}), 201
\ No newline at end of file
@@ -0,0 +1,103 @@
+from flask import jsonify, Blueprint, send_file, url_for
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.models import Job
+import os
+from app.jobs import JobQueueFull, job_dict, job_path, prepare_job, queue_job
+from app.query_stats import query_budget
+
+jobs_bp = Blueprint('jobs', __name__)
+
+def job_accepted(job: Job):
+    """
+    Build the response to a request that queued a job.
+
+    Parameters:
+        - job (Job): The queued job.
+
+    Returns:
+        - A 202 (response, status code) tuple with the job and its URL in the Location header.
+    """
+    response = jsonify(job_dict(job))
+    response.headers['Location'] = url_for('jobs.get_job', job_id=job.id)
+    return response, 202
+
+def job_queue_full(error: JobQueueFull):
+    """
+    Returns:
+        - A 503 (response, status code) tuple asking the client to retry later.
+    """
+    response = jsonify({"error": str(error)})
+    response.headers['Retry-After'] = '30'
+    return response, 503
+
+def start_job(user_id: int, kind: str, params: dict = None, files: dict = None):
+    """
+    Queue a job for a user and build the response to the request that queued it. The
+    job is created, given its files and committed in one short transaction.
+
+    Parameters:
+        - user_id (int): The ID of the user the job is for.
+        - kind (str): The kind of job, see app.jobs.job_handler.
+        - params (dict): JSON parameters passed to the job's handler.
+        - files (dict[str, str]): The job's input files, name to the path of a file
+          saved by app.jobs.spool_upload, moved into place as app.jobs.job_path(id, name).
+
+    Returns:
+        - A 202 (response, status code) tuple, or 503 if too many jobs are waiting.
+    """
+    files = files or {}
+    try:
+        job = prepare_job(user_id, kind, params)
+    except JobQueueFull as e:
+        for path in files.values():
+            os.remove(path)
+        return job_queue_full(e)
+    for name, path in files.items():
+        os.replace(path, job_path(job.id, name))
+    return job_accepted(queue_job(job))
+
+def _find_job(job_id: int):
+    return Job.query.filter_by(id=job_id, user_id=int(get_jwt_identity())).first()
+
+@jobs_bp.route('/<int:job_id>', methods=['GET'])
+@query_budget(1)
+@jwt_required()
+def get_job(job_id: int):
+    """
+    Retrieve the status of one of the authenticated user's background jobs.
+
+    Parameters:
+        - job_id (int): The ID of the job.
+
+    Returns:
+        - 200 with the job's status, progress while it's running in this process,
+          and its result or error once finished.
+        - 404 if the job is not found.
+    """
+    job = _find_job(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job_dict(job)), 200
+
+@jobs_bp.route('/<int:job_id>/download', methods=['GET'])
+@query_budget(1)
+@jwt_required()
+def download_job_result(job_id: int):
+    """
+    Download the file a finished job produced, e.g. a backup written by an export job.
+
+    Parameters:
+        - job_id (int): The ID of the job.
+
+    Returns:
+        - 200 with the file as an attachment.
+        - 404 if the job is not found, hasn't finished or didn't produce a file.
+    """
+    job = _find_job(job_id)
+    if not job or job.status != 'succeeded' or not (job.result or {}).get('file'):
+        return jsonify({"error": "Job result not found"}), 404
+    name = job.result['file']
+    return send_file(
+        job_path(job.id, name), mimetype='application/x-ndjson',
+        as_attachment=True, download_name=f"recipes-{name}"
+    )
@@ -0,0 +1,21 @@
+import hmac
+from flask import Blueprint, Response, current_app, jsonify, request
+from app.metrics import render_metrics
+
+metrics_bp = Blueprint('metrics', __name__)
+
+@metrics_bp.route('', methods=['GET'])
+def get_metrics():
+    """
+    Get request latency, status code, response size and in flight metrics per endpoint,
+    and the ingredient cache's statistics, in the Prometheus text format.
+    If METRICS_TOKEN is set the scraper must send it as a bearer token.
+
+    Returns:
+        - 200 with the metrics.
+        - 401 if METRICS_TOKEN is set and the request doesn't include it.
+    """
+    token = current_app.config['METRICS_TOKEN']
+    if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f"Bearer {token}"):
+        return jsonify({"error": "Invalid metrics token"}), 401
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
@@ -1,30 +1,80 @@
-from flask import request, jsonify, Blueprint
+from flask import request, jsonify, Blueprint, Response, current_app, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.models import Recipe, RecipeIngredient, Ingredient
+from app.models import Recipe, RecipeIngredient, RecipeSummary, Ingredient, UserIngredient, utcnow
+from app.enums import CategoryEnum
 from app import db
-from .utils import safe_commit
+from app.recipe_index import recipe_indexes
+from app.search import search_recipes
+from app.similarity import similarity_indexes
+from app.sync import record_tombstones
+from app.summaries import save_recipe_summaries, delete_recipe_summaries
+from sqlalchemy import insert
+from app.query_stats import query_budget
+from app.replica import read_replica
+from .utils import (
+    safe_commit, chunked, find_missing_ingredients, insert_returning_ids,
+    bump_version, version_etag, not_modified, set_etag, parse_ids, parse_number
+)
+from .jobs import start_job
 
 recipes_bp = Blueprint('recipes', __name__)
 
-@recipes_bp.route('/', methods=['GET'])
-@jwt_required()
-def get_recipes():
+# page size used when streaming and the maximum page size clients can request
+RECIPE_PAGE_SIZE = 500
+# fields clients can select with the fields query parameter
+RECIPE_FIELDS = ('id', 'title', 'method', 'ingredients')
+
+def _fetch_recipe_page(user_id: int, after: int, limit: int, fields: tuple = RECIPE_FIELDS,
+                       changed_since=None, summary_filters: list = ()):
     """
-    Retrieve all recipes created by the authenticated user, including associated
-    ingredient data for each recipe.
+    Fetch the next page of a user's recipes by keyset pagination, loading only the
+    requested fields. The method text is only selected when "method" is requested,
+    and the ingredients query only runs when "ingredients" is.
+
+    The ingredients are selected by the page's ID range rather than an IN list of
+    recipe IDs, so the query size doesn't grow with the page.
+
+    Parameters:
+        - user_id (int): The ID of the user whose recipes to fetch.
+        - after (int): Only fetch recipes with an ID greater than this.
+        - limit (int): The maximum number of recipes to fetch, or None for all of them.
+        - fields (tuple[str]): The fields of RECIPE_FIELDS to include, the ID is always included.
+        - changed_since (datetime): Only fetch recipes changed after this UTC time, if given.
+        - summary_filters (list): Conditions on RecipeSummary the recipes must meet.
 
     Returns:
-        - 200 with a list of recipes and their ingredients.
+        - A list of recipe dicts ordered by ID.
     """
-    user_id = get_jwt_identity()
-    recipes = db.session.query(Recipe).filter_by(user_id=user_id).all()
+    filters = [Recipe.user_id == user_id, Recipe.id > after]
+    if changed_since is not None:
+        filters.append(Recipe.updated_at > changed_since)
+
+    def filtered(query):
+        if summary_filters:
+            query = query.join(RecipeSummary, RecipeSummary.recipe_id == Recipe.id).filter(*summary_filters)
+        return query.filter(*filters)
+
+    columns = [Recipe.id] + [getattr(Recipe, field) for field in ('title', 'method') if field in fields]
+    recipes = (
+        filtered(db.session.query(*columns))
+        .order_by(Recipe.id)
+        .limit(limit)
+        .all()
+    )
+    if not recipes:
+        return []
+    results = [recipe._asdict() for recipe in recipes]
+    if 'ingredients' not in fields:
+        return results
 
     # once we have the recipes we can find all the details about the recipe ingredients
-    recipe_ids = [recipe.id for recipe in recipes]
     ingredients = (
-        db.session.query(RecipeIngredient.recipe_id, Ingredient.id, Ingredient.name, Ingredient.category)
-        .join(Ingredient, RecipeIngredient.ingredient_id == Ingredient.id)
-        .filter(RecipeIngredient.recipe_id.in_(recipe_ids))
+        filtered(
+            db.session.query(RecipeIngredient.recipe_id, Ingredient.id, Ingredient.name, Ingredient.category)
+            .join(Ingredient, RecipeIngredient.ingredient_id == Ingredient.id)
+            .join(Recipe, RecipeIngredient.recipe_id == Recipe.id)
+        )
+        .filter(Recipe.id <= recipes[-1].id)
         .all()
     )
 
@@ -36,17 +86,504 @@ def get_recipes():
             "name": ing_name,
             "category": ing_category.name
         })
-    
-    results = [{
-        "id": recipe.id,
-        "title": recipe.title,
-        "method": recipe.method,
-        "ingredients": ingredient_map.get(recipe.id, [])
-    } for recipe in recipes]
-    
-    return jsonify(results), 200
+
+    for recipe in results:
+        recipe["ingredients"] = ingredient_map.get(recipe["id"], [])
+    return results
+
+def _fetch_recipes_by_id(user_id: int, recipe_ids: list, fields: tuple = RECIPE_FIELDS):
+    """
+    Fetch a user's recipes by ID in chunked IN queries, loading only the requested
+    fields as _fetch_recipe_page does.
+
+    Parameters:
+        - user_id (int): The ID of the user whose recipes to fetch.
+        - recipe_ids (list[int]): The IDs of the recipes.
+        - fields (tuple[str]): The fields of RECIPE_FIELDS to include, the ID is always included.
+
+    Returns:
+        - A dict of ID to recipe dict for the IDs the user has a recipe with.
+    """
+    columns = [Recipe.id] + [getattr(Recipe, field) for field in ('title', 'method') if field in fields]
+    results = {}
+    for chunk in chunked(recipe_ids):
+        recipes = db.session.query(*columns).filter(Recipe.user_id == user_id, Recipe.id.in_(chunk))
+        for recipe in recipes:
+            results[recipe.id] = recipe._asdict()
+    if 'ingredients' not in fields:
+        return results
+
+    for recipe in results.values():
+        recipe["ingredients"] = []
+    # only the recipes found are looked up, so other users' recipe IDs are never queried
+    for chunk in chunked(list(results)):
+        ingredients = (
+            db.session.query(RecipeIngredient.recipe_id, Ingredient.id, Ingredient.name, Ingredient.category)
+            .join(Ingredient, RecipeIngredient.ingredient_id == Ingredient.id)
+            .filter(RecipeIngredient.recipe_id.in_(chunk))
+        )
+        for recipe_id, ing_id, ing_name, ing_category in ingredients:
+            results[recipe_id]["ingredients"].append({
+                "id": ing_id,
+                "name": ing_name,
+                "category": ing_category.name
+            })
+    return results
+
+def _parse_fields():
+    """
+    Read the fields query parameter, a comma separated subset of RECIPE_FIELDS.
+
+    Returns:
+        - A tuple of the fields to include (every field if the parameter is missing) and
+          an error message, or None.
+    """
+    fields = request.args.get('fields')
+    if not fields:
+        return RECIPE_FIELDS, None
+    fields = tuple(dict.fromkeys(field.strip() for field in fields.split(',') if field.strip()))
+    unknown = [field for field in fields if field not in RECIPE_FIELDS]
+    if unknown:
+        return None, f"Unknown fields: {', '.join(unknown)}"
+    return fields, None
+
+def _parse_summary_filters():
+    """
+    Read the query parameters that filter recipes by their summaries.
+
+    Returns:
+        - A tuple of a list of conditions on RecipeSummary and an error message, or None.
+    """
+    filters = []
+    max_ingredients = request.args.get('max_ingredients')
+    if max_ingredients is not None:
+        try:
+            filters.append(RecipeSummary.ingredient_count <= int(max_ingredients))
+        except ValueError:
+            return None, "max_ingredients must be an integer"
+
+    exclude = request.args.get('exclude_categories')
+    if exclude:
+        names = [name.strip() for name in exclude.split(',') if name.strip()]
+        unknown = [name for name in names if name not in CategoryEnum.__members__]
+        if unknown:
+            return None, f"Unknown categories: {', '.join(unknown)}"
+        filters.extend(RecipeSummary.category_count(CategoryEnum[name]) == 0 for name in names)
+    return filters, None
+
+def _recipe_pages(user_id: int, after: int, fields: tuple = RECIPE_FIELDS, summary_filters: list = ()):
+    """
+    Yield a user's recipes one page of RECIPE_PAGE_SIZE at a time, so only a single
+    page is held in memory at once.
+
+    Parameters:
+        - user_id (int): The ID of the user whose recipes to fetch.
+        - after (int): Only fetch recipes with an ID greater than this.
+        - fields (tuple[str]): The fields of RECIPE_FIELDS to include.
+        - summary_filters (list): Conditions on RecipeSummary the recipes must meet.
+    """
+    while True:
+        page = _fetch_recipe_page(user_id, after, RECIPE_PAGE_SIZE, fields, summary_filters=summary_filters)
+        if page:
+            yield page
+        if len(page) < RECIPE_PAGE_SIZE:
+            return
+        after = page[-1]["id"]
+
+def _update_indexes(user_id: int, version: int, changes: dict):
+    """Applies a committed write to the user's cached recipe and similarity indexes."""
+    recipe_indexes.update(user_id, version, changes)
+    similarity_indexes.update(user_id, version, changes)
+
+@recipes_bp.route('/', methods=['GET'])
+@query_budget(3)
+@jwt_required()
+@read_replica
+def get_recipes():
+    """
+    Retrieve recipes created by the authenticated user, ordered by ID, including
+    associated ingredient data for each recipe.
+
+    Query parameters:
+        - after (int): Only return recipes with an ID greater than this cursor.
+        - limit (int): Return at most this many recipes (max RECIPE_PAGE_SIZE). If
+          neither after nor limit are given, all recipes are returned.
+        - format (str): "ndjson" to stream every recipe after the cursor as
+          newline-delimited JSON instead (also chosen by an application/x-ndjson
+          Accept header).
+        - fields (str): Comma separated fields to include from id, title, method and
+          ingredients e.g. "id,title". The ID is always included. Defaults to all of them.
+        - max_ingredients (int): Only return recipes with at most this many ingredients.
+        - exclude_categories (str): Comma separated CategoryEnum names e.g. "MEAT,FISH",
+          only return recipes with no ingredients in them.
+
+    Returns:
+        - 200 with a list of recipes and their ingredients and an ETag. If there may be
+          more recipes, the X-Next-Cursor header holds the after value for the next page.
+        - 304 if the If-None-Match header matches the recipes' current ETag.
+        - 400 if after, limit, fields or the filters are invalid.
+    """
+    after, error = parse_number('after', 0)
+    if error:
+        return jsonify({"error": error}), 400
+    limit, error = parse_number('limit')
+    if error:
+        return jsonify({"error": error}), 400
+    if after < 0:
+        return jsonify({"error": "after must not be negative"}), 400
+    if limit is not None and not 1 <= limit <= RECIPE_PAGE_SIZE:
+        return jsonify({"error": f"limit must be between 1 and {RECIPE_PAGE_SIZE}"}), 400
+    fields, error = _parse_fields()
+    if error:
+        return jsonify({"error": error}), 400
+    summary_filters, error = _parse_summary_filters()
+    if error:
+        return jsonify({"error": error}), 400
+
+    user_id = int(get_jwt_identity())
+
+    stream = (
+        request.args.get('format') == 'ndjson'
+        or request.accept_mimetypes.best == 'application/x-ndjson'
+    )
+    etag = version_etag(user_id, 'recipes') + ("-ndjson" if stream else "")
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
+    if stream:
+        dumps = current_app.json.dumps
+
+        def generate():
+            for page in _recipe_pages(user_id, after, fields, summary_filters):
+                for recipe in page:
+                    yield dumps(recipe) + "\n"
+
+        response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+        return set_etag(response, etag), 200
+
+    if limit is None and 'after' not in request.args:
+        # the whole list is held in memory anyway, so fetch it in a single page
+        results = _fetch_recipe_page(user_id, after, None, fields, summary_filters=summary_filters)
+        return set_etag(jsonify(results), etag), 200
+
+    results = _fetch_recipe_page(user_id, after, limit or RECIPE_PAGE_SIZE, fields, summary_filters=summary_filters)
+    response = jsonify(results)
+    if len(results) == (limit or RECIPE_PAGE_SIZE):
+        response.headers['X-Next-Cursor'] = str(results[-1]["id"])
+    return set_etag(response, etag), 200
+
+@recipes_bp.route('/<int:recipe_id>', methods=['GET'])
+@query_budget(3)
+@jwt_required()
+@read_replica
+def get_recipe(recipe_id: int):
+    """
+    Retrieve one of the authenticated user's recipes, including its method and
+    associated ingredient data.
+
+    Parameters:
+        - recipe_id (int): The ID of the recipe to retrieve.
+
+    Query parameters:
+        - fields (str): Comma separated fields to include, as for get_recipes.
+
+    Returns:
+        - 200 with the recipe and an ETag.
+        - 304 if the If-None-Match header matches the recipe's current ETag.
+        - 400 if fields is invalid.
+        - 404 if the recipe is not found.
+    """
+    fields, error = _parse_fields()
+    if error:
+        return jsonify({"error": error}), 400
+
+    user_id = int(get_jwt_identity())
+    # the version covers all the user's recipes, so the ID keeps recipes' ETags apart
+    etag = version_etag(user_id, 'recipes') + f"-{recipe_id}"
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
+    recipe = _fetch_recipes_by_id(user_id, [recipe_id], fields).get(recipe_id)
+    if not recipe:
+        return jsonify({"error": "Recipe not found"}), 404
+    return set_etag(jsonify(recipe), etag), 200
+
+@recipes_bp.route('/batch', methods=['GET'])
+@query_budget(5)
+@jwt_required()
+@read_replica
+def get_recipes_batch():
+    """
+    Retrieve many of the authenticated user's recipes by ID in one request, e.g. to
+    render a meal plan, using chunked IN queries rather than a request per recipe.
+
+    Query parameters:
+        - ids (str): Comma separated recipe IDs e.g. "1,2,3", at most BATCH_MAX_IDS.
+        - fields (str): Comma separated fields to include, as for get_recipes.
+
+    Returns:
+        - 200 with the recipes keyed by ID, in the order requested, a list of the IDs
+          the user has no recipe with and an ETag.
+        - 304 if the If-None-Match header matches the recipes' current ETag.
+        - 400 if ids or fields are invalid.
+    """
+    ids, error = parse_ids(request.args.get('ids'))
+    if error:
+        return jsonify({"error": error}), 400
+    fields, error = _parse_fields()
+    if error:
+        return jsonify({"error": error}), 400
+
+    user_id = int(get_jwt_identity())
+    etag = version_etag(user_id, 'recipes')
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
+    found = _fetch_recipes_by_id(user_id, ids, fields)
+    response = jsonify({
+        "recipes": {recipe_id: found[recipe_id] for recipe_id in ids if recipe_id in found},
+        "missing": [recipe_id for recipe_id in ids if recipe_id not in found],
+    })
+    return set_etag(response, etag), 200
+
+@recipes_bp.route('/<int:recipe_id>/similar', methods=['GET'])
+@query_budget(3)
+@jwt_required()
+def get_similar_recipes(recipe_id: int):
+    """
+    Find the authenticated user's recipes most similar to a recipe, by the Jaccard
+    similarity of their ingredients. Candidates come from a MinHash LSH index, so in
+    large libraries recipes sharing less than about a fifth of their ingredients may
+    not be found.
+
+    Parameters:
+        - recipe_id (int): The ID of the recipe to compare against.
+
+    Query parameters:
+        - k (int): The maximum number of recipes to return, default 10, max 50.
+
+    Returns:
+        - 200 with a list of recipes with their "similarity", most similar first.
+        - 400 if k is invalid.
+        - 404 if the recipe is not found.
+    """
+    k, error = parse_number('k', 10)
+    if error:
+        return jsonify({"error": error}), 400
+    if not 1 <= k <= 50:
+        return jsonify({"error": "k must be between 1 and 50"}), 400
+
+    user_id = int(get_jwt_identity())
+    similar = similarity_indexes.get(user_id).similar(recipe_id, k)
+    titles = dict(
+        db.session.query(Recipe.id, Recipe.title)
+        .filter(Recipe.user_id == user_id, Recipe.id.in_([recipe_id] + [other for other, _ in similar]))
+        .all()
+    )
+    if recipe_id not in titles:
+        return jsonify({"error": "Recipe not found"}), 404
+
+    return jsonify([
+        {"id": other, "title": titles[other], "similarity": round(similarity, 4)}
+        for other, similarity in similar if other in titles
+    ]), 200
+
+@recipes_bp.route('/cookable', methods=['GET'])
+@query_budget(5)
+@jwt_required()
+def get_cookable_recipes():
+    """
+    Rank the authenticated user's recipes by how much of each one their cupboard
+    covers. Only recipes sharing at least one ingredient with the cupboard are
+    considered. Full matches come first, then partial matches by descending coverage.
+
+    Query parameters:
+        - min_coverage (float): Minimum fraction of a recipe's ingredients that must
+          be in the cupboard (0 to 1, default 0).
+        - max_missing (int): Maximum number of missing ingredients (optional).
+        - limit (int): Maximum number of recipes to return (default 50).
+
+    Returns:
+        - 200 with a list of recipes, their coverage and missing ingredient IDs, and
+          an ETag.
+        - 304 if the If-None-Match header matches the current ETag.
+        - 400 if a query parameter is invalid.
+    """
+    min_coverage, error = parse_number('min_coverage', 0.0, float)
+    if error:
+        return jsonify({"error": error}), 400
+    max_missing, error = parse_number('max_missing')
+    if error:
+        return jsonify({"error": error}), 400
+    limit, error = parse_number('limit', 50)
+    if error:
+        return jsonify({"error": error}), 400
+
+    if not 0 <= min_coverage <= 1:
+        return jsonify({"error": "min_coverage must be between 0 and 1"}), 400
+    if max_missing is not None and max_missing < 0:
+        return jsonify({"error": "max_missing must not be negative"}), 400
+    if limit < 1:
+        return jsonify({"error": "limit must be positive"}), 400
+
+    user_id = int(get_jwt_identity())
+    etag = version_etag(user_id, 'recipes', 'cupboard')
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
+    cupboard = {
+        ing_id for (ing_id,) in
+        db.session.query(UserIngredient.ingredient_id).filter_by(user_id=user_id)
+    }
+    matches = [
+        (recipe_id, coverage, missing)
+        for recipe_id, coverage, missing in recipe_indexes.get(user_id).match(cupboard)
+        if coverage >= min_coverage and (max_missing is None or len(missing) <= max_missing)
+    ]
+    # full matches have no missing ingredients so sort first
+    matches.sort(key=lambda match: (len(match[2]) > 0, -match[1], len(match[2]), match[0]))
+    matches = matches[:limit]
+
+    titles = dict(
+        db.session.query(Recipe.id, Recipe.title)
+        .filter(Recipe.id.in_([recipe_id for recipe_id, _, _ in matches]))
+        .all()
+    ) if matches else {}
+
+    response = jsonify([{
+        "id": recipe_id,
+        "title": titles.get(recipe_id),
+        "coverage": round(coverage, 4),
+        "missing_ingredient_ids": missing
+    } for recipe_id, coverage, missing in matches])
+    return set_etag(response, etag), 200
+
+@recipes_bp.route('/search', methods=['GET'])
+@query_budget(2)
+@jwt_required()
+def search_user_recipes():
+    """
+    Full-text search the authenticated user's recipe titles and methods.
+
+    Query parameters:
+        - q (str): The search terms, all of which must match. The last may be partial.
+        - limit (int): The maximum number of results (default 20, max 100).
+
+    Returns:
+        - 200 with a list of matching recipes and a snippet of each, best matches first.
+        - 400 if the query is missing or the limit is invalid.
+    """
+    query = request.args.get('q', '')
+    limit, error = parse_number('limit', 20)
+    if error:
+        return jsonify({"error": error}), 400
+
+    if not query.strip():
+        return jsonify({"error": "Query is required"}), 400
+    if not 1 <= limit <= 100:
+        return jsonify({"error": "limit must be between 1 and 100"}), 400
+
+    user_id = int(get_jwt_identity())
+    return jsonify(search_recipes(user_id, query, limit)), 200
+
+@recipes_bp.route('/shopping-list', methods=['POST'])
+@query_budget(2)
+@jwt_required()
+def get_shopping_list():
+    """
+    Build a shopping list for some of the authenticated user's recipes: every
+    ingredient they need that isn't in the user's cupboard, once each, grouped by
+    category and annotated with the recipes that need it. It takes two queries
+    however many recipes there are.
+
+    Expects JSON:
+        - recipe_ids (list[int]): The recipes to shop for, at most RECIPE_PAGE_SIZE.
+
+    Returns:
+        - 200 with the categories in CategoryEnum order, each with its ingredients
+          ordered by name and the IDs of the recipes that need each one.
+        - 400 if recipe_ids is missing or invalid.
+        - 404 if some of the recipes don't exist or belong to another user.
+    """
+    data = request.get_json(silent=True) or {}
+    recipe_ids = data.get('recipe_ids')
+    if (
+        not isinstance(recipe_ids, list) or not recipe_ids
+        or not all(isinstance(recipe_id, int) for recipe_id in recipe_ids)
+    ):
+        return jsonify({"error": "recipe_ids must be a non-empty list of recipe IDs"}), 400
+    recipe_ids = list(dict.fromkeys(recipe_ids))
+    if len(recipe_ids) > RECIPE_PAGE_SIZE:
+        return jsonify({"error": f"At most {RECIPE_PAGE_SIZE} recipes can be shopped for at once"}), 400
+
+    user_id = int(get_jwt_identity())
+    found = {
+        recipe_id for (recipe_id,) in
+        db.session.query(Recipe.id).filter(Recipe.user_id == user_id, Recipe.id.in_(recipe_ids))
+    }
+    missing = [recipe_id for recipe_id in recipe_ids if recipe_id not in found]
+    if missing:
+        ids = ", ".join(str(recipe_id) for recipe_id in missing)
+        error = f"Recipe with id {ids} not found" if len(missing) == 1 else f"Recipes with ids {ids} not found"
+        return jsonify({"error": error, "missing_ids": missing}), 404
+
+    # the recipes' ingredients, less those with a matching row in the user's cupboard
+    rows = (
+        db.session.query(RecipeIngredient.recipe_id, Ingredient.id, Ingredient.name, Ingredient.category)
+        .join(Ingredient, RecipeIngredient.ingredient_id == Ingredient.id)
+        .outerjoin(UserIngredient, db.and_(
+            UserIngredient.ingredient_id == RecipeIngredient.ingredient_id,
+            UserIngredient.user_id == user_id
+        ))
+        .filter(RecipeIngredient.recipe_id.in_(recipe_ids), UserIngredient.id.is_(None))
+        .order_by(Ingredient.name, Ingredient.id, RecipeIngredient.recipe_id)
+        .all()
+    )
+
+    items = {}
+    for recipe_id, ing_id, ing_name, ing_category in rows:
+        item = items.get(ing_id)
+        if item is None:
+            item = items[ing_id] = {"id": ing_id, "name": ing_name, "category": ing_category, "recipe_ids": []}
+        item["recipe_ids"].append(recipe_id)
+
+    categories = {category.name: [] for category in CategoryEnum}
+    for item in items.values():
+        categories[item.pop("category").name].append(item)
+
+    return jsonify({
+        "recipe_ids": recipe_ids,
+        "categories": [
+            {"category": category, "ingredients": ingredients}
+            for category, ingredients in categories.items() if ingredients
+        ]
+    }), 200
+
+def _missing_ingredients_message(missing: list):
+    """Returns an error message listing every missing ingredient ID."""
+    ids = ", ".join(str(ing_id) for ing_id in missing)
+    if len(missing) == 1:
+        return f"Ingredient with id {ids} doesn't exist"
+    return f"Ingredients with ids {ids} don't exist"
+
+def _missing_ingredients_response(missing: list):
+    """
+    Build the 400 response for a recipe referencing ingredients that don't exist.
+
+    Parameters:
+        - missing (list[int]): The IDs of the missing ingredients.
+
+    Returns:
+        - (response, status code) tuple listing every missing ID.
+    """
+    return jsonify({"error": _missing_ingredients_message(missing), "missing_ids": missing}), 400
 
 @recipes_bp.route('/', methods=['POST'])
+@query_budget(5)
 @jwt_required()
 def create_recipe():
     """
@@ -65,26 +602,157 @@ def create_recipe():
         return jsonify({"error": "Title is required"}), 400
     if not ingredient_ids:
         return jsonify({"error": "A list of ingredient IDs are required"}), 400
-    for ing_id in ingredient_ids:
-        if not Ingredient.query.filter_by(id=ing_id).first():
-            return jsonify({"error": f"Ingredient with id {ing_id} doesn't exist"}), 400
+    missing = find_missing_ingredients(ingredient_ids)
+    if missing:
+        return _missing_ingredients_response(missing)
     
     # create recipe
-    user_id = get_jwt_identity()
+    user_id = int(get_jwt_identity())
     recipe = Recipe(title=title, method=method, user_id=user_id)
     db.session.add(recipe)
     db.session.flush() # so we can get the recipe ID before committing
+    recipe_id = recipe.id # read before committing expires the recipe
 
-    # add each ingredient
-    for ing_id in ingredient_ids:
-        db.session.add(RecipeIngredient(recipe_id=recipe.id, ingredient_id=ing_id))
+    # add each ingredient once in a single executemany, dict.fromkeys drops duplicates
+    db.session.execute(insert(RecipeIngredient), [
+        {"recipe_id": recipe_id, "ingredient_id": ing_id}
+        for ing_id in dict.fromkeys(ingredient_ids)
+    ])
+    save_recipe_summaries(user_id, {recipe_id: ingredient_ids})
+    version, = bump_version(user_id, 'recipes')
     response, status = safe_commit()
     if response:
         return response, status
-    
-    return jsonify({"id": recipe.id, "message": "Recipe created successfully"}), 201
+
+    _update_indexes(user_id, version, {recipe_id: ingredient_ids})
+    return jsonify({"id": recipe_id, "message": "Recipe created successfully"}), 201
+
+def _parse_bulk_recipes():
+    """
+    Read the recipes of a bulk import request, either a JSON array or, with an
+    application/x-ndjson content type, one JSON recipe per line read from the stream.
+
+    Returns:
+        - A list of recipe dicts, or error strings for lines that aren't valid JSON,
+          or None if the body isn't a JSON array.
+    """
+    if request.mimetype == 'application/x-ndjson':
+        items = []
+        for line in request.stream:
+            if not line.strip():
+                continue
+            try:
+                items.append(current_app.json.loads(line))
+            except ValueError:
+                items.append("Invalid JSON")
+        return items
+
+    data = request.get_json(silent=True)
+    return data if isinstance(data, list) else None
+
+def _validate_bulk_recipe(item):
+    """
+    Validate a single recipe of a bulk import, apart from ingredient existence.
+
+    Parameters:
+        - item: The parsed recipe.
+
+    Returns:
+        - An error message if the recipe is invalid, otherwise None.
+    """
+    if isinstance(item, str):
+        return item
+    if not isinstance(item, dict):
+        return "Recipe must be an object"
+    if not item.get('title'):
+        return "Title is required"
+    ingredient_ids = item.get('ingredient_ids')
+    if not ingredient_ids or not isinstance(ingredient_ids, list):
+        return "A list of ingredient IDs are required"
+    if not all(isinstance(ing_id, int) and not isinstance(ing_id, bool) for ing_id in ingredient_ids):
+        return "Ingredient IDs must be integers"
+    return None
+
+@recipes_bp.route('/bulk', methods=['POST'])
+@jwt_required()
+def bulk_create_recipes():
+    """
+    Create many recipes for the authenticated user in a single transaction. The body
+    is a JSON array of recipes, or newline-delimited JSON with an application/x-ndjson
+    content type, each with the same fields as create_recipe. Invalid recipes are
+    skipped and reported without affecting the others.
+
+    Returns:
+        - 200 with the number of recipes created and failed, and a result per recipe
+          in request order holding either its new ID or an error.
+        - 400 if the body isn't a JSON array.
+    """
+    items = _parse_bulk_recipes()
+    if items is None:
+        return jsonify({"error": "A JSON array of recipes is required"}), 400
+
+    errors = [_validate_bulk_recipe(item) for item in items]
+
+    # check every referenced ingredient at once rather than per recipe
+    missing = set(find_missing_ingredients(
+        ing_id for item, error in zip(items, errors) if not error
+        for ing_id in item['ingredient_ids']
+    ))
+    for i, item in enumerate(items):
+        if not errors[i]:
+            unknown = sorted({ing_id for ing_id in item['ingredient_ids'] if ing_id in missing})
+            if unknown:
+                errors[i] = _missing_ingredients_message(unknown)
+
+    user_id = int(get_jwt_identity())
+    valid = [i for i, error in enumerate(errors) if not error]
+    recipe_ids = {}
+    for batch in chunked(valid):
+        ids = insert_returning_ids(Recipe, [
+            {"title": items[i]['title'], "method": items[i].get('method'), "user_id": user_id} for i in batch
+        ])
+        recipe_ids.update(zip(batch, ids))
+
+        # dict.fromkeys drops duplicate ingredients while keeping their order
+        db.session.execute(insert(RecipeIngredient), [
+            {"recipe_id": recipe_ids[i], "ingredient_id": ing_id}
+            for i in batch for ing_id in dict.fromkeys(items[i]['ingredient_ids'])
+        ])
+        save_recipe_summaries(user_id, {recipe_ids[i]: items[i]['ingredient_ids'] for i in batch})
+    if valid:
+        version, = bump_version(user_id, 'recipes')
+
+    response, status = safe_commit()
+    if response:
+        return response, status
+    if valid:
+        _update_indexes(user_id, version, {recipe_ids[i]: items[i]['ingredient_ids'] for i in valid})
+
+    return jsonify({
+        "created": len(valid),
+        "failed": len(items) - len(valid),
+        "results": [
+            {"index": i, "error": error} if error else {"index": i, "id": recipe_ids[i]}
+            for i, error in enumerate(errors)
+        ]
+    }), 200
+
+@recipes_bp.route('/summaries/rebuild', methods=['POST'])
+@jwt_required()
+def rebuild_summaries():
+    """
+    Rebuild the authenticated user's recipe summaries in a background job, e.g. if
+    the max_ingredients or exclude_categories filters return unexpected recipes.
+
+    Returns:
+        - 202 with the job, whose URL is in the Location header. Its result is the
+          number of summaries written.
+        - 503 if too many jobs are waiting.
+    """
+    return start_job(int(get_jwt_identity()), 'rebuild_summaries')
 
 @recipes_bp.route('/<int:recipe_id>', methods=['PUT'])
+@query_budget(9)
 @jwt_required()
 def update_recipe(recipe_id: int):
     """
@@ -98,7 +766,7 @@ def update_recipe(recipe_id: int):
         - 400 if an ingredient doesn't exist.
         - 404 if the recipe is not found.
     """
-    user_id = get_jwt_identity()
+    user_id = int(get_jwt_identity())
     recipe = Recipe.query.filter_by(id=recipe_id, user_id=user_id).first()
 
     if not recipe:
@@ -106,27 +774,51 @@ def update_recipe(recipe_id: int):
     
     data = request.get_json()
     recipe.title = data.get('title', recipe.title)
-    recipe.method = data.get('method', recipe.method)
+    # set explicitly as changing only the ingredients doesn't update the recipe's row
+    recipe.updated_at = utcnow()
+    # checked rather than defaulted so the deferred method isn't loaded just to be kept
+    if 'method' in data:
+        recipe.method = data['method']
     
     # if new ingredients were provided, check they all exist and update
     ingredient_ids = data.get('ingredient_ids')
+    changes = {}
     if ingredient_ids:
-        for ing_id in ingredient_ids:
-            if not Ingredient.query.filter_by(id=ing_id).first():
-                return jsonify({"error": f"Ingredient with id {ing_id} doesn't exist"}), 400
-        # remove the old ingredients
-        RecipeIngredient.query.filter_by(recipe_id=recipe.id).delete()
-        # add the new ingredients
-        for ing_id in ingredient_ids:
-            db.session.add(RecipeIngredient(recipe_id=recipe.id, ingredient_id=ing_id))
+        missing = find_missing_ingredients(ingredient_ids)
+        if missing:
+            return _missing_ingredients_response(missing)
+
+        # only touch the rows for ingredients that were added or removed
+        wanted = dict.fromkeys(ingredient_ids)
+        current = {
+            ing_id for (ing_id,) in
+            db.session.query(RecipeIngredient.ingredient_id).filter_by(recipe_id=recipe.id)
+        }
+        removed = [ing_id for ing_id in current if ing_id not in wanted]
+        for chunk in chunked(removed):
+            RecipeIngredient.query.filter(
+                RecipeIngredient.recipe_id == recipe.id,
+                RecipeIngredient.ingredient_id.in_(chunk)
+            ).delete(synchronize_session=False)
+        added = [
+            {"recipe_id": recipe.id, "ingredient_id": ing_id}
+            for ing_id in wanted if ing_id not in current
+        ]
+        if added:
+            db.session.execute(insert(RecipeIngredient), added)
+        save_recipe_summaries(user_id, {recipe.id: wanted}, replace=True)
+        changes[recipe_id] = wanted
     
+    version, = bump_version(user_id, 'recipes')
     response, status = safe_commit()
     if response:
         return response, status
-    
+
+    _update_indexes(user_id, version, changes)
     return jsonify({"message": "Recipe updated"}), 200
 
 @recipes_bp.route('/<int:recipe_id>', methods=['DELETE'])
+@query_budget(7)
 @jwt_required()
 def delete_recipe(recipe_id: int):
     """
@@ -139,15 +831,19 @@ def delete_recipe(recipe_id: int):
         - 200 with success message if successful.
         - 404 if the recipe is not found.
     """
-    user_id = get_jwt_identity()
+    user_id = int(get_jwt_identity())
     recipe = Recipe.query.filter_by(id=recipe_id, user_id=user_id).first()
 
     if not recipe:
         return jsonify({"error": "Recipe not found"}), 404
 
+    delete_recipe_summaries([recipe_id])
     db.session.delete(recipe)
+    record_tombstones(user_id, 'recipe', [recipe_id])
+    version, = bump_version(user_id, 'recipes')
     response, status = safe_commit()
     if response:
         return response, status
-        
+
+    _update_indexes(user_id, version, {recipe_id: None})
     return jsonify({"message": "Recipe deleted"}), 200
\ No newline at end of file
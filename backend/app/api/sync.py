@@ -0,0 +1,108 @@
+from datetime import timedelta
+from flask import request, jsonify, Blueprint, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.models import Ingredient, UserIngredient, User, Tombstone, utcnow
+from app import db
+from app.query_stats import query_budget
+from app.sync import InvalidSyncToken, SyncToken
+from .recipes import _fetch_recipe_page
+
+sync_bp = Blueprint('sync', __name__)
+
+def _deleted_ids(user_id: int, since, live: dict):
+    """
+    Find what was deleted since a time and hasn't been added again since.
+
+    Parameters:
+        - user_id (int): The ID of the user whose deletions to find.
+        - since (datetime): Only find deletions after this UTC time.
+        - live (dict[str, set[int]]): The kinds of deletion to find, "recipe" and/or
+          "cupboard", to the IDs of that kind changed since the same time that exist now.
+
+    Returns:
+        - A dict of each kind to a sorted list of its deleted IDs.
+    """
+    deleted = {kind: set() for kind in live}
+    rows = (
+        db.session.query(Tombstone.kind, Tombstone.entity_id)
+        .filter(Tombstone.user_id == user_id, Tombstone.deleted_at > since, Tombstone.kind.in_(live))
+    )
+    for kind, entity_id in rows:
+        deleted[kind].add(entity_id)
+    return {kind: sorted(ids - live[kind]) for kind, ids in deleted.items()}
+
+@sync_bp.route('/sync', methods=['GET'])
+@query_budget(5)
+@jwt_required()
+def sync_changes():
+    """
+    Retrieve the authenticated user's recipes and cupboard ingredients created, changed
+    or deleted since the client's last sync, so clients keep a local copy up to date
+    with traffic proportional to the changes. Every sync rereads the last
+    SYNC_OVERLAP_SECONDS of changes, so clients should apply them idempotently, and
+    a sync when nothing has changed costs a single query.
+
+    Query parameters:
+        - since (str): The token returned by the client's last sync. If missing,
+          every recipe and cupboard ingredient is returned.
+
+    Returns:
+        - 200 with the recipes and cupboard ingredients created or changed in full, the
+          IDs of deleted recipes and cupboard ingredients, and the token to send next time.
+        - 400 if the token is invalid.
+        - 410 if the token is older than SYNC_TOMBSTONE_RETENTION_DAYS, the client
+          must sync again without it.
+    """
+    since = request.args.get('since')
+    config = current_app.config
+    now = utcnow()
+    if since:
+        try:
+            token = SyncToken.decode(since)
+        except InvalidSyncToken as e:
+            return jsonify({"error": str(e)}), 400
+        if token.time < now - timedelta(days=config['SYNC_TOMBSTONE_RETENTION_DAYS']):
+            return jsonify({"error": "Sync token has expired, sync again without since"}), 410
+    else:
+        token = None
+
+    user_id = int(get_jwt_identity())
+    versions = db.session.query(User.recipes_version, User.cupboard_version).filter_by(id=user_id).one()
+    # rereading the overlap next time picks up writes still in flight now
+    next_token = SyncToken(now - timedelta(seconds=config['SYNC_OVERLAP_SECONDS']), *versions)
+    result = {
+        "token": next_token.encode(),
+        "recipes": [],
+        "cupboard": [],
+        "deleted": {"recipes": [], "cupboard": []},
+    }
+    changed_since = token.time if token else None
+
+    # the version counters are bumped by every write, so unchanged data isn't queried
+    live = {}
+    if token is None or token.recipes_version != versions.recipes_version:
+        result["recipes"] = _fetch_recipe_page(user_id, 0, None, changed_since=changed_since)
+        live['recipe'] = {recipe["id"] for recipe in result["recipes"]}
+
+    if token is None or token.cupboard_version != versions.cupboard_version:
+        query = (
+            db.session.query(Ingredient.id, Ingredient.name, Ingredient.category)
+            .join(UserIngredient, Ingredient.id == UserIngredient.ingredient_id)
+            .filter(UserIngredient.user_id == user_id)
+        )
+        if token:
+            query = query.filter(UserIngredient.updated_at > changed_since)
+        result["cupboard"] = [
+            {"id": ing_id, "name": name, "category": category.name}
+            for ing_id, name, category in query
+        ]
+        live['cupboard'] = {ing["id"] for ing in result["cupboard"]}
+
+    if token and live:
+        deleted = _deleted_ids(user_id, changed_since, live)
+        result["deleted"] = {
+            "recipes": deleted.get('recipe', []),
+            "cupboard": deleted.get('cupboard', []),
+        }
+
+    return jsonify(result), 200
@@ -1,6 +1,86 @@
-from flask import jsonify
+import zlib
+from flask import request, jsonify, Response
+from sqlalchemy import insert, update
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.exc import SQLAlchemyError
 from app import db
+from app.models import User
+from app.catalog import ingredient_catalog
+
+# max number of bound parameters per IN query, well below SQLite's limit
+IN_CHUNK_SIZE = 500
+# max number of IDs a batch read accepts, a couple of IN chunks so it has a fixed query budget
+BATCH_MAX_IDS = 2 * IN_CHUNK_SIZE
+
+def chunked(items: list, size: int = IN_CHUNK_SIZE):
+    """
+    Split a list into consecutive chunks.
+
+    Parameters:
+        - items (list): The list to split.
+        - size (int): The maximum length of each chunk.
+
+    Returns:
+        - A generator of lists of at most size items.
+    """
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def parse_ids(value: str):
+    """
+    Parse the comma separated ids query parameter of a batch read.
+
+    Parameters:
+        - value (str): The parameter's value e.g. "1,2,3".
+
+    Returns:
+        - A tuple of the distinct IDs in the order given and an error message, or None.
+    """
+    try:
+        ids = list(dict.fromkeys(int(part) for part in (value or '').split(',') if part.strip()))
+    except ValueError:
+        return None, "ids must be comma separated integers"
+    if not ids:
+        return None, "ids is required"
+    if len(ids) > BATCH_MAX_IDS:
+        return None, f"At most {BATCH_MAX_IDS} ids can be read at once"
+    return ids, None
+
+def parse_number(name: str, default=None, type_=int):
+    """
+    Parse a numeric query parameter, rejecting values that aren't numbers rather than
+    falling back to the default as request.args.get(type=...) does.
+
+    Parameters:
+        - name (str): The parameter's name.
+        - default: The value if the parameter is missing.
+        - type_ (type): int or float.
+
+    Returns:
+        - A tuple of the value and an error message, or None.
+    """
+    value = request.args.get(name)
+    if value is None:
+        return default, None
+    try:
+        return type_(value), None
+    except ValueError:
+        return None, f"{name} must be {'an integer' if type_ is int else 'a number'}"
+
+def find_missing_ingredients(ingredient_ids):
+    """
+    Find which of the given ingredient IDs don't exist, using the catalog cache and
+    set-based IN queries for uncached IDs rather than one query per ID.
+
+    Parameters:
+        - ingredient_ids (Iterable[int]): The ingredient IDs to check.
+
+    Returns:
+        - A sorted list of the IDs that don't exist.
+    """
+    wanted = set(ingredient_ids)
+    found = ingredient_catalog.get_many(wanted)
+    return sorted(wanted - found.keys())
 
 def safe_commit():
     """
@@ -14,4 +94,123 @@ def safe_commit():
         return None, None
     except SQLAlchemyError as e:
         db.session.rollback()
-        return jsonify({"error": "Database commit failed", "details": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": "Database commit failed", "details": str(e)}), 500
+
+def insert_or_ignore(model, rows: list):
+    """
+    Insert rows, silently skipping any that would violate a unique constraint.
+
+    Parameters:
+        - model (db.Model): The model whose table to insert into.
+        - rows (list[dict]): The column values of each row.
+    """
+    if not rows:
+        return
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'sqlite':
+        stmt = sqlite.insert(model).on_conflict_do_nothing()
+    elif dialect == 'postgresql':
+        stmt = postgresql.insert(model).on_conflict_do_nothing()
+    else:
+        stmt = insert(model).prefix_with('IGNORE')
+    db.session.execute(stmt, rows)
+
+def insert_returning_ids(model, rows: list):
+    """
+    Insert rows and return their new primary keys in the same order as the rows.
+
+    Parameters:
+        - model (db.Model): The model whose table to insert into, with an integer ID.
+        - rows (list[dict]): The column values of each row.
+
+    Returns:
+        - A list of the new IDs.
+    """
+    if not rows:
+        return []
+    if db.session.get_bind().dialect.name == 'sqlite':
+        # SQLite can't order RETURNING rows, so SQLAlchemy would insert one row per
+        # statement. A multi-row INSERT allocates ascending rowids in VALUES order,
+        # so the sorted IDs line up with the rows.
+        return sorted(db.session.scalars(insert(model).returning(model.id), rows).all())
+    return db.session.scalars(
+        insert(model).returning(model.id, sort_by_parameter_order=True), rows
+    ).all()
+
+def bump_version(user_id: int, *kinds: str):
+    """
+    Increment a user's version counters in the current transaction, so cached
+    responses built from the old data are no longer served.
+
+    Parameters:
+        - user_id (int): The ID of the user whose data changed.
+        - kinds (str): The data that changed, "recipes" and/or "cupboard".
+
+    Returns:
+        - A tuple of the new version of each kind.
+    """
+    columns = [getattr(User, f"{kind}_version") for kind in kinds]
+    statement = (
+        update(User).where(User.id == user_id)
+        .values({column: column + 1 for column in columns})
+        .execution_options(synchronize_session=False)
+    )
+    if db.session.get_bind().dialect.update_returning:
+        return tuple(db.session.execute(statement.returning(*columns)).one())
+    # databases without UPDATE ... RETURNING read the new versions back in the same transaction
+    db.session.execute(statement)
+    return tuple(db.session.query(*columns).filter_by(id=user_id).one())
+
+def version_etag(user_id: int, *kinds: str):
+    """
+    Build an ETag for a response from the user's ID and version counters and the
+    request's query string, using a primary key lookup instead of the response's own
+    queries. The ID keeps users at the same versions from sharing ETags.
+
+    Parameters:
+        - user_id (int): The ID of the user the response is for.
+        - kinds (str): The data the response is built from, "recipes" and/or "cupboard".
+
+    Returns:
+        - The ETag value (unquoted).
+    """
+    versions = db.session.query(
+        *[getattr(User, f"{kind}_version") for kind in kinds]
+    ).filter_by(id=user_id).one()
+    parts = [f"u{user_id}"] + [f"{kind}{version}" for kind, version in zip(kinds, versions)]
+    return "-".join(parts) + f"-{zlib.crc32(request.query_string):x}"
+
+def not_modified(etag: str):
+    """
+    Check whether the client already has the response for an ETag.
+
+    Parameters:
+        - etag (str): The ETag of the current response.
+
+    Returns:
+        - A 304 response if the request's If-None-Match matches the ETag, otherwise None.
+    """
+    # compressed responses carry a weak version of the ETag, and If-None-Match matches weakly
+    if not request.if_none_match.contains_weak(etag):
+        return None
+    response = Response(status=304)
+    set_etag(response, etag)
+    return response
+
+def set_etag(response: Response, etag: str):
+    """
+    Add an ETag to a response and require clients to revalidate before reusing it, and
+    vary it by Authorization so caches never serve it to another user.
+
+    Parameters:
+        - response (Response): The response to update.
+        - etag (str): The ETag of the response.
+
+    Returns:
+        - The response.
+    """
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    response.vary.add('Authorization')
+    return response
@@ -0,0 +1,341 @@
+import os
+from itertools import groupby
+from operator import itemgetter
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import func, insert, select, union
+from app import db
+from app.enums import CategoryEnum
+from app.models import Ingredient, Recipe, RecipeIngredient, User, UserIngredient
+from app.api.utils import IN_CHUNK_SIZE, insert_or_ignore, insert_returning_ids, bump_version
+from app.summaries import save_recipe_summaries
+from app.jobs import job_handler, job_path
+
+# version of the backup line format, written in the first line of every backup
+BACKUP_FORMAT = 1
+# rows fetched per database round trip when exporting and inserted per batch when restoring
+BACKUP_BATCH_SIZE = IN_CHUNK_SIZE
+
+class BackupError(Exception):
+    """Raised when a line of a backup can't be restored."""
+
+def _stream(statement):
+    """Yields the rows of a statement BACKUP_BATCH_SIZE at a time from a server-side cursor."""
+    return db.session.execute(statement.execution_options(yield_per=BACKUP_BATCH_SIZE))
+
+def export_user(user_id: int):
+    """
+    Export a user's recipes and cupboard as newline-delimited JSON, reading every table
+    in batches so memory use doesn't grow with the size of the account.
+
+    The first line names the format, then every ingredient the user refers to is
+    written with its name and category so a restore can match it in another database,
+    then each recipe with its ingredient IDs and finally each cupboard ingredient.
+
+    Parameters:
+        - user_id (int): The ID of the user to export.
+
+    Returns:
+        - A generator of JSON lines, each ending in a newline.
+    """
+    dumps = current_app.json.dumps
+    yield dumps({"type": "backup", "format": BACKUP_FORMAT}) + "\n"
+
+    used_ids = union(
+        select(RecipeIngredient.ingredient_id)
+        .join(Recipe, RecipeIngredient.recipe_id == Recipe.id)
+        .where(Recipe.user_id == user_id),
+        select(UserIngredient.ingredient_id).where(UserIngredient.user_id == user_id),
+    )
+    ingredients = _stream(
+        select(Ingredient.id, Ingredient.name, Ingredient.category)
+        .where(Ingredient.id.in_(used_ids))
+        .order_by(Ingredient.id)
+    )
+    for ing_id, name, category in ingredients:
+        yield dumps({"type": "ingredient", "id": ing_id, "name": name, "category": category.name}) + "\n"
+
+    # recipes and their ingredients are read by two cursors in recipe ID order and
+    # merged, so long methods aren't repeated on every ingredient row of a join
+    recipes = _stream(
+        select(Recipe.id, Recipe.title, Recipe.method)
+        .where(Recipe.user_id == user_id)
+        .order_by(Recipe.id)
+    )
+    links = groupby(_stream(
+        select(RecipeIngredient.recipe_id, RecipeIngredient.ingredient_id)
+        .join(Recipe, RecipeIngredient.recipe_id == Recipe.id)
+        .where(Recipe.user_id == user_id)
+        .order_by(RecipeIngredient.recipe_id, RecipeIngredient.id)
+    ), key=itemgetter(0))
+    link = next(links, None)
+    for recipe_id, title, method in recipes:
+        ingredient_ids = []
+        while link is not None and link[0] <= recipe_id:
+            if link[0] == recipe_id:
+                ingredient_ids = [row[1] for row in link[1]]
+            link = next(links, None)
+        yield dumps({
+            "type": "recipe", "title": title, "method": method, "ingredient_ids": ingredient_ids
+        }) + "\n"
+
+    cupboard = _stream(
+        select(UserIngredient.ingredient_id)
+        .where(UserIngredient.user_id == user_id)
+        .order_by(UserIngredient.id)
+    )
+    for ing_id, in cupboard:
+        yield dumps({"type": "cupboard", "ingredient_id": ing_id}) + "\n"
+
+def _validate_record(record):
+    """
+    Validate a single parsed line of a backup.
+
+    Parameters:
+        - record: The parsed line.
+
+    Returns:
+        - An error message if the line is invalid, otherwise None.
+    """
+    if not isinstance(record, dict):
+        return "Line must be an object"
+    kind = record.get('type')
+    if kind == 'backup':
+        if record.get('format') != BACKUP_FORMAT:
+            return f"Unsupported backup format, expected {BACKUP_FORMAT}"
+    elif kind == 'ingredient':
+        if not isinstance(record.get('id'), int) or not record.get('name'):
+            return "Ingredient ID and name are required"
+        if record.get('category') not in CategoryEnum.__members__:
+            return "Invalid category"
+    elif kind == 'recipe':
+        if not record.get('title'):
+            return "Title is required"
+        ingredient_ids = record.get('ingredient_ids')
+        if not isinstance(ingredient_ids, list) or not all(isinstance(ing_id, int) for ing_id in ingredient_ids):
+            return "A list of ingredient IDs is required"
+    elif kind == 'cupboard':
+        if not isinstance(record.get('ingredient_id'), int):
+            return "Ingredient ID is required"
+    else:
+        return "Unknown line type"
+    return None
+
+class _Restore:
+    """
+    State of a restore in progress. Lines are buffered per type and inserted a batch at
+    a time, so only ingredient ID mappings are kept for the whole restore.
+    """
+    def __init__(self, user_id: int):
+        self.user_id = user_id
+        self.counts = {"ingredients_created": 0, "recipes": 0, "cupboard": 0}
+        # backup ingredient ID to the ID of the matching ingredient in this database
+        self.ingredient_ids = {}
+        self.pending = {"ingredient": [], "recipe": [], "cupboard": []}
+
+    def add(self, number: int, record: dict):
+        batch = self.pending.get(record['type'])
+        if batch is None:
+            return
+        batch.append((number, record))
+        if len(batch) >= BACKUP_BATCH_SIZE:
+            self.flush(record['type'])
+
+    def flush(self, kind: str):
+        batch = self.pending[kind]
+        if not batch:
+            return
+        if kind != 'ingredient':
+            # recipes and cupboard lines can refer to any ingredient read before them
+            self.flush('ingredient')
+        getattr(self, f"_insert_{kind}s")(batch)
+        batch.clear()
+
+    def _map(self, number: int, ing_id: int):
+        mapped = self.ingredient_ids.get(ing_id)
+        if mapped is None:
+            raise BackupError(f"Line {number}: Ingredient {ing_id} isn't in the backup")
+        return mapped
+
+    def _insert_ingredients(self, batch: list):
+        """Match ingredients by name and category, creating any this database doesn't have."""
+        # names are folded with the database's lower() on both sides, the same
+        # function the name index uses; Python's str.lower() also folds
+        # non-ASCII letters that SQLite leaves alone
+        names = list({record['name'] for _, record in batch})
+        folded = dict(zip(names, db.session.execute(select(*(func.lower(name) for name in names))).one()))
+        existing = {}
+        rows = (
+            db.session.query(Ingredient.id, func.lower(Ingredient.name), Ingredient.category)
+            .filter(func.lower(Ingredient.name).in_(set(folded.values())))
+            .order_by(Ingredient.id)
+        )
+        for ing_id, name, category in rows:
+            existing.setdefault((name, category.name), ing_id)
+        # backup ingredients without a match, first spelling of each name kept
+        new = {}
+        for _, record in batch:
+            key = (folded[record['name']], record['category'])
+            if key not in existing:
+                new.setdefault(key, record['name'])
+        if new:
+            ids = insert_returning_ids(Ingredient, [
+                {"name": name, "category": CategoryEnum[category]} for (_, category), name in new.items()
+            ])
+            existing.update(zip(new, ids))
+            self.counts["ingredients_created"] += len(ids)
+        for _, record in batch:
+            self.ingredient_ids[record['id']] = existing[(folded[record['name']], record['category'])]
+
+    def _insert_recipes(self, batch: list):
+        ingredient_ids = [
+            [self._map(number, ing_id) for ing_id in record['ingredient_ids']]
+            for number, record in batch
+        ]
+        recipe_ids = insert_returning_ids(Recipe, [
+            {"title": record['title'], "method": record.get('method'), "user_id": self.user_id}
+            for _, record in batch
+        ])
+        # dict.fromkeys drops duplicate ingredients while keeping their order
+        rows = [
+            {"recipe_id": recipe_id, "ingredient_id": ing_id}
+            for recipe_id, ing_ids in zip(recipe_ids, ingredient_ids) for ing_id in dict.fromkeys(ing_ids)
+        ]
+        if rows:
+            db.session.execute(insert(RecipeIngredient), rows)
+        save_recipe_summaries(self.user_id, dict(zip(recipe_ids, ingredient_ids)))
+        self.counts["recipes"] += len(recipe_ids)
+
+    def _insert_cupboards(self, batch: list):
+        insert_or_ignore(UserIngredient, [
+            {"user_id": self.user_id, "ingredient_id": self._map(number, record['ingredient_id'])}
+            for number, record in batch
+        ])
+        self.counts["cupboard"] += len(batch)
+
+def import_user(user_id: int, lines):
+    """
+    Restore a backup written by export_user into a user's account, adding its recipes
+    and cupboard ingredients to any they already have. Ingredients are matched to this
+    database's by name and category, and created if there's no match. Lines are read
+    and inserted in batches, so memory use only grows with the number of distinct
+    ingredients. Nothing is committed, so a failed restore can be rolled back.
+
+    Parameters:
+        - user_id (int): The ID of the user to restore into.
+        - lines (Iterable[str | bytes]): The lines of the backup.
+
+    Returns:
+        - A dict of the number of ingredients created and recipes and cupboard
+          ingredients restored.
+
+    Raises:
+        - BackupError: If a line is invalid, with its line number.
+    """
+    restore = _Restore(user_id)
+    loads = current_app.json.loads
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            record = loads(line)
+        except ValueError:
+            raise BackupError(f"Line {number}: Invalid JSON")
+        error = _validate_record(record)
+        if error:
+            raise BackupError(f"Line {number}: {error}")
+        restore.add(number, record)
+
+    for kind in ('ingredient', 'recipe', 'cupboard'):
+        restore.flush(kind)
+
+    # the version bumps invalidate cached responses and indexes, which are rebuilt on next use
+    kinds = [kind for kind in ('recipes', 'cupboard') if restore.counts[kind]]
+    if kinds:
+        bump_version(user_id, *kinds)
+    return restore.counts
+
+@job_handler('export')
+def _export_job(job_id: int, user_id: int, params: dict, progress):
+    """Writes a user's backup to the job's export file, reporting lines written."""
+    path = job_path(job_id, 'export.ndjson')
+    lines = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        for line in export_user(user_id):
+            f.write(line)
+            lines += 1
+            if lines % BACKUP_BATCH_SIZE == 0:
+                progress(lines)
+    return {"file": 'export.ndjson', "lines": lines, "bytes": os.path.getsize(path)}
+
+def _remove_import(job_id: int):
+    """Removes an import job's uploaded backup once the job has finished."""
+    path = job_path(job_id, 'import.ndjson')
+    if os.path.exists(path):
+        os.remove(path)
+
+@job_handler('import', cleanup=_remove_import)
+def _import_job(job_id: int, user_id: int, params: dict, progress):
+    """
+    Restores the backup uploaded to the job's import file, reporting bytes read. The
+    restore is committed with the job's result, so a rerun never restores it twice.
+    """
+    path = job_path(job_id, 'import.ndjson')
+    size = os.path.getsize(path)
+
+    def lines(f):
+        read = 0
+        for number, line in enumerate(f, 1):
+            read += len(line)
+            if number % BACKUP_BATCH_SIZE == 0:
+                progress(read, size)
+            yield line
+
+    with open(path, 'rb') as f:
+        return import_user(user_id, lines(f))
+
+def _find_user(username: str):
+    user_id = db.session.query(User.id).filter_by(username=username).scalar()
+    if user_id is None:
+        raise click.ClickException(f"No user named {username}")
+    return user_id
+
+@click.group()
+def backup():
+    """Export and restore users' recipes and cupboards."""
+
+@backup.command('export')
+@click.argument('username')
+@click.option('--output', '-o', type=click.File('w'), default='-', help="file to write, defaults to stdout")
+@with_appcontext
+def export_backup(username, output):
+    """Write a user's recipes and cupboard as newline-delimited JSON."""
+    for line in export_user(_find_user(username)):
+        output.write(line)
+
+@backup.command('import')
+@click.argument('username')
+@click.option('--input', '-i', 'input_file', type=click.File('r'), default='-', help="file to read, defaults to stdin")
+@with_appcontext
+def import_backup(username, input_file):
+    """Restore a newline-delimited JSON backup into a user's account."""
+    try:
+        counts = import_user(_find_user(username), input_file)
+        db.session.commit()
+    except BackupError as e:
+        db.session.rollback()
+        raise click.ClickException(str(e))
+    click.echo(
+        f"Restored {counts['recipes']} recipes and {counts['cupboard']} cupboard ingredients, "
+        f"creating {counts['ingredients_created']} ingredients"
+    )
+
+def init_backup(app):
+    """
+    Register the backup CLI commands.
+
+    Parameters:
+        - app (Flask): The app to set up.
+    """
+    app.cli.add_command(backup)
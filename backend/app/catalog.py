@@ -0,0 +1,175 @@
+import string
+import time
+from collections import OrderedDict
+from threading import Lock
+from flask import current_app
+from werkzeug.local import LocalProxy
+from sqlalchemy import func
+from app import db
+from app.models import Ingredient
+from app.replica import using_replica
+
+# SQLite's lower() only folds ASCII letters, so name lookups are cached under the same key
+_ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+class IngredientCatalog:
+    """
+    Bounded LRU cache of the shared ingredient catalog, usable from any blueprint.
+
+    Ingredients are never renamed or deleted, so cached ingredients never go stale and
+    unknown IDs are never cached. Only name lookups can miss a newer ingredient, so
+    they're dropped whenever the highest ingredient ID in the database changes, which
+    keeps workers coherent with ingredients inserted by other workers. Name lookups read
+    from a lagging read replica aren't cached, as they could miss a new ingredient until
+    the next insert clears them.
+
+    Attributes:
+        - hits (int): Number of lookups answered from the cache.
+        - misses (int): Number of lookups that went to the database.
+    """
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._by_id = OrderedDict()
+        self._by_name = OrderedDict()
+        self._max_id = None
+        self._checked_at = 0.0
+        self._lock = Lock()
+
+    def _store(self, cache: OrderedDict, key, value):
+        """Stores a value and evicts the least recently used entries over the size limit."""
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > current_app.config['INGREDIENT_CACHE_SIZE']:
+            cache.popitem(last=False)
+
+    def _check_version(self):
+        """
+        Drop cached name lookups if another worker may have inserted an ingredient,
+        checking the database at most once per INGREDIENT_CACHE_CHECK_INTERVAL seconds.
+        """
+        now = time.monotonic()
+        if using_replica() or now - self._checked_at < current_app.config['INGREDIENT_CACHE_CHECK_INTERVAL']:
+            return
+        latest = db.session.query(func.max(Ingredient.id)).scalar()
+        with self._lock:
+            if latest != self._max_id:
+                self._by_name.clear()
+                self._max_id = latest
+            self._checked_at = now
+
+    def get_many(self, ingredient_ids):
+        """
+        Look up ingredients by ID, querying only the ones that aren't cached.
+
+        Parameters:
+            - ingredient_ids (Iterable[int]): The IDs of the ingredients to find.
+
+        Returns:
+            - A dict of ID to (ID, name, category) tuple for the IDs that exist.
+        """
+        # imported here as the API utils use the catalog
+        from app.api.utils import chunked
+
+        found = {}
+        uncached = []
+        with self._lock:
+            for ing_id in set(ingredient_ids):
+                if ing_id in self._by_id:
+                    self._by_id.move_to_end(ing_id)
+                    found[ing_id] = self._by_id[ing_id]
+                    self.hits += 1
+                else:
+                    uncached.append(ing_id)
+                    self.misses += 1
+
+        for chunk in chunked(uncached):
+            rows = (
+                db.session.query(Ingredient.id, Ingredient.name, Ingredient.category)
+                .filter(Ingredient.id.in_(chunk))
+                .all()
+            )
+            with self._lock:
+                for row in rows:
+                    found[row[0]] = tuple(row)
+                    self._store(self._by_id, row[0], tuple(row))
+        return found
+
+    def find_by_name(self, name: str):
+        """
+        Look up ingredients by name, case-insensitively.
+
+        Parameters:
+            - name (str): The name of the ingredients to find.
+
+        Returns:
+            - A list of (ID, name, category) tuples ordered by ID.
+        """
+        self._check_version()
+        key = name.translate(_ASCII_LOWER)
+        with self._lock:
+            if key in self._by_name:
+                self._by_name.move_to_end(key)
+                self.hits += 1
+                return list(self._by_name[key])
+            self.misses += 1
+
+        rows = [
+            tuple(row) for row in
+            db.session.query(Ingredient.id, Ingredient.name, Ingredient.category)
+            .filter(func.lower(Ingredient.name) == func.lower(name))
+            .order_by(Ingredient.id)
+        ]
+        with self._lock:
+            if not using_replica():
+                self._store(self._by_name, key, tuple(rows))
+            for row in rows:
+                self._store(self._by_id, row[0], row)
+        return rows
+
+    def add(self, ing_id: int, name: str, category):
+        """
+        Cache a newly inserted ingredient and drop any cached lookup of its name.
+
+        Parameters:
+            - ing_id (int): The ID of the committed ingredient.
+            - name (str): The name of the ingredient.
+            - category (CategoryEnum): The category of the ingredient.
+        """
+        with self._lock:
+            self._by_name.pop(name.translate(_ASCII_LOWER), None)
+            self._store(self._by_id, ing_id, (ing_id, name, category))
+
+    def clear(self):
+        """Empty the cache and reset its counters."""
+        with self._lock:
+            self._by_id.clear()
+            self._by_name.clear()
+            self._max_id = None
+            self._checked_at = 0.0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """
+        Returns:
+            - A dict of the cache's hit and miss counts and number of cached entries.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "ids": len(self._by_id),
+                "names": len(self._by_name),
+            }
+
+def _app_catalog():
+    """Returns the current app's catalog cache, creating it on first use."""
+    catalog = current_app.extensions.get('ingredient_catalog')
+    if catalog is None:
+        catalog = current_app.extensions.setdefault('ingredient_catalog', IngredientCatalog())
+    return catalog
+
+# each app has its own cache, so apps sharing a process, e.g. in tests or benchmarks,
+# never see each other's ingredients
+ingredient_catalog = LocalProxy(_app_catalog)
@@ -8,4 +8,107 @@ class Config:
     SECRET_KEY = os.getenv('SECRET_KEY')
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY')
\ No newline at end of file
+    # read only replica of the primary, read heavy routes are routed to it when set
+    SQLALCHEMY_BINDS = {'replica': os.getenv('READ_REPLICA_URL')} if os.getenv('READ_REPLICA_URL') else {}
+    # seconds after a user's write that their reads stay on the primary
+    READ_YOUR_WRITES_SECONDS = float(os.getenv('READ_YOUR_WRITES_SECONDS', 5))
+    JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY')
+    # seconds of changes every sync rereads, should exceed the longest write transaction
+    SYNC_OVERLAP_SECONDS = float(os.getenv('SYNC_OVERLAP_SECONDS', 10))
+    # days deletions are kept for syncing clients, older sync tokens must sync everything again
+    SYNC_TOMBSTONE_RETENTION_DAYS = int(os.getenv('SYNC_TOMBSTONE_RETENTION_DAYS', 30))
+    # max entries in each of the ingredient catalog cache's maps
+    INGREDIENT_CACHE_SIZE = int(os.getenv('INGREDIENT_CACHE_SIZE', 10000))
+    # seconds between checks for ingredients inserted by other workers
+    INGREDIENT_CACHE_CHECK_INTERVAL = float(os.getenv('INGREDIENT_CACHE_CHECK_INTERVAL', 1.0))
+    # max users whose recipe index each worker keeps, least recently used are dropped
+    RECIPE_INDEX_CACHE_SIZE = int(os.getenv('RECIPE_INDEX_CACHE_SIZE', 1000))
+    # max users whose similarity index each worker keeps, least recently used are dropped
+    SIMILARITY_INDEX_CACHE_SIZE = int(os.getenv('SIMILARITY_INDEX_CACHE_SIZE', 1000))
+    # Werkzeug hash method and cost, existing hashes are upgraded on login when changed
+    PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    # processes each worker hashes passwords on, 0 hashes in the request thread. The request
+    # still waits for its hash, and hashlib releases the GIL while hashing, so a pool doesn't
+    # make logins faster. What it does is cap concurrent hashes per worker, and so the CPU and
+    # scrypt memory (32MB each) a burst of logins can take, at the cost of extra processes
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', 0))
+    # add X-Query-Count and X-Query-Time headers to responses, always on in debug mode
+    QUERY_STATS_HEADERS = os.getenv('QUERY_STATS_HEADERS') == '1'
+    # raise QueryBudgetExceeded when a route exceeds its query budget, always on in testing
+    QUERY_BUDGET_RAISE = os.getenv('QUERY_BUDGET_RAISE') == '1'
+    # times a statement can repeat in one request before it's logged as a possible N+1
+    QUERY_REPEAT_THRESHOLD = int(os.getenv('QUERY_REPEAT_THRESHOLD', 5))
+    # bearer token required to scrape /metrics, unset leaves it open
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+    # fraction of requests to profile with cProfile, 0 turns profiling off
+    METRICS_PROFILE_SAMPLE_RATE = float(os.getenv('METRICS_PROFILE_SAMPLE_RATE', 0))
+    # profiled requests slower than this many seconds are saved to METRICS_PROFILE_DIR
+    METRICS_SLOW_REQUEST_SECONDS = float(os.getenv('METRICS_SLOW_REQUEST_SECONDS', 0.5))
+    # directory slow request profiles are saved to
+    METRICS_PROFILE_DIR = os.getenv('METRICS_PROFILE_DIR', 'profiles')
+    # threads running background jobs, 0 runs them in the request thread
+    JOB_WORKERS = int(os.getenv('JOB_WORKERS', 2))
+    # jobs that can wait for a worker before new ones are refused
+    JOB_QUEUE_SIZE = int(os.getenv('JOB_QUEUE_SIZE', 100))
+    # directory job uploads and results are stored in, defaults to jobs in the instance folder
+    JOB_DIR = os.getenv('JOB_DIR')
+    # seconds between a worker process recording its jobs' heartbeats and progress
+    JOB_HEARTBEAT_SECONDS = float(os.getenv('JOB_HEARTBEAT_SECONDS', 5))
+    # seconds without a heartbeat before a job is assumed lost with its process and
+    # rerun, should exceed the longest write transaction as SQLite delays heartbeats
+    JOB_HEARTBEAT_TIMEOUT_SECONDS = float(os.getenv('JOB_HEARTBEAT_TIMEOUT_SECONDS', 60))
+    # times a job is run before it's failed rather than rerun after losing its process
+    JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', 3))
+    # days finished jobs and their files are kept
+    JOB_RETENTION_DAYS = int(os.getenv('JOB_RETENTION_DAYS', 7))
+    # responses smaller than this many bytes aren't worth compressing
+    COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 1024))
+    # zlib level from 1 (fastest) to 9 (smallest), 1 already shrinks recipe lists ~6x
+    COMPRESS_LEVEL = int(os.getenv('COMPRESS_LEVEL', 1))
+    COMPRESS_MIMETYPES = {'application/json', 'application/x-ndjson', 'text/plain'}
+
+    # engine options, explicit SQLALCHEMY_ENGINE_OPTIONS take precedence
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 10))
+    # seconds before a pooled connection is replaced, -1 never replaces them
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', -1))
+    # test connections with a round trip before handing them out of the pool
+    DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING') == '1'
+    # pragmas set on every new SQLite connection, WAL lets readers run alongside the writer
+    SQLITE_JOURNAL_MODE = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+    # milliseconds a connection waits for another's write lock before failing
+    SQLITE_BUSY_TIMEOUT = int(os.getenv('SQLITE_BUSY_TIMEOUT', 5000))
+    # bytes of the database file to memory map
+    SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+    # page cache per connection, negative values are in KiB
+    SQLITE_CACHE_SIZE = int(os.getenv('SQLITE_CACHE_SIZE', -64000))
+
+class DevelopmentConfig(Config):
+    """Config for local development, the default"""
+    DEBUG = True
+
+class TestingConfig(Config):
+    """Config for automated tests, an in memory database and cheap password hashes"""
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = os.getenv('TEST_DATABASE_URL', 'sqlite://')
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'
+    PASSWORD_HASH_WORKERS = 0
+    JOB_WORKERS = 0
+    # durability doesn't matter for a throwaway database
+    SQLITE_SYNCHRONOUS = 'OFF'
+
+class ProductionConfig(Config):
+    """Config for deployments, pooled connections are checked and recycled"""
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 10))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 20))
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 1800))
+    DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', '1') == '1'
+
+# config profiles selected by APP_ENV
+CONFIGS = {
+    'development': DevelopmentConfig,
+    'testing': TestingConfig,
+    'production': ProductionConfig,
+}
\ No newline at end of file
@@ -0,0 +1,56 @@
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from app import db
+
+def engine_options(config):
+    """
+    Build the engine's pool options from the DB_POOL_* settings.
+
+    Parameters:
+        - config (Config): The app's config.
+
+    Returns:
+        - A dict of options for create_engine, with SQLALCHEMY_ENGINE_OPTIONS overriding them.
+    """
+    options = {
+        'pool_pre_ping': config['DB_POOL_PRE_PING'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+    }
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    # in memory SQLite databases use a single shared connection rather than a sized pool
+    if not (url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')):
+        options['pool_size'] = config['DB_POOL_SIZE']
+        options['max_overflow'] = config['DB_MAX_OVERFLOW']
+    return {**options, **config['SQLALCHEMY_ENGINE_OPTIONS']}
+
+def _sqlite_pragmas(config):
+    """Returns a connect event listener setting the configured pragmas on a SQLite connection."""
+    pragmas = [
+        f"PRAGMA journal_mode={config['SQLITE_JOURNAL_MODE']}",
+        f"PRAGMA synchronous={config['SQLITE_SYNCHRONOUS']}",
+        f"PRAGMA busy_timeout={config['SQLITE_BUSY_TIMEOUT']}",
+        f"PRAGMA mmap_size={config['SQLITE_MMAP_SIZE']}",
+        f"PRAGMA cache_size={config['SQLITE_CACHE_SIZE']}",
+    ]
+
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+    return on_connect
+
+def init_database(app):
+    """
+    Initialise the database with the configured engine options, and set the SQLite
+    pragmas on every new connection when the database is SQLite.
+
+    Parameters:
+        - app (Flask): The app to initialise the database for.
+    """
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config)
+    db.init_app(app)
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == 'sqlite':
+                event.listen(engine, 'connect', _sqlite_pragmas(app.config))
@@ -0,0 +1,225 @@
+import math
+from bisect import bisect_left, insort
+from collections import Counter
+from threading import Lock
+from flask import current_app
+from sqlalchemy import func
+from werkzeug.local import LocalProxy
+from app import db
+from app.models import Ingredient
+
+# minimum trigram Jaccard similarity for a fuzzy match
+FUZZY_THRESHOLD = 0.3
+
+def normalise(name: str):
+    """Lowercase a name and collapse its whitespace for indexing and lookups."""
+    return " ".join(name.lower().split())
+
+def trigrams(text: str):
+    """Returns the set of padded character trigrams of a normalised string."""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class IngredientIndex:
+    """
+    In-process autocomplete index over the shared ingredient catalog.
+
+    Names are kept in sorted lists so prefix lookups are a binary search, and a
+    trigram index provides typo-tolerant matches when there are too few prefix hits.
+    Ingredients are never renamed or deleted, so the index only ever grows.
+
+    Attributes:
+        - max_id (int): Highest ingredient ID up to which every ingredient has been
+          indexed by refresh. Ingredients added singly may be above it.
+        - ingredients (dict[int, tuple]): Ingredient ID to (name, category).
+        - names (list[tuple]): Sorted (normalised name, ID) pairs.
+        - words (list[tuple]): Sorted (word, ID) pairs for every word after the first.
+        - grams (dict[str, set[int]]): Trigram to the IDs of names containing it.
+        - gram_counts (dict[int, int]): Ingredient ID to the number of trigrams in its name.
+    """
+    def __init__(self):
+        self.max_id = 0
+        self.ingredients = {}
+        self.names = []
+        self.words = []
+        self.grams = {}
+        self.gram_counts = {}
+        self._lock = Lock()
+
+    def add(self, ing_id: int, name: str, category):
+        """
+        Add a single ingredient to the index, ignoring ones already indexed. Doesn't
+        advance max_id, so the next refresh still indexes ingredients other workers
+        inserted before this one.
+
+        Parameters:
+            - ing_id (int): The ID of the ingredient.
+            - name (str): The name of the ingredient.
+            - category (CategoryEnum): The category of the ingredient.
+        """
+        with self._lock:
+            if ing_id in self.ingredients:
+                return
+            key = self._index(ing_id, name, category)
+            insort(self.names, (key, ing_id))
+            for word in key.split()[1:]:
+                insort(self.words, (word, ing_id))
+
+    def _index(self, ing_id: int, name: str, category):
+        """
+        Index an ingredient's name and trigrams, leaving the sorted name and word lists
+        to the caller. Must hold the lock.
+
+        Returns:
+            - The normalised name.
+        """
+        key = normalise(name)
+        self.ingredients[ing_id] = (name, category)
+        name_grams = trigrams(key)
+        for gram in name_grams:
+            self.grams.setdefault(gram, set()).add(ing_id)
+        self.gram_counts[ing_id] = len(name_grams)
+        return key
+
+    def refresh(self):
+        """
+        Index any ingredients inserted since the last refresh, including ones
+        added by other workers. Costs a single primary key lookup when up to date.
+        """
+        latest = db.session.query(func.max(Ingredient.id)).scalar() or 0
+        if latest <= self.max_id:
+            return
+        rows = (
+            db.session.query(Ingredient.id, Ingredient.name, Ingredient.category)
+            .filter(Ingredient.id > self.max_id)
+            .order_by(Ingredient.id)
+            .all()
+        )
+        # appended and sorted once, as inserting each row into the sorted lists is quadratic
+        # when the index is first built
+        names, words = [], []
+        with self._lock:
+            for ing_id, name, category in rows:
+                if ing_id in self.ingredients:
+                    continue
+                key = self._index(ing_id, name, category)
+                names.append((key, ing_id))
+                words.extend((word, ing_id) for word in key.split()[1:])
+            self.names.extend(names)
+            self.names.sort()
+            self.words.extend(words)
+            self.words.sort()
+            if rows:
+                self.max_id = rows[-1][0]
+
+    def clear(self):
+        """Empty the index, so the next refresh rebuilds it from the database."""
+        with self._lock:
+            self.max_id = 0
+            self.ingredients.clear()
+            self.names.clear()
+            self.words.clear()
+            self.grams.clear()
+            self.gram_counts.clear()
+
+    def _prefixed(self, entries: list, prefix: str):
+        """Yields the IDs of sorted (key, ID) entries whose key starts with prefix. Must hold the lock."""
+        i = bisect_left(entries, (prefix,))
+        while i < len(entries) and entries[i][0].startswith(prefix):
+            yield entries[i][1]
+            i += 1
+
+    def _fuzzy(self, key: str, seen: set):
+        """
+        Yields the IDs of names whose trigram Jaccard similarity with the key is at
+        least FUZZY_THRESHOLD, most similar first.
+
+        A match must share at least FUZZY_THRESHOLD of the key's trigrams, so
+        candidates are only drawn from the rarest trigrams (prefix filtering) and
+        then checked against the common ones. Must hold the lock.
+        """
+        query_grams = sorted(trigrams(key), key=lambda gram: len(self.grams.get(gram, ())))
+        min_shared = math.ceil(FUZZY_THRESHOLD * len(query_grams))
+        rare = query_grams[:len(query_grams) - min_shared + 1]
+        common = query_grams[len(rare):]
+
+        shared = Counter()
+        for gram in rare:
+            shared.update(self.grams.get(gram, ()))
+
+        scored = []
+        for ing_id, count in shared.items():
+            if ing_id in seen:
+                continue
+            count += sum(1 for gram in common if ing_id in self.grams.get(gram, ()))
+            similarity = count / (len(query_grams) + self.gram_counts[ing_id] - count)
+            if similarity >= FUZZY_THRESHOLD:
+                scored.append((-similarity, ing_id))
+        scored.sort()
+        return (ing_id for _, ing_id in scored)
+
+    def search(self, query: str, limit: int = 10, category=None):
+        """
+        Find ingredients matching the query, best matches first.
+
+        Exact matches rank first, then names starting with the query, then names
+        with a later word starting with the query, then fuzzy trigram matches.
+
+        Parameters:
+            - query (str): The (partial) ingredient name typed by the user.
+            - limit (int): The maximum number of results.
+            - category (CategoryEnum): Only return ingredients in this category (optional).
+
+        Returns:
+            - A list of (ID, name, category) tuples.
+        """
+        key = normalise(query)
+        if not key:
+            return []
+
+        # add and refresh change the lists and sets in place, and a list is empty while it's sorted
+        with self._lock:
+            results = []
+            seen = set()
+
+            def collect(ids):
+                for ing_id in ids:
+                    if len(results) >= limit:
+                        return
+                    if ing_id in seen:
+                        continue
+                    name, ing_category = self.ingredients[ing_id]
+                    if category is not None and ing_category != category:
+                        continue
+                    seen.add(ing_id)
+                    results.append((ing_id, name, ing_category))
+
+            # prefix matches are sorted alphabetically, so an exact match comes first
+            collect(self._prefixed(self.names, key))
+            collect(self._prefixed(self.words, key))
+
+            # only fall back to fuzzy matching when there are too few prefix matches
+            if len(results) < limit and len(key) >= 3:
+                collect(self._fuzzy(key, seen))
+
+        return results
+
+def _app_index():
+    """Returns the current app's ingredient index, creating it on first use."""
+    index = current_app.extensions.get('ingredient_index')
+    if index is None:
+        index = current_app.extensions.setdefault('ingredient_index', IngredientIndex())
+    return index
+
+# each app has its own index, like the ingredient catalog cache
+ingredient_index = LocalProxy(_app_index)
+
+def get_ingredient_index():
+    """
+    Return the current app's ingredient index, brought up to date with the database.
+
+    Returns:
+        - The IngredientIndex.
+    """
+    ingredient_index.refresh()
+    return ingredient_index
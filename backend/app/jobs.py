@@ -0,0 +1,327 @@
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from threading import Event, Lock, Thread
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import or_, update
+from sqlalchemy.exc import SQLAlchemyError
+from app import db
+from app.models import Job, utcnow
+from app.api.utils import chunked
+
+# job kind to the function that runs it and its cleanup, registered with job_handler
+_handlers = {}
+# job ID to the latest progress of the jobs running in this process, written to their
+# rows by the heartbeat
+_running = {}
+# IDs of the jobs submitted to this process's pool that haven't finished
+_scheduled = set()
+_executor = None
+_heartbeat = None
+_stop = Event()
+_lock = Lock()
+
+class JobQueueFull(Exception):
+    """Raised when a job is submitted while JOB_QUEUE_SIZE jobs are already waiting."""
+
+def job_handler(kind: str, cleanup=None):
+    """
+    Register the function that runs a kind of job. It's called in an app context with
+    the job's ID, user ID, params and a progress(done, total=None) callback, in units
+    of the handler's choosing, and returns the job's JSON result. Raising fails the job
+    with the exception's message and rolls back its writes.
+
+    Handlers should leave their writes uncommitted, they're committed in the same
+    transaction as the job's result, so a job whose process stops before then is
+    rerun from the start with none of its writes applied. Anything a handler commits
+    itself must be safe to apply again.
+
+    Parameters:
+        - kind (str): The kind of job the function runs.
+        - cleanup (callable): Called with the job's ID once its result is committed,
+          e.g. to remove its input files, which a rerun would still need until then.
+
+    Returns:
+        - A decorator registering the function.
+    """
+    def decorator(func):
+        _handlers[kind] = (func, cleanup)
+        return func
+    return decorator
+
+def _job_dir():
+    """Returns JOB_DIR, creating it if needed."""
+    directory = current_app.config['JOB_DIR']
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+def job_path(job_id: int, name: str):
+    """
+    Returns:
+        - The path of one of a job's files in JOB_DIR, creating the directory if needed.
+    """
+    return os.path.join(_job_dir(), f"job-{job_id}-{name}")
+
+def spool_upload(stream):
+    """
+    Save an uploaded body to a temporary file in JOB_DIR before the job it's for is
+    created, so no transaction is open while a slow client uploads.
+
+    Parameters:
+        - stream: The file-like body to save, e.g. request.stream.
+
+    Returns:
+        - The path of the file, to be given to the job with start_job's files.
+    """
+    fd, path = tempfile.mkstemp(prefix='upload-', suffix='.tmp', dir=_job_dir())
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            shutil.copyfileobj(stream, f)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path
+
+def job_dict(job: Job):
+    """
+    Returns:
+        - A dict of a job's status, progress and result for the API.
+    """
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "progress": job.progress,
+        "result": job.result,
+        "error": job.error,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+
+def _run_job(app, job_id: int):
+    """
+    Claim a queued job and run it in its own app context, committing its writes with
+    its result. The claim is a conditional update, so a job is only run once when
+    several processes recover the same jobs, and the result is only committed if the
+    job wasn't requeued and claimed again in the meantime.
+    """
+    try:
+        with app.app_context():
+            now = utcnow()
+            claimed = db.session.execute(
+                update(Job).where(Job.id == job_id, Job.status == 'queued')
+                .values(status='running', started_at=now, heartbeat_at=now,
+                        attempts=Job.attempts + 1, progress=None)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            db.session.commit()
+            if not claimed:
+                return
+
+            job = db.session.get(Job, job_id)
+            kind, user_id, params, attempt = job.kind, job.user_id, job.params or {}, job.attempts
+            handler, cleanup = _handlers[kind]
+            _running[job_id] = None
+
+            def progress(done: int, total: int = None):
+                _running[job_id] = {"done": done, "total": total}
+
+            try:
+                result = handler(job_id, user_id, params, progress)
+                values = {"status": 'succeeded', "result": result}
+            except Exception as e:
+                db.session.rollback()
+                current_app.logger.exception("Job %d (%s) failed", job_id, kind)
+                values = {"status": 'failed', "error": str(e)}
+            finished = db.session.execute(
+                update(Job).where(Job.id == job_id, Job.attempts == attempt)
+                .values(finished_at=utcnow(), progress=_running.get(job_id), **values)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            if not finished:
+                # requeued and claimed again while it ran, the other run's writes stand
+                db.session.rollback()
+                return
+            db.session.commit()
+            if cleanup:
+                cleanup(job_id)
+    finally:
+        with _lock:
+            _running.pop(job_id, None)
+            _scheduled.discard(job_id)
+
+def _schedule(job_id: int):
+    """Runs a job on the pool, or inline if JOB_WORKERS is 0."""
+    app = current_app._get_current_object()
+    with _lock:
+        if job_id in _scheduled:
+            return
+        _scheduled.add(job_id)
+    if _executor is None:
+        _run_job(app, job_id)
+    else:
+        _executor.submit(_run_job, app, job_id)
+
+def prepare_job(user_id: int, kind: str, params: dict = None):
+    """
+    Create a job without committing it, flushing it so it has an ID, e.g. to move its
+    files into place before it's queued.
+
+    Parameters:
+        - user_id (int): The ID of the user the job is for.
+        - kind (str): The kind of job, see job_handler.
+        - params (dict): JSON parameters passed to the job's handler.
+
+    Returns:
+        - The Job, to be queued with queue_job.
+
+    Raises:
+        - JobQueueFull: If JOB_QUEUE_SIZE jobs are already waiting.
+    """
+    if kind not in _handlers:
+        raise ValueError(f"Unknown job kind {kind}")
+    with _lock:
+        # jobs already running in this process aren't waiting
+        waiting = len(_scheduled) - len(_running)
+    if waiting >= current_app.config['JOB_QUEUE_SIZE']:
+        raise JobQueueFull("Too many jobs are waiting, try again later")
+    job = Job(user_id=user_id, kind=kind, params=params)
+    db.session.add(job)
+    db.session.flush()
+    return job
+
+def queue_job(job: Job):
+    """
+    Queue a job made by prepare_job, committing the current transaction.
+
+    Returns:
+        - The queued Job.
+    """
+    # read before committing, so the job is reloaded after an inline run rather than before
+    job_id = job.id
+    db.session.commit()
+    _schedule(job_id)
+    return job
+
+def _beat():
+    """Record the heartbeat and latest progress of the jobs running in this process."""
+    now = utcnow()
+    for job_id, progress in list(_running.items()):
+        db.session.execute(
+            update(Job).where(Job.id == job_id, Job.status == 'running')
+            .values(heartbeat_at=now, progress=progress)
+            .execution_options(synchronize_session=False)
+        )
+    db.session.commit()
+
+def _recover_jobs():
+    """
+    Requeue running jobs whose process stopped sending heartbeats, failing those that
+    have used up JOB_MAX_ATTEMPTS, and run every queued job not already scheduled here.
+    """
+    config = current_app.config
+    now = utcnow()
+    lost = (
+        Job.status == 'running',
+        or_(Job.heartbeat_at.is_(None), Job.heartbeat_at < now - timedelta(seconds=config['JOB_HEARTBEAT_TIMEOUT_SECONDS'])),
+    )
+    db.session.execute(
+        update(Job).where(*lost, Job.attempts >= config['JOB_MAX_ATTEMPTS'])
+        .values(status='failed', error="Job stopped responding", finished_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.execute(
+        update(Job).where(*lost)
+        .values(status='queued', started_at=None, heartbeat_at=None)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    for (job_id,) in db.session.query(Job.id).filter(Job.status == 'queued').order_by(Job.id):
+        _schedule(job_id)
+
+def _heartbeat_loop(app):
+    """
+    Every JOB_HEARTBEAT_SECONDS, record the heartbeats of this process's jobs and
+    recover jobs lost with other processes. On SQLite a beat waits for any long write
+    transaction, e.g. an import, and is skipped if it waits too long.
+    """
+    interval = app.config['JOB_HEARTBEAT_SECONDS']
+    while True:
+        with app.app_context():
+            try:
+                _beat()
+                _recover_jobs()
+            except SQLAlchemyError:
+                db.session.rollback()
+                current_app.logger.warning("Job heartbeat failed", exc_info=True)
+        if _stop.wait(interval):
+            return
+
+def _start_heartbeat():
+    """
+    Start the heartbeat thread once per process. Done on the first request rather than
+    at startup, so CLI commands never pick up jobs.
+    """
+    global _heartbeat
+    if _executor is None or _heartbeat is not None:
+        return
+    with _lock:
+        if _heartbeat is not None:
+            return
+        _heartbeat = Thread(
+            target=_heartbeat_loop, args=(current_app._get_current_object(),),
+            name='job-heartbeat', daemon=True,
+        )
+    _heartbeat.start()
+
+@click.group()
+def jobs():
+    """Manage background jobs."""
+
+@jobs.command('prune')
+@with_appcontext
+def prune_jobs():
+    """Delete finished jobs older than JOB_RETENTION_DAYS, their files and stale uploads."""
+    retention = timedelta(days=current_app.config['JOB_RETENTION_DAYS'])
+    cutoff = utcnow() - retention
+    old = Job.query.filter(
+        Job.status.in_(['succeeded', 'failed']), Job.finished_at < cutoff
+    ).all()
+    prefixes = tuple(f"job-{job.id}-" for job in old)
+    directory = current_app.config['JOB_DIR']
+    if os.path.isdir(directory):
+        uploaded_before = time.time() - retention.total_seconds()
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            # uploads whose job was never created, e.g. because the queue was full
+            abandoned = name.startswith('upload-') and os.path.getmtime(path) < uploaded_before
+            if (prefixes and name.startswith(prefixes)) or abandoned:
+                os.remove(path)
+    for chunk in chunked([job.id for job in old]):
+        Job.query.filter(Job.id.in_(chunk)).delete(synchronize_session=False)
+    db.session.commit()
+    click.echo(f"Deleted {len(old)} jobs finished before {cutoff:%Y-%m-%d %H:%M}")
+
+def init_jobs(app):
+    """
+    Start the background job thread pool, and the heartbeat that recovers jobs left by
+    stopped processes on the first request, and register the jobs CLI commands.
+
+    Parameters:
+        - app (Flask): The app to set up.
+    """
+    global _executor
+    # under the instance folder by default, so job files don't land in the working directory
+    app.config['JOB_DIR'] = os.path.abspath(app.config['JOB_DIR'] or os.path.join(app.instance_path, 'jobs'))
+    workers = app.config['JOB_WORKERS']
+    with _lock:
+        if workers > 0 and _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='job')
+    app.before_request(_start_heartbeat)
+    app.cli.add_command(jobs)
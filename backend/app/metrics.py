@@ -0,0 +1,229 @@
+import cProfile
+import os
+import random
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from flask import current_app, g, request
+
+# upper bounds of the histogram buckets, the last bucket is +Inf
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1000, 10000, 100000, 1000000, 10000000)
+
+class Histogram:
+    """
+    Observations counted into fixed buckets, the bucket counts aren't cumulative until
+    they're exported.
+
+    Attributes:
+        - counts (list[int]): Observations per bucket, with a final +Inf bucket.
+        - sum (float): Sum of every observation.
+    """
+    __slots__ = ('counts', 'sum')
+
+    def __init__(self, buckets: tuple):
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, buckets: tuple, value: float):
+        self.counts[bisect_left(buckets, value)] += 1
+        self.sum += value
+
+    def merge(self, other):
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+        self.sum += other.sum
+
+class _Shard:
+    """
+    One thread's metrics. Only its own thread writes to a shard, so recording a request
+    takes no locks, and the shards are summed when the metrics are scraped.
+    """
+    def __init__(self):
+        self.in_flight = 0
+        self.latency = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self.size = defaultdict(lambda: Histogram(SIZE_BUCKETS))
+        self.status = defaultdict(int)
+
+    def merge(self, other):
+        self.in_flight += other.in_flight
+        # copying a dict is atomic, so a request finishing mid scrape can't break iteration
+        for key, histogram in other.latency.copy().items():
+            self.latency[key].merge(histogram)
+        for key, histogram in other.size.copy().items():
+            self.size[key].merge(histogram)
+        for key, count in other.status.copy().items():
+            self.status[key] += count
+
+class Metrics:
+    """
+    Per endpoint request metrics, collected into a shard per thread. The shards of
+    finished threads are folded into a single retired shard, so servers that start a
+    thread per request don't accumulate them.
+    """
+    def __init__(self):
+        self._local = threading.local()
+        # (shard, thread) of every thread that has recorded a request and may still be running
+        self._shards = []
+        self._retired = _Shard()
+        self._lock = threading.Lock()
+
+    def shard(self):
+        """Returns the calling thread's shard, registering it on first use."""
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = _Shard()
+            with self._lock:
+                # a finished thread can't write to its shard again, so it's safe to fold in
+                live = []
+                for other, thread in self._shards:
+                    if thread.is_alive():
+                        live.append((other, thread))
+                    else:
+                        self._retired.merge(other)
+                live.append((shard, threading.current_thread()))
+                self._shards = live
+        return shard
+
+    def collect(self):
+        """
+        Sum every thread's shard.
+
+        Returns:
+            - A tuple of the in flight request count and the latency histograms, size
+              histograms and status counts keyed by (blueprint, endpoint) and
+              (blueprint, endpoint, status).
+        """
+        total = _Shard()
+        with self._lock:
+            total.merge(self._retired)
+            shards = [shard for shard, _ in self._shards]
+        for shard in shards:
+            total.merge(shard)
+        return total.in_flight, total.latency, total.size, total.status
+
+metrics = Metrics()
+_profile_lock = threading.Lock()
+
+def _labels(**labels):
+    return ",".join(f'{name}="{value}"' for name, value in labels.items())
+
+def _histogram_lines(name: str, buckets: tuple, histograms: dict):
+    lines = []
+    for (blueprint, endpoint), histogram in sorted(histograms.items()):
+        labels = _labels(blueprint=blueprint, endpoint=endpoint)
+        cumulative = 0
+        for bound, count in zip(buckets + ("+Inf",), histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_sum{{{labels}}} {histogram.sum}')
+        lines.append(f'{name}_count{{{labels}}} {cumulative}')
+    return lines
+
+def render_metrics():
+    """
+    Render the request metrics and ingredient cache statistics in the Prometheus text
+    exposition format.
+
+    Returns:
+        - The metrics as a string.
+    """
+    from app.catalog import ingredient_catalog
+
+    in_flight, latency, size, status = metrics.collect()
+    lines = [
+        "# HELP http_requests_in_flight Requests currently being handled.",
+        "# TYPE http_requests_in_flight gauge",
+        f"http_requests_in_flight {in_flight}",
+        "# HELP http_request_duration_seconds Request latency by endpoint.",
+        "# TYPE http_request_duration_seconds histogram",
+        *_histogram_lines("http_request_duration_seconds", LATENCY_BUCKETS, latency),
+        "# HELP http_response_size_bytes Response body size by endpoint, streamed responses excluded.",
+        "# TYPE http_response_size_bytes histogram",
+        *_histogram_lines("http_response_size_bytes", SIZE_BUCKETS, size),
+        "# HELP http_requests_total Requests by endpoint and status code.",
+        "# TYPE http_requests_total counter",
+    ]
+    for (blueprint, endpoint, code), count in sorted(status.items()):
+        lines.append(f'http_requests_total{{{_labels(blueprint=blueprint, endpoint=endpoint, status=code)}}} {count}')
+
+    cache = ingredient_catalog.stats()
+    lines += [
+        "# HELP ingredient_cache_hits_total Ingredient catalog cache hits.",
+        "# TYPE ingredient_cache_hits_total counter",
+        f"ingredient_cache_hits_total {cache['hits']}",
+        "# HELP ingredient_cache_misses_total Ingredient catalog cache misses.",
+        "# TYPE ingredient_cache_misses_total counter",
+        f"ingredient_cache_misses_total {cache['misses']}",
+        "# HELP ingredient_cache_entries Entries in the ingredient catalog cache.",
+        "# TYPE ingredient_cache_entries gauge",
+        f'ingredient_cache_entries{{map="ids"}} {cache["ids"]}',
+        f'ingredient_cache_entries{{map="names"}} {cache["names"]}',
+    ]
+    return "\n".join(lines) + "\n"
+
+def _start_request():
+    metrics.shard().in_flight += 1
+    g.metrics_in_flight = True
+    g.metrics_start = time.perf_counter()
+
+    config = current_app.config
+    rate = config['METRICS_PROFILE_SAMPLE_RATE']
+    # only one request is profiled at a time to bound the overhead
+    if rate > 0 and random.random() < rate and _profile_lock.acquire(blocking=False):
+        g.metrics_profile = cProfile.Profile()
+        g.metrics_profile.enable()
+
+def _finish_request(response):
+    start = g.pop('metrics_start', None)
+    if start is None:
+        return response
+    elapsed = time.perf_counter() - start
+
+    profile = g.pop('metrics_profile', None)
+    if profile is not None:
+        profile.disable()
+        _profile_lock.release()
+        if elapsed >= current_app.config['METRICS_SLOW_REQUEST_SECONDS']:
+            _save_profile(profile, elapsed)
+
+    shard = metrics.shard()
+    key = (request.blueprint or "", request.endpoint or "unmatched")
+    shard.latency[key].observe(LATENCY_BUCKETS, elapsed)
+    if response.content_length is not None:
+        shard.size[key].observe(SIZE_BUCKETS, response.content_length)
+    shard.status[key + (response.status_code,)] += 1
+    return response
+
+def _end_request(exc):
+    # runs even when a view raises, so the in flight gauge can't leak
+    if g.pop('metrics_in_flight', False):
+        metrics.shard().in_flight -= 1
+    profile = g.pop('metrics_profile', None)
+    if profile is not None:
+        profile.disable()
+        _profile_lock.release()
+
+def _save_profile(profile: cProfile.Profile, elapsed: float):
+    """Dump a slow request's profile to METRICS_PROFILE_DIR for pstats or snakeviz."""
+    directory = current_app.config['METRICS_PROFILE_DIR']
+    os.makedirs(directory, exist_ok=True)
+    name = f"{request.endpoint or 'unmatched'}-{time.time_ns()}.prof"
+    path = os.path.join(directory, name)
+    profile.dump_stats(path)
+    current_app.logger.warning(
+        "Slow request to %s took %.0fms, profile saved to %s", request.endpoint, elapsed * 1000, path
+    )
+
+def init_metrics(app):
+    """
+    Record per endpoint latency, response size and status code metrics for every request,
+    and profile a sample of requests to catch slow ones.
+
+    Parameters:
+        - app (Flask): The app to instrument.
+    """
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.teardown_request(_end_request)
@@ -1,8 +1,16 @@
+from datetime import datetime, timezone
 from app import db
-from werkzeug.security import generate_password_hash, check_password_hash
+from app.passwords import hash_password, verify_password
 from flask_login import UserMixin
 from app.enums import CategoryEnum
 
+# rows that existed before change tracking was added are treated as this old
+EPOCH = datetime(1970, 1, 1)
+
+def utcnow():
+    """Returns the current UTC time as a naive datetime, the format change times are stored in."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
 class RecipeIngredient(db.Model):
     """
     Association model between recipes and ingredients.
@@ -13,6 +21,9 @@ class RecipeIngredient(db.Model):
         - ingredient_id (int): Foreign key referencing the associated ingredient.
     """
     __tablename__ = 'recipe_ingredients'
+    __table_args__ = (
+        db.Index('ix_recipe_ingredients_recipe_id_ingredient_id', 'recipe_id', 'ingredient_id', unique=True),
+    )
     id = db.Column(db.Integer, primary_key=True)
     recipe_id = db.Column(db.Integer, db.ForeignKey('recipes.id'), nullable=False)
     ingredient_id = db.Column(db.Integer, db.ForeignKey('ingredients.id'), nullable=False)
@@ -25,11 +36,17 @@ class UserIngredient(db.Model):
         - id (int): Primary key.
         - user_id (int): Foreign key referencing the associated user.
         - ingredient_id (int): Foreign key referencing the associated ingredient.
+        - updated_at (datetime): When the ingredient was added to the cupboard, in UTC.
     """
     __tablename__ = 'user_ingredients'
+    __table_args__ = (
+        db.Index('ix_user_ingredients_user_id_ingredient_id', 'user_id', 'ingredient_id', unique=True),
+        db.Index('ix_user_ingredients_user_id_updated_at', 'user_id', 'updated_at'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     ingredient_id = db.Column(db.Integer, db.ForeignKey('ingredients.id'), nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=False, default=utcnow, onupdate=utcnow, server_default=str(EPOCH))
 
 class User(UserMixin, db.Model):
     """
@@ -41,22 +58,26 @@ class User(UserMixin, db.Model):
         - password_hash (str): Hashed password for authentication.
         - recipes (Relationship[Recipe]): Recipes created by the user.
         - cupboard (Relationship[UserIngredient]): Ingredients in the user's cupboard.
+        - recipes_version (int): Incremented on every change to the user's recipes.
+        - cupboard_version (int): Incremented on every change to the user's cupboard.
     """
     __tablename__ = 'users'
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(100), unique=True, nullable=False)
-    password_hash = db.Column(db.String(128), nullable=False)
+    password_hash = db.Column(db.String(256), nullable=False)
     recipes = db.relationship('Recipe', backref='owner', lazy=True)
     cupboard = db.relationship('UserIngredient', backref='user', lazy=True)
+    recipes_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    cupboard_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
 
     def set_password(self, password: str):
         """
-        Generates and sets password hash for the given password.
+        Generates and sets password hash for the given password on the hashing pool.
 
         Parameters:
             - password (str): The password to set.
         """
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
     
     def check_password(self, password: str):
         """
@@ -65,7 +86,7 @@ class User(UserMixin, db.Model):
         Parameters:
             - password (str): The password to check.
         """
-        return check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)
     
 class Ingredient(db.Model):
     """"
@@ -81,6 +102,9 @@ class Ingredient(db.Model):
     name = db.Column(db.String(100), nullable=False)
     category = db.Column(db.Enum(CategoryEnum), nullable=False)
 
+# case-insensitive name lookups filter on lower(name)
+db.Index('ix_ingredients_lower_name_category', db.func.lower(Ingredient.name), Ingredient.category)
+
 class Recipe(db.Model):
     """
     Recipe model.
@@ -91,11 +115,125 @@ class Recipe(db.Model):
         - method (Text): Step-by-step instructions for the recipe (nullable).
         - user_id (int): Foreign key referencing the user who created it.
         - ingredients (Relationship[RecipeIngredient]): List of ingredients in the recipe.
+        - updated_at (datetime): When the recipe or its ingredients last changed, in UTC.
     """
     __tablename__ = 'recipes'
+    __table_args__ = (
+        db.Index('ix_recipes_user_id_updated_at', 'user_id', 'updated_at'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
-    method = db.Column(db.Text, nullable=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    # deferred so listings that don't need the method text never load it
+    method = db.deferred(db.Column(db.Text, nullable=True))
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    # recipe ingredients aren't tracked themselves, changing them updates their recipe
+    updated_at = db.Column(db.DateTime, nullable=False, default=utcnow, onupdate=utcnow, server_default=str(EPOCH))
     # cascade to delete recipe ingredients when their recipes are deleted
-    ingredients = db.relationship('RecipeIngredient', backref='recipe', lazy=True, cascade="all, delete-orphan")
\ No newline at end of file
+    ingredients = db.relationship('RecipeIngredient', backref='recipe', lazy=True, cascade="all, delete-orphan")
+
+class RecipeSummary(db.Model):
+    """
+    Denormalised summary of a recipe's ingredients, kept up to date on every write to
+    them, so recipes can be filtered by their ingredients without joining and
+    aggregating the association table.
+
+    Attributes:
+        - recipe_id (int): Primary key and foreign key referencing the summarised recipe.
+        - user_id (int): Foreign key referencing the user who created the recipe.
+        - ingredient_count (int): Number of ingredients in the recipe.
+        - ingredient_ids (list[int]): Sorted IDs of the recipe's ingredients.
+        - <category>_count (int): Number of the recipe's ingredients in each
+          CategoryEnum category, e.g. meat_count, see category_count.
+    """
+    __tablename__ = 'recipe_summaries'
+    __table_args__ = (
+        db.Index('ix_recipe_summaries_user_id_ingredient_count', 'user_id', 'ingredient_count'),
+    )
+    recipe_id = db.Column(db.Integer, db.ForeignKey('recipes.id'), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    ingredient_count = db.Column(db.Integer, nullable=False)
+    ingredient_ids = db.Column(db.JSON, nullable=False)
+    meat_count = db.Column(db.Integer, nullable=False, default=0)
+    fish_count = db.Column(db.Integer, nullable=False, default=0)
+    dairy_count = db.Column(db.Integer, nullable=False, default=0)
+    vegetables_count = db.Column(db.Integer, nullable=False, default=0)
+    fruits_count = db.Column(db.Integer, nullable=False, default=0)
+    freezer_count = db.Column(db.Integer, nullable=False, default=0)
+    bread_count = db.Column(db.Integer, nullable=False, default=0)
+    carbs_count = db.Column(db.Integer, nullable=False, default=0)
+    snacks_count = db.Column(db.Integer, nullable=False, default=0)
+    herbs_spices_count = db.Column(db.Integer, nullable=False, default=0)
+    condiments_count = db.Column(db.Integer, nullable=False, default=0)
+    other_count = db.Column(db.Integer, nullable=False, default=0)
+
+    @staticmethod
+    def category_count(category: CategoryEnum):
+        """
+        Parameters:
+            - category (CategoryEnum): The category to count.
+
+        Returns:
+            - The column counting the recipe's ingredients in the category.
+        """
+        return getattr(RecipeSummary, f"{category.value}_count")
+
+class Tombstone(db.Model):
+    """
+    Record of a deleted recipe or cupboard ingredient, so clients syncing changes can
+    remove their copy.
+
+    Attributes:
+        - id (int): Primary key.
+        - user_id (int): Foreign key referencing the user whose data was deleted.
+        - kind (str): What was deleted, "recipe" or "cupboard".
+        - entity_id (int): The ID of the deleted recipe, or of the ingredient removed
+          from the cupboard.
+        - deleted_at (datetime): When it was deleted, in UTC.
+    """
+    __tablename__ = 'tombstones'
+    __table_args__ = (
+        db.Index('ix_tombstones_user_id_deleted_at', 'user_id', 'deleted_at'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    kind = db.Column(db.String(20), nullable=False)
+    entity_id = db.Column(db.Integer, nullable=False)
+    deleted_at = db.Column(db.DateTime, nullable=False, default=utcnow)
+
+class Job(db.Model):
+    """
+    Background job, persisted so clients can poll it and it can be rerun if its
+    process stops.
+
+    Attributes:
+        - id (int): Primary key.
+        - user_id (int): Foreign key referencing the user the job is for.
+        - kind (str): The kind of job e.g. "export", see app.jobs.job_handler.
+        - status (str): "queued", "running", "succeeded" or "failed".
+        - params (dict): JSON parameters of the job.
+        - progress (dict): The "done" and "total" of a running job as of its last heartbeat.
+        - result (dict): JSON result of a succeeded job.
+        - error (str): Error message of a failed job.
+        - attempts (int): The number of times the job has been started.
+        - created_at (datetime): When the job was queued, in UTC.
+        - started_at (datetime): When the job last started running, in UTC.
+        - heartbeat_at (datetime): When the process running the job last reported it alive, in UTC.
+        - finished_at (datetime): When the job succeeded or failed, in UTC.
+    """
+    __tablename__ = 'jobs'
+    __table_args__ = (
+        db.Index('ix_jobs_status', 'status'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    kind = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='queued')
+    params = db.Column(db.JSON, nullable=True)
+    progress = db.Column(db.JSON, nullable=True)
+    result = db.Column(db.JSON, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    created_at = db.Column(db.DateTime, nullable=False, default=utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    heartbeat_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
\ No newline at end of file
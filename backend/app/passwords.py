@@ -0,0 +1,101 @@
+import atexit
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from threading import Lock
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash, DEFAULT_PBKDF2_ITERATIONS
+
+_executor = None
+_lock = Lock()
+
+def _get_executor():
+    """
+    Return the process pool that hashes passwords, starting it on first use.
+
+    Returns:
+        - The ProcessPoolExecutor, or None if PASSWORD_HASH_WORKERS is 0 and
+          passwords should be hashed in the request thread.
+    """
+    global _executor
+    workers = current_app.config['PASSWORD_HASH_WORKERS']
+    if workers <= 0:
+        return None
+    with _lock:
+        if _executor is None:
+            # spawn rather than fork, the app's threads and DB connections aren't fork safe
+            _executor = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context('spawn')
+            )
+            atexit.register(_executor.shutdown)
+    return _executor
+
+def _run(func, *args, **kwargs):
+    """
+    Runs a hashing function on the process pool, or inline if there isn't one. The
+    calling thread waits for the result either way, the pool only limits how many
+    hashes run at once.
+    """
+    executor = _get_executor()
+    if executor is None:
+        return func(*args, **kwargs)
+    return executor.submit(func, *args, **kwargs).result()
+
+def normalise_method(method: str):
+    """
+    Expand a Werkzeug hash method to include its default parameters, matching the
+    prefix Werkzeug stores in the hashes it generates e.g. scrypt -> scrypt:32768:8:1.
+
+    Parameters:
+        - method (str): The hash method, optionally with parameters.
+
+    Returns:
+        - The hash method with every parameter.
+    """
+    name, *args = method.split(":")
+    if name == "scrypt" and not args:
+        return "scrypt:32768:8:1"
+    if name == "pbkdf2" and len(args) < 2:
+        hash_name = args[0] if args else "sha256"
+        return f"pbkdf2:{hash_name}:{DEFAULT_PBKDF2_ITERATIONS}"
+    return method
+
+def hash_password(password: str):
+    """
+    Hash a password with the configured PASSWORD_HASH_METHOD, on the hashing pool if
+    PASSWORD_HASH_WORKERS is set.
+
+    Parameters:
+        - password (str): The password to hash.
+
+    Returns:
+        - The password hash.
+    """
+    method = current_app.config['PASSWORD_HASH_METHOD']
+    return _run(generate_password_hash, password, method=method)
+
+def verify_password(pwhash: str, password: str):
+    """
+    Check a password against a hash, on the hashing pool if PASSWORD_HASH_WORKERS is set.
+
+    Parameters:
+        - pwhash (str): The stored password hash.
+        - password (str): The password to check.
+
+    Returns:
+        - True if the password matches.
+    """
+    return _run(check_password_hash, pwhash, password)
+
+def needs_rehash(pwhash: str):
+    """
+    Check whether a hash was made with a different method or cost than the configured
+    PASSWORD_HASH_METHOD.
+
+    Parameters:
+        - pwhash (str): The stored password hash.
+
+    Returns:
+        - True if the password should be hashed again.
+    """
+    method = normalise_method(current_app.config['PASSWORD_HASH_METHOD'])
+    return pwhash.split("$", 1)[0] != method
@@ -0,0 +1,102 @@
+import time
+from collections import Counter
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from app import db
+
+class QueryBudgetExceeded(Exception):
+    """Raised when a request runs more SQL statements than its route's query budget."""
+
+class QueryStats:
+    """
+    SQL statements run while handling a single request.
+
+    Attributes:
+        - count (int): Number of statements executed.
+        - duration (float): Total time spent executing them in seconds.
+        - fingerprints (Counter): Number of times each distinct statement was executed.
+    """
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def repeated(self, threshold: int):
+        """
+        Returns:
+            - A list of (statement, count) pairs executed at least threshold times,
+              the signature of an N+1 query pattern.
+        """
+        return [(sql, count) for sql, count in self.fingerprints.most_common() if count >= threshold]
+
+def query_budget(max_statements: int):
+    """
+    Declare the maximum number of SQL statements a route may run per request.
+
+    Parameters:
+        - max_statements (int): The route's query budget.
+
+    Returns:
+        - A decorator that records the budget on the view function.
+    """
+    def decorator(view):
+        view.query_budget = max_statements
+        return view
+    return decorator
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = conn.info['query_start'].pop()
+    stats = g.get('query_stats') if has_request_context() else None
+    if stats is not None:
+        stats.count += 1
+        stats.duration += time.perf_counter() - start
+        # statements are parameterised, so whitespace is all that varies between calls
+        stats.fingerprints[" ".join(statement.split())] += 1
+
+def _start_request():
+    g.query_stats = QueryStats()
+
+def _finish_request(response):
+    """
+    Report the request's SQL statements, log N+1 patterns and enforce its query budget.
+    Statements run while streaming a response body happen afterwards and aren't counted.
+    """
+    stats = g.pop('query_stats', None)
+    if stats is None:
+        return response
+    config = current_app.config
+
+    if current_app.debug or config['QUERY_STATS_HEADERS']:
+        response.headers['X-Query-Count'] = str(stats.count)
+        response.headers['X-Query-Time'] = f"{stats.duration * 1000:.2f}ms"
+
+    for sql, count in stats.repeated(config['QUERY_REPEAT_THRESHOLD']):
+        current_app.logger.warning(
+            "Possible N+1 query in %s: statement ran %d times: %s", request.endpoint, count, sql
+        )
+
+    view = current_app.view_functions.get(request.endpoint)
+    budget = getattr(view, 'query_budget', None)
+    if budget is not None and stats.count > budget:
+        message = f"{request.endpoint} ran {stats.count} SQL statements, over its budget of {budget}"
+        if current_app.testing or config['QUERY_BUDGET_RAISE']:
+            raise QueryBudgetExceeded(message)
+        current_app.logger.warning(message)
+    return response
+
+def init_query_stats(app):
+    """
+    Count the SQL statements each request runs by listening to the app's engine events.
+
+    Parameters:
+        - app (Flask): The app to instrument.
+    """
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
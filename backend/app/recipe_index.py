@@ -0,0 +1,80 @@
+from collections import Counter
+from threading import Lock
+from app.user_cache import VersionedUserCache
+
+class RecipeIndex:
+    """
+    Per-user inverted index mapping each ingredient to the recipes that use it.
+
+    Attributes:
+        - version (int): The user's recipes version the index is up to date with.
+        - postings (dict[int, set[int]]): Ingredient ID to the IDs of recipes using it.
+        - recipe_ingredients (dict[int, frozenset[int]]): Recipe ID to its ingredient IDs.
+    """
+    def __init__(self, version: int, rows):
+        self.version = version
+        self.postings = {}
+        self.recipe_ingredients = {}
+        self._lock = Lock()
+
+        recipe_ingredients = {}
+        for recipe_id, ing_id in rows:
+            recipe_ingredients.setdefault(recipe_id, set()).add(ing_id)
+        for recipe_id, ing_ids in recipe_ingredients.items():
+            self._add(recipe_id, frozenset(ing_ids))
+
+    def _add(self, recipe_id: int, ing_ids: frozenset):
+        if not ing_ids:
+            return
+        self.recipe_ingredients[recipe_id] = ing_ids
+        for ing_id in ing_ids:
+            self.postings.setdefault(ing_id, set()).add(recipe_id)
+
+    def _remove(self, recipe_id: int):
+        for ing_id in self.recipe_ingredients.pop(recipe_id, ()):
+            posting = self.postings[ing_id]
+            posting.discard(recipe_id)
+            if not posting:
+                del self.postings[ing_id]
+
+    def update(self, changes: dict):
+        """
+        Apply changed recipes to the index.
+
+        Parameters:
+            - changes (dict[int, Iterable[int] | None]): Recipe ID to its new ingredient
+              IDs, or None if the recipe was deleted.
+        """
+        with self._lock:
+            for recipe_id, ing_ids in changes.items():
+                self._remove(recipe_id)
+                if ing_ids is not None:
+                    self._add(recipe_id, frozenset(ing_ids))
+
+    def match(self, cupboard: set[int]):
+        """
+        Find the recipes that share at least one ingredient with the cupboard.
+
+        Only the posting lists of the cupboard's ingredients are visited, so the cost
+        depends on the cupboard rather than the size of the recipe library.
+
+        Parameters:
+            - cupboard (set[int]): IDs of the ingredients in the user's cupboard.
+
+        Returns:
+            - A list of (recipe ID, coverage, missing ingredient IDs) tuples.
+        """
+        with self._lock:
+            hits = Counter()
+            for ing_id in cupboard:
+                hits.update(self.postings.get(ing_id, ()))
+            recipes = [(recipe_id, count, self.recipe_ingredients[recipe_id]) for recipe_id, count in hits.items()]
+
+        matches = []
+        for recipe_id, count, ing_ids in recipes:
+            missing = sorted(ing_ids - cupboard) if count < len(ing_ids) else []
+            matches.append((recipe_id, count / len(ing_ids), missing))
+        return matches
+
+# each worker's recipe indexes, built and kept current by the recipes routes
+recipe_indexes = VersionedUserCache('recipe_indexes', RecipeIndex, 'RECIPE_INDEX_CACHE_SIZE')
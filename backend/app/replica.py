@@ -0,0 +1,136 @@
+import sqlite3
+import time
+from functools import wraps
+import click
+from flask import current_app, g, has_request_context, request
+from flask.cli import with_appcontext
+from flask_jwt_extended import get_jwt_identity
+from flask_sqlalchemy.session import Session
+from itsdangerous import BadSignature, TimestampSigner
+from sqlalchemy import event
+
+# header a response carries after the user's write, and later requests send back, holding
+# the user's ID signed with the time of the write so any worker can check it
+WRITE_TOKEN_HEADER = 'X-Write-Token'
+
+class RoutingSession(Session):
+    """
+    Session that sends reads to the "replica" bind in requests to routes marked with
+    read_replica. Flushes and every other statement, including all writes, stay on the
+    primary.
+    """
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and using_replica() and getattr(clause, 'is_select', False):
+            return self._db.engines['replica']
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _after_commit(session):
+    if has_request_context():
+        g.db_committed = True
+
+def using_replica():
+    """
+    Returns:
+        - True if the current request's reads go to the read replica.
+    """
+    return has_request_context() and g.get('use_replica', False)
+
+def _write_signer():
+    return TimestampSigner(current_app.config['SECRET_KEY'], salt='read-your-writes')
+
+def _wrote_recently(user_id: str):
+    """
+    Returns:
+        - True if the request's write token shows the user committed a write within
+          the last READ_YOUR_WRITES_SECONDS.
+    """
+    token = request.headers.get(WRITE_TOKEN_HEADER)
+    if not token:
+        return False
+    try:
+        signed_id = _write_signer().unsign(token, max_age=current_app.config['READ_YOUR_WRITES_SECONDS'])
+    except BadSignature:
+        # also raised once the token is older than the window
+        return False
+    return signed_id.decode() == str(user_id)
+
+def read_replica(view):
+    """
+    Route a view's reads to the read replica, unless the user has committed a write
+    within the last READ_YOUR_WRITES_SECONDS and the replica may not have caught up.
+    Writes are recognised by the write token the client sends back, so it works
+    whichever worker served the write. Must be applied under jwt_required so the user
+    is known.
+
+    Parameters:
+        - view (function): The view function to route.
+
+    Returns:
+        - The wrapped view function.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if 'replica' in current_app.config['SQLALCHEMY_BINDS']:
+            g.use_replica = not _wrote_recently(get_jwt_identity())
+        return view(*args, **kwargs)
+    return wrapper
+
+def _record_write(response):
+    if g.pop('db_committed', False) and 'replica' in current_app.config['SQLALCHEMY_BINDS']:
+        try:
+            user_id = get_jwt_identity()
+        except RuntimeError:
+            # unauthenticated routes e.g. register have no user to pin to the primary
+            user_id = None
+        if user_id is not None:
+            response.headers[WRITE_TOKEN_HEADER] = _write_signer().sign(str(user_id)).decode()
+    return response
+
+@click.group()
+def replica():
+    """Manage the read replica."""
+
+@replica.command('sync')
+@click.option('--every', type=float, default=None, help="keep syncing every this many seconds")
+@with_appcontext
+def sync_replica(every):
+    """
+    Copy the primary SQLite database to the replica SQLite database, so replica
+    routing can be run locally with two files.
+    """
+    from sqlalchemy.engine import make_url
+
+    primary = make_url(current_app.config['SQLALCHEMY_DATABASE_URI'])
+    replica_url = current_app.config['SQLALCHEMY_BINDS'].get('replica')
+    if replica_url is None:
+        raise click.ClickException("READ_REPLICA_URL isn't set")
+    replica_url = make_url(replica_url)
+    if primary.get_backend_name() != 'sqlite' or replica_url.get_backend_name() != 'sqlite':
+        raise click.ClickException("Only SQLite databases can be synced, use the database's own replication")
+
+    while True:
+        start = time.perf_counter()
+        source = sqlite3.connect(primary.database)
+        target = sqlite3.connect(replica_url.database)
+        try:
+            # the online backup API copies a consistent snapshot while the app keeps writing
+            source.backup(target)
+        finally:
+            source.close()
+            target.close()
+        click.echo(f"Synced {replica_url.database} in {(time.perf_counter() - start) * 1000:.0f}ms")
+        if every is None:
+            return
+        time.sleep(every)
+
+def init_replica(app):
+    """
+    Give responses to each user's writes a write token for read replica routing and
+    register the replica CLI commands.
+
+    Parameters:
+        - app (Flask): The app to set up.
+    """
+    app.after_request(_record_write)
+    app.cli.add_command(replica)
@@ -0,0 +1,94 @@
+import re
+from sqlalchemy import or_, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import undefer
+from app import db
+from app.models import Recipe
+
+# characters either side of the first match in fallback snippets
+SNIPPET_CONTEXT = 40
+
+# database URL to whether it has the recipes_fts table created by the recipe search
+# migration, learnt from the first search rather than a separate schema query
+_fts_tables = {}
+
+def _fts_query(terms: list[str]):
+    """
+    Build an FTS5 query matching every term, quoting each so user input can't use FTS
+    syntax, and treating the last as a prefix so partially typed words match.
+    """
+    quoted = ['"' + term.replace('"', '""') + '"' for term in terms]
+    quoted[-1] += '*'
+    return " ".join(quoted)
+
+def _fts_search(user_id: int, terms: list[str], limit: int):
+    """Searches with the FTS5 index, ranked by BM25 with titles weighted highest."""
+    rows = db.session.execute(text(
+        "SELECT recipes.id, recipes.title, "
+        "snippet(recipes_fts, -1, '[', ']', '...', 16) AS snippet "
+        "FROM recipes_fts JOIN recipes ON recipes.id = recipes_fts.rowid "
+        "WHERE recipes_fts MATCH :query AND recipes.user_id = :user_id "
+        "ORDER BY bm25(recipes_fts, 10.0, 1.0) "
+        "LIMIT :limit"
+    ), {"query": _fts_query(terms), "user_id": user_id, "limit": limit})
+    return [{"id": row.id, "title": row.title, "snippet": row.snippet} for row in rows]
+
+def _fallback_snippet(recipe: Recipe, terms: list[str]):
+    """Returns the text around the first term found in the method, or the title."""
+    method = recipe.method or ""
+    lowered = method.lower()
+    positions = [lowered.find(term) for term in terms if term in lowered]
+    if not positions:
+        return recipe.title
+    start = max(min(positions) - SNIPPET_CONTEXT, 0)
+    end = min(max(positions) + SNIPPET_CONTEXT, len(method))
+    return ("..." if start else "") + method[start:end] + ("..." if end < len(method) else "")
+
+def _fallback_search(user_id: int, terms: list[str], limit: int):
+    """Searches with LIKE queries, ranking recipes matching every term in the title first."""
+    matches = [
+        or_(Recipe.title.ilike(f"%{term}%"), Recipe.method.ilike(f"%{term}%"))
+        for term in terms
+    ]
+    in_title = db.and_(*[Recipe.title.ilike(f"%{term}%") for term in terms])
+    recipes = (
+        Recipe.query
+        .options(undefer(Recipe.method))
+        .filter(Recipe.user_id == user_id, *matches)
+        .order_by(db.case((in_title, 0), else_=1), Recipe.id)
+        .limit(limit)
+        .all()
+    )
+    return [
+        {"id": recipe.id, "title": recipe.title, "snippet": _fallback_snippet(recipe, terms)}
+        for recipe in recipes
+    ]
+
+def search_recipes(user_id: int, query: str, limit: int):
+    """
+    Full-text search a user's recipe titles and methods.
+
+    Parameters:
+        - user_id (int): The ID of the user whose recipes to search.
+        - query (str): The search terms, all of which must match.
+        - limit (int): The maximum number of results.
+
+    Returns:
+        - A list of recipe dicts with an ID, title and snippet, best matches first.
+    """
+    terms = re.findall(r"\w+", query.lower())
+    if not terms:
+        return []
+    engine = db.engine
+    url = str(engine.url)
+    if engine.dialect.name == 'sqlite' and _fts_tables.get(url) is not False:
+        try:
+            results = _fts_search(user_id, terms, limit)
+        except OperationalError as e:
+            if 'no such table: recipes_fts' not in str(e.orig):
+                raise
+            _fts_tables[url] = False
+        else:
+            _fts_tables[url] = True
+            return results
+    return _fallback_search(user_id, terms, limit)
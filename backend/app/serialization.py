@@ -0,0 +1,105 @@
+import gzip
+import zlib
+from flask import current_app, request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider that emits compact output, encoding and decoding with orjson when it's
+    installed and the standard library otherwise. Types orjson can't encode, and datetimes so
+    they keep Flask's format, are converted by Flask's default function.
+    """
+    compact = True
+    # keys are emitted in the order the views build them, sorting only costs time
+    sort_keys = False
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            kwargs.setdefault('separators', (",", ":"))
+            return super().dumps(obj, **kwargs)
+        return self._dumps_bytes(obj).decode()
+
+    def _dumps_bytes(self, obj):
+        if orjson is None:
+            return self.dumps(obj).encode()
+        return orjson.dumps(
+            obj,
+            default=self.default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+        )
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self._dumps_bytes(obj), mimetype=self.mimetype)
+
+def _compressor(encoding: str):
+    """Returns a zlib compressor producing the gzip or deflate (zlib) format."""
+    wbits = 31 if encoding == 'gzip' else 15
+    return zlib.compressobj(current_app.config['COMPRESS_LEVEL'], zlib.DEFLATED, wbits)
+
+def _compress_stream(chunks, compressor):
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode()
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+def _compress_response(response):
+    """
+    Compress responses with gzip or deflate when the client accepts it and the body is at
+    least COMPRESS_MIN_SIZE bytes. Streamed responses are compressed as they're sent.
+    """
+    config = current_app.config
+    if (
+        response.status_code < 200 or response.status_code in (204, 304)
+        or response.direct_passthrough
+        or 'Content-Encoding' in response.headers
+        or response.mimetype not in config['COMPRESS_MIMETYPES']
+    ):
+        return response
+    encoding = request.accept_encodings.best_match(['gzip', 'deflate'])
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = _compress_stream(response.response, _compressor(encoding))
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < config['COMPRESS_MIN_SIZE']:
+            return response
+        if encoding == 'gzip':
+            data = gzip.compress(data, config['COMPRESS_LEVEL'], mtime=0)
+        else:
+            data = zlib.compress(data, config['COMPRESS_LEVEL'])
+        response.set_data(data)
+
+    response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    # the compressed body differs byte for byte, so the ETag can only be weak
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+def init_serialization(app):
+    """
+    Use the fast JSON provider and compress large responses.
+
+    Parameters:
+        - app (Flask): The app to set up.
+    """
+    app.json = FastJSONProvider(app)
+    app.after_request(_compress_response)
@@ -0,0 +1,146 @@
+import random
+from threading import Lock
+from app.user_cache import VersionedUserCache
+
+# signatures are split into BANDS bands of ROWS hashes, recipes sharing any band are
+# candidates, which finds pairs above a Jaccard similarity of about (1 / BANDS) ** (1 / ROWS),
+# 0.18 here. A pair with a similarity of 0.5 shares a band with probability 1 - 0.75 ** 32,
+# over 0.999, where 16x4 bands missed nearly a third of the true top 10
+BANDS = 32
+ROWS = 2
+# libraries up to this many recipes are compared exactly, in about half a millisecond
+EXACT_MAX_RECIPES = 500
+# Mersenne prime modulus of the universal hash functions, small enough that hashes
+# stay cheap machine sized ints
+_PRIME = (1 << 31) - 1
+_rng = random.Random(20)
+_HASHES = [(_rng.randrange(1, _PRIME), _rng.randrange(_PRIME)) for _ in range(BANDS * ROWS)]
+
+def jaccard(a: frozenset, b: frozenset):
+    """Returns the Jaccard similarity of two sets."""
+    if not a and not b:
+        return 0.0
+    shared = len(a & b)
+    return shared / (len(a) + len(b) - shared)
+
+class SimilarityIndex:
+    """
+    Per-user MinHash locality-sensitive hashing index of recipe ingredient sets.
+
+    Each recipe gets a MinHash signature whose hashes agree with another recipe's with
+    probability equal to their Jaccard similarity. Recipes are bucketed by each band of
+    their signature, so similar recipes are found by looking in the query recipe's
+    buckets and only those candidates are compared exactly, rather than every recipe.
+    Small libraries skip the buckets and compare every recipe.
+
+    Attributes:
+        - version (int): The user's recipes version the index is up to date with.
+        - recipe_ingredients (dict[int, frozenset[int]]): Recipe ID to its ingredient IDs.
+    """
+    def __init__(self, version: int, rows, bands: int = BANDS, rows_per_band: int = ROWS):
+        self.version = version
+        self.recipe_ingredients = {}
+        self._bands = bands
+        self._rows = rows_per_band
+        self._hashes = _HASHES[:bands * rows_per_band]
+        # recipe ID to the key of each of its bands, kept to remove it from its buckets
+        self._band_keys = {}
+        self._buckets = [{} for _ in range(bands)]
+        # ingredient ID to its hash under every hash function
+        self._ingredient_hashes = {}
+        self._lock = Lock()
+
+        recipe_ingredients = {}
+        for recipe_id, ing_id in rows:
+            recipe_ingredients.setdefault(recipe_id, set()).add(ing_id)
+        for recipe_id, ing_ids in recipe_ingredients.items():
+            self._add(recipe_id, frozenset(ing_ids))
+
+    def _signature(self, ing_ids: frozenset):
+        vectors = []
+        for ing_id in ing_ids:
+            vector = self._ingredient_hashes.get(ing_id)
+            if vector is None:
+                vector = self._ingredient_hashes[ing_id] = tuple(
+                    (a * ing_id + b) % _PRIME for a, b in self._hashes
+                )
+            vectors.append(vector)
+        return vectors[0] if len(vectors) == 1 else tuple(map(min, *vectors))
+
+    def _band_keys_of(self, signature: tuple):
+        # hashing each band to an int is far smaller than keeping the signature, and a
+        # rare collision only adds a candidate that's then scored exactly
+        rows = self._rows
+        return [hash(signature[start:start + rows]) for start in range(0, len(signature), rows)]
+
+    def _add(self, recipe_id: int, ing_ids: frozenset):
+        if not ing_ids:
+            return
+        keys = self._band_keys_of(self._signature(ing_ids))
+        self.recipe_ingredients[recipe_id] = ing_ids
+        self._band_keys[recipe_id] = keys
+        for buckets, key in zip(self._buckets, keys):
+            bucket = buckets.get(key)
+            if bucket is None:
+                buckets[key] = {recipe_id}
+            else:
+                bucket.add(recipe_id)
+
+    def _remove(self, recipe_id: int):
+        self.recipe_ingredients.pop(recipe_id, None)
+        keys = self._band_keys.pop(recipe_id, None)
+        if keys is None:
+            return
+        for band, key in enumerate(keys):
+            bucket = self._buckets[band][key]
+            bucket.discard(recipe_id)
+            if not bucket:
+                del self._buckets[band][key]
+
+    def update(self, changes: dict):
+        """
+        Apply changed recipes to the index.
+
+        Parameters:
+            - changes (dict[int, Iterable[int] | None]): Recipe ID to its new ingredient
+              IDs, or None if the recipe was deleted.
+        """
+        with self._lock:
+            for recipe_id, ing_ids in changes.items():
+                self._remove(recipe_id)
+                if ing_ids is not None:
+                    self._add(recipe_id, frozenset(ing_ids))
+
+    def similar(self, recipe_id: int, k: int):
+        """
+        Find the recipes most similar to a recipe among those sharing a band with it, or
+        among every recipe if there are at most EXACT_MAX_RECIPES.
+
+        Parameters:
+            - recipe_id (int): The ID of the recipe to compare against.
+            - k (int): The maximum number of recipes to return.
+
+        Returns:
+            - A list of up to k (recipe ID, Jaccard similarity) tuples, most similar first.
+        """
+        with self._lock:
+            keys = self._band_keys.get(recipe_id)
+            if keys is None:
+                return []
+            if len(self.recipe_ingredients) <= EXACT_MAX_RECIPES:
+                candidates = set(self.recipe_ingredients)
+            else:
+                candidates = set()
+                for buckets, key in zip(self._buckets, keys):
+                    candidates |= buckets[key]
+            candidates.discard(recipe_id)
+            ing_ids = self.recipe_ingredients[recipe_id]
+            scored = [
+                (candidate, jaccard(ing_ids, self.recipe_ingredients[candidate]))
+                for candidate in candidates
+            ]
+        scored.sort(key=lambda item: (-item[1], item[0]))
+        return scored[:k]
+
+# each worker's similarity indexes, built and kept current by the recipes routes
+similarity_indexes = VersionedUserCache('similarity_indexes', SimilarityIndex, 'SIMILARITY_INDEX_CACHE_SIZE')
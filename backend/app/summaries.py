@@ -0,0 +1,154 @@
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import delete, insert
+from app import db
+from app.catalog import ingredient_catalog
+from app.enums import CategoryEnum
+from app.models import Ingredient, Recipe, RecipeIngredient, RecipeSummary, User
+from app.api.utils import IN_CHUNK_SIZE, chunked
+from app.jobs import job_handler
+
+def _summary_row(recipe_id: int, user_id: int, ingredients):
+    """
+    Build a recipe's summary row.
+
+    Parameters:
+        - recipe_id (int): The ID of the recipe.
+        - user_id (int): The ID of the user who created it.
+        - ingredients (Iterable[tuple]): (ID, category) of each of its ingredients.
+
+    Returns:
+        - A dict of the summary's column values.
+    """
+    counts = dict.fromkeys(CategoryEnum, 0)
+    ingredient_ids = set()
+    for ing_id, category in ingredients:
+        if ing_id not in ingredient_ids:
+            ingredient_ids.add(ing_id)
+            counts[category] += 1
+    row = {
+        "recipe_id": recipe_id,
+        "user_id": user_id,
+        "ingredient_count": len(ingredient_ids),
+        "ingredient_ids": sorted(ingredient_ids),
+    }
+    row.update({RecipeSummary.category_count(category).key: count for category, count in counts.items()})
+    return row
+
+def save_recipe_summaries(user_id: int, recipes: dict, replace: bool = False):
+    """
+    Write the summaries of a user's new or changed recipes in the current transaction.
+    Ingredient categories come from the catalog cache, which the write has usually
+    just filled while checking the ingredients exist.
+
+    Parameters:
+        - user_id (int): The ID of the user who created the recipes.
+        - recipes (dict[int, Iterable[int]]): Recipe ID to its ingredient IDs.
+        - replace (bool): Whether the recipes may already have summaries to replace.
+    """
+    if not recipes:
+        return
+    recipes = {recipe_id: list(ing_ids) for recipe_id, ing_ids in recipes.items()}
+    catalog = ingredient_catalog.get_many(ing_id for ing_ids in recipes.values() for ing_id in ing_ids)
+    if replace:
+        delete_recipe_summaries(list(recipes))
+    db.session.execute(insert(RecipeSummary), [
+        _summary_row(recipe_id, user_id, [
+            (ing_id, catalog[ing_id][2]) for ing_id in ing_ids if ing_id in catalog
+        ])
+        for recipe_id, ing_ids in recipes.items()
+    ])
+
+def delete_recipe_summaries(recipe_ids: list):
+    """
+    Delete the summaries of recipes in the current transaction. Must run before the
+    recipes themselves are deleted.
+
+    Parameters:
+        - recipe_ids (list[int]): The IDs of the recipes.
+    """
+    for chunk in chunked(recipe_ids):
+        db.session.execute(
+            delete(RecipeSummary).where(RecipeSummary.recipe_id.in_(chunk))
+            .execution_options(synchronize_session=False)
+        )
+
+def rebuild_recipe_summaries(user_id: int = None, progress=None):
+    """
+    Rebuild recipe summaries from the association table, a page of recipes at a time.
+    Doesn't commit.
+
+    Parameters:
+        - user_id (int): Only rebuild this user's recipe summaries, or every recipe's if None.
+        - progress (function): Called with the number of summaries written after each page.
+
+    Returns:
+        - The number of summaries written.
+    """
+    filters = [Recipe.user_id == user_id] if user_id is not None else []
+    summaries = delete(RecipeSummary)
+    if user_id is not None:
+        summaries = summaries.where(RecipeSummary.user_id == user_id)
+    db.session.execute(summaries.execution_options(synchronize_session=False))
+
+    written = 0
+    after = 0
+    while True:
+        recipes = (
+            db.session.query(Recipe.id, Recipe.user_id)
+            .filter(*filters, Recipe.id > after)
+            .order_by(Recipe.id)
+            .limit(IN_CHUNK_SIZE)
+            .all()
+        )
+        if not recipes:
+            return written
+        ingredients = {}
+        rows = (
+            db.session.query(RecipeIngredient.recipe_id, Ingredient.id, Ingredient.category)
+            .join(Ingredient, RecipeIngredient.ingredient_id == Ingredient.id)
+            .join(Recipe, RecipeIngredient.recipe_id == Recipe.id)
+            .filter(*filters, Recipe.id > after, Recipe.id <= recipes[-1].id)
+        )
+        for recipe_id, ing_id, category in rows:
+            ingredients.setdefault(recipe_id, []).append((ing_id, category))
+        db.session.execute(insert(RecipeSummary), [
+            _summary_row(recipe_id, owner_id, ingredients.get(recipe_id, []))
+            for recipe_id, owner_id in recipes
+        ])
+        written += len(recipes)
+        after = recipes[-1].id
+        if progress:
+            progress(written)
+
+@job_handler('rebuild_summaries')
+def _rebuild_summaries_job(job_id: int, user_id: int, params: dict, progress):
+    """Rebuilds a user's recipe summaries, reporting summaries written."""
+    return {"summaries": rebuild_recipe_summaries(user_id, progress)}
+
+@click.group()
+def summaries():
+    """Manage the recipe summary table."""
+
+@summaries.command('rebuild')
+@click.option('--user', 'username', default=None, help="only rebuild this user's recipes")
+@with_appcontext
+def rebuild_summaries(username):
+    """Rebuild recipe summaries, e.g. to backfill them after upgrading."""
+    user_id = None
+    if username is not None:
+        user_id = db.session.query(User.id).filter_by(username=username).scalar()
+        if user_id is None:
+            raise click.ClickException(f"No user named {username}")
+    written = rebuild_recipe_summaries(user_id)
+    db.session.commit()
+    click.echo(f"Rebuilt {written} recipe summaries")
+
+def init_summaries(app):
+    """
+    Register the recipe summary CLI commands.
+
+    Parameters:
+        - app (Flask): The app to set up.
+    """
+    app.cli.add_command(summaries)
@@ -0,0 +1,95 @@
+from datetime import timedelta
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import insert
+from app import db
+from app.models import EPOCH, Tombstone, utcnow
+
+class InvalidSyncToken(Exception):
+    """Raised when a sync token is malformed."""
+
+class SyncToken:
+    """
+    Position in a user's change history handed to clients by the sync endpoint.
+
+    Attributes:
+        - time (datetime): Changes after this UTC time haven't been synced.
+        - recipes_version (int): The user's recipes version when the token was made.
+        - cupboard_version (int): The user's cupboard version when the token was made.
+    """
+    def __init__(self, time, recipes_version: int, cupboard_version: int):
+        self.time = time
+        self.recipes_version = recipes_version
+        self.cupboard_version = cupboard_version
+
+    def encode(self):
+        """
+        Returns:
+            - The opaque token string given to clients.
+        """
+        micros = (self.time - EPOCH) // timedelta(microseconds=1)
+        return f"{micros}.{self.recipes_version}.{self.cupboard_version}"
+
+    @classmethod
+    def decode(cls, token: str):
+        """
+        Parse a token string made by encode.
+
+        Parameters:
+            - token (str): The token a client sent.
+
+        Returns:
+            - The SyncToken.
+
+        Raises:
+            - InvalidSyncToken: If the token is malformed.
+        """
+        try:
+            micros, recipes_version, cupboard_version = (int(part) for part in token.split('.'))
+            return cls(EPOCH + timedelta(microseconds=micros), recipes_version, cupboard_version)
+        except (ValueError, OverflowError):
+            raise InvalidSyncToken(f"Invalid sync token {token!r}")
+
+def record_tombstones(user_id: int, kind: str, entity_ids):
+    """
+    Record deletions in the current transaction, so syncing clients remove them.
+
+    Parameters:
+        - user_id (int): The ID of the user whose data was deleted.
+        - kind (str): What was deleted, "recipe" or "cupboard".
+        - entity_ids (Iterable[int]): The IDs of the deleted recipes, or of the
+          ingredients removed from the cupboard.
+    """
+    now = utcnow()
+    rows = [
+        {"user_id": user_id, "kind": kind, "entity_id": entity_id, "deleted_at": now}
+        for entity_id in entity_ids
+    ]
+    if rows:
+        db.session.execute(insert(Tombstone), rows)
+
+@click.group()
+def sync():
+    """Manage change tracking for client sync."""
+
+@sync.command('prune')
+@with_appcontext
+def prune_tombstones():
+    """
+    Delete tombstones older than SYNC_TOMBSTONE_RETENTION_DAYS. Tokens from before
+    then are rejected, so their clients sync everything again instead.
+    """
+    cutoff = utcnow() - timedelta(days=current_app.config['SYNC_TOMBSTONE_RETENTION_DAYS'])
+    deleted = Tombstone.query.filter(Tombstone.deleted_at < cutoff).delete(synchronize_session=False)
+    db.session.commit()
+    click.echo(f"Deleted {deleted} tombstones from before {cutoff:%Y-%m-%d %H:%M}")
+
+def init_sync(app):
+    """
+    Register the sync CLI commands.
+
+    Parameters:
+        - app (Flask): The app to set up.
+    """
+    app.cli.add_command(sync)
@@ -0,0 +1,99 @@
+from collections import OrderedDict
+from threading import Lock
+from flask import current_app
+from app import db
+from app.models import Recipe, RecipeIngredient, User
+
+class VersionedUserCache:
+    """
+    Bounded LRU cache of per-user indexes of their recipes' ingredients, kept
+    separately for each app so apps sharing a process never share indexes.
+
+    Every write to a user's recipes bumps their recipes version, so an index built at
+    an older version is rebuilt, which keeps indexes coherent across workers. Writes
+    made by this worker are applied to the cached index in place instead.
+
+    Indexes are built with build(version, rows) from (recipe ID, ingredient ID) rows,
+    and must have a version attribute and an update(changes) method taking recipe ID
+    to its new ingredient IDs, or None if the recipe was deleted.
+    """
+    def __init__(self, name: str, build, size_setting: str):
+        """
+        Parameters:
+            - name (str): The key of the app's indexes in app.extensions.
+            - build (callable): Builds a user's index from their version and rows.
+            - size_setting (str): The config setting holding the max users cached.
+        """
+        self._name = name
+        self._build = build
+        self._size_setting = size_setting
+        self._lock = Lock()
+
+    @property
+    def _indexes(self):
+        """The current app's user ID to index map, least recently used first."""
+        indexes = current_app.extensions.get(self._name)
+        if indexes is None:
+            indexes = current_app.extensions.setdefault(self._name, OrderedDict())
+        return indexes
+
+    def get(self, user_id: int):
+        """
+        Return the user's index, rebuilding it if their recipes were changed by a write
+        this worker couldn't apply incrementally.
+
+        Parameters:
+            - user_id (int): The ID of the user whose recipes are indexed.
+
+        Returns:
+            - The user's index.
+        """
+        version = db.session.query(User.recipes_version).filter_by(id=user_id).scalar()
+        indexes = self._indexes
+        with self._lock:
+            index = indexes.get(user_id)
+            if index and index.version == version:
+                indexes.move_to_end(user_id)
+                return index
+
+        rows = (
+            db.session.query(RecipeIngredient.recipe_id, RecipeIngredient.ingredient_id)
+            .join(Recipe, RecipeIngredient.recipe_id == Recipe.id)
+            .filter(Recipe.user_id == user_id)
+            .all()
+        )
+        index = self._build(version, rows)
+        with self._lock:
+            indexes[user_id] = index
+            indexes.move_to_end(user_id)
+            while len(indexes) > current_app.config[self._size_setting]:
+                indexes.popitem(last=False)
+        return index
+
+    def update(self, user_id: int, version: int, changes: dict):
+        """
+        Apply a committed write to the user's cached index. If the write isn't the next
+        one after the version the index is at, another worker wrote in between, so the
+        index is dropped and rebuilt on its next use instead.
+
+        Parameters:
+            - user_id (int): The ID of the user whose recipes changed.
+            - version (int): The user's recipes version after the write.
+            - changes (dict[int, Iterable[int] | None]): Recipe ID to its new ingredient
+              IDs, or None if the recipe was deleted. Empty if no ingredients changed.
+        """
+        indexes = self._indexes
+        with self._lock:
+            index = indexes.get(user_id)
+            if index is None:
+                return
+            if index.version != version - 1:
+                del indexes[user_id]
+                return
+            index.update(changes)
+            index.version = version
+
+    def clear(self):
+        """Drop every cached index of the current app."""
+        with self._lock:
+            self._indexes.clear()
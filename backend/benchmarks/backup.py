@@ -0,0 +1,115 @@
+"""
+Benchmark streaming export and restore of a user's recipes and cupboard.
+
+A single user's library is seeded, 5000 recipes by default, exported with GET /export
+and restored into a new user with POST /import, reading the backup from a file and
+waiting for the import job to finish. Rows
+per second are reported for both directions, counting recipes, recipe ingredients and
+cupboard ingredients, along with the peak Python memory allocated by each, measured
+with tracemalloc in a separate run. GET /recipes/ and GET /cupboard/, which load the
+whole library at once, are measured for comparison.
+
+Usage (from /backend):
+    python -m benchmarks.backup --recipes 20000
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from benchmarks.seed import add_arguments, create_app_for, seed
+
+def _measure(func):
+    """Returns the time func takes in seconds, the peak memory it allocates in bytes and its result."""
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return elapsed, peak, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_arguments(parser)
+    parser.set_defaults(users=1, recipes=5000)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    fd, backup_path = tempfile.mkstemp(suffix='.ndjson')
+    os.close(fd)
+    try:
+        app = create_app_for(f"sqlite:///{path}")
+        data = seed(app, args)
+        user_id = next(iter(data["users"]))
+        rows = args.recipes * (1 + args.recipe_size) + args.cupboard
+
+        from flask_jwt_extended import create_access_token
+        from sqlalchemy import insert
+        from app import db
+        from app.models import User
+
+        with app.app_context():
+            token = create_access_token(identity=str(user_id))
+            # restores go into fresh users so each run inserts the same rows
+            restore_ids = db.session.scalars(
+                insert(User).returning(User.id, sort_by_parameter_order=True),
+                [{"username": f"restore{i}", "password_hash": "-"} for i in range(2)]
+            ).all()
+            db.session.commit()
+            restore_tokens = iter([create_access_token(identity=str(i)) for i in restore_ids])
+        client = app.test_client()
+        headers = {"Authorization": f"Bearer {token}"}
+
+        def export():
+            response = client.get("/export", headers=headers, buffered=False)
+            size = 0
+            with open(backup_path, 'wb') as f:
+                for chunk in response.response:
+                    chunk = chunk.encode() if isinstance(chunk, str) else chunk
+                    size += len(chunk)
+                    f.write(chunk)
+            response.close()
+            return size
+
+        def restore():
+            with open(backup_path, 'rb') as f:
+                response = client.post(
+                    "/import", input_stream=f, content_length=os.path.getsize(backup_path),
+                    content_type='application/x-ndjson',
+                    headers={"Authorization": f"Bearer {next(restore_tokens)}"},
+                )
+            assert response.status_code == 202, response.get_data(as_text=True)
+            job_headers = {"Authorization": response.request.headers["Authorization"]}
+            while True:
+                job = client.get(response.headers["Location"], headers=job_headers).get_json()
+                if job["status"] in ('succeeded', 'failed'):
+                    assert job["status"] == 'succeeded', job["error"]
+                    return job["result"]
+                time.sleep(0.01)
+
+        def load_all():
+            recipes = client.get("/recipes/", headers=headers).get_data()
+            cupboard = client.get("/cupboard/", headers=headers).get_data()
+            return len(recipes) + len(cupboard)
+
+        print(f"{args.recipes} recipes, {rows} rows\n")
+        print(f"{'operation':<28}{'s':>8}{'rows/s':>12}{'peak MB':>10}{'bytes':>12}")
+        for name, func in [
+            ("GET /export", export),
+            ("POST /import", restore),
+            ("GET /recipes/ + /cupboard/", load_all),
+        ]:
+            elapsed, peak, result = _measure(func)
+            size = os.path.getsize(backup_path) if name == "POST /import" else result
+            print(f"{name:<28}{elapsed:>8.2f}{rows / elapsed:>12.0f}{peak / 1e6:>10.1f}{size:>12}")
+    finally:
+        os.remove(path)
+        os.remove(backup_path)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Benchmark the association table indexes added in revision 7c3e9a41b2f6.
+
+Seeds a temporary SQLite database at the initial migration, then reports the query
+plan and mean latency of the app's hot lookups before and after upgrading to head.
+
+Usage (from /backend):
+    python -m benchmarks.indexes --users 200 --recipes 100 --cupboard 50
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+MIGRATIONS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'migrations')
+BEFORE_REVISION = 'd258abdd7dfb'
+
+# the queries the API runs most, with the parameters they're benchmarked with
+QUERIES = {
+    "cupboard": (
+        "SELECT ingredients.id, ingredients.name, ingredients.category FROM ingredients "
+        "JOIN user_ingredients ON ingredients.id = user_ingredients.ingredient_id "
+        "WHERE user_ingredients.user_id = :user_id"
+    ),
+    "cupboard_item": (
+        "SELECT id FROM user_ingredients WHERE user_id = :user_id AND ingredient_id = :ingredient_id"
+    ),
+    "user_recipes": "SELECT id, title FROM recipes WHERE user_id = :user_id",
+    "recipe_ingredients": (
+        "SELECT recipe_ingredients.recipe_id, ingredients.id FROM recipe_ingredients "
+        "JOIN ingredients ON recipe_ingredients.ingredient_id = ingredients.id "
+        "JOIN recipes ON recipe_ingredients.recipe_id = recipes.id "
+        "WHERE recipes.user_id = :user_id"
+    ),
+    "ingredient_by_name": (
+        "SELECT id FROM ingredients WHERE lower(name) = :name AND category = 'OTHER'"
+    ),
+}
+
+def seed(conn, args):
+    """
+    Insert synthetic users, ingredients, recipes and cupboards, including some
+    duplicate association rows for the migration to remove.
+
+    Parameters:
+        - conn (Connection): The database connection to insert with.
+        - args (Namespace): The parsed command line arguments.
+    """
+    from sqlalchemy import text
+
+    rng = random.Random(args.seed)
+    conn.execute(text("INSERT INTO ingredients (id, name, category) VALUES (:id, :name, 'OTHER')"), [
+        {"id": i, "name": f"Ingredient {i}"} for i in range(1, args.ingredients + 1)
+    ])
+    conn.execute(text("INSERT INTO users (id, username, password_hash) VALUES (:id, :name, 'x')"), [
+        {"id": i, "name": f"user{i}"} for i in range(1, args.users + 1)
+    ])
+
+    recipes, recipe_ings, cupboard = [], [], []
+    ingredient_ids = range(1, args.ingredients + 1)
+    for user_id in range(1, args.users + 1):
+        for _ in range(args.recipes):
+            recipe_id = len(recipes) + 1
+            recipes.append({"id": recipe_id, "title": f"Recipe {recipe_id}", "user_id": user_id})
+            ing_ids = rng.sample(ingredient_ids, args.recipe_size)
+            recipe_ings += [{"recipe_id": recipe_id, "ingredient_id": ing_id} for ing_id in ing_ids + ing_ids[:1]]
+        ing_ids = rng.sample(ingredient_ids, args.cupboard)
+        cupboard += [{"user_id": user_id, "ingredient_id": ing_id} for ing_id in ing_ids + ing_ids[:1]]
+
+    conn.execute(text("INSERT INTO recipes (id, title, user_id) VALUES (:id, :title, :user_id)"), recipes)
+    conn.execute(text(
+        "INSERT INTO recipe_ingredients (recipe_id, ingredient_id) VALUES (:recipe_id, :ingredient_id)"
+    ), recipe_ings)
+    conn.execute(text(
+        "INSERT INTO user_ingredients (user_id, ingredient_id) VALUES (:user_id, :ingredient_id)"
+    ), cupboard)
+
+def measure(conn, args):
+    """
+    Run every benchmark query against random users.
+
+    Parameters:
+        - conn (Connection): The database connection to query with.
+        - args (Namespace): The parsed command line arguments.
+
+    Returns:
+        - A dict of query name to (query plan, mean latency in ms).
+    """
+    from sqlalchemy import text
+
+    rng = random.Random(args.seed)
+    results = {}
+    for name, sql in QUERIES.items():
+        params = [{
+            "user_id": rng.randint(1, args.users),
+            "ingredient_id": rng.randint(1, args.ingredients),
+            "name": f"ingredient {rng.randint(1, args.ingredients)}",
+        } for _ in range(args.repeat)]
+        plan = " | ".join(row[-1] for row in conn.execute(text("EXPLAIN QUERY PLAN " + sql), params[0]))
+
+        start = time.perf_counter()
+        for p in params:
+            conn.execute(text(sql), p).fetchall()
+        results[name] = (plan, (time.perf_counter() - start) / args.repeat * 1000)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--ingredients', type=int, default=5000)
+    parser.add_argument('--recipes', type=int, default=100, help="recipes per user")
+    parser.add_argument('--recipe-size', type=int, default=8, help="ingredients per recipe")
+    parser.add_argument('--cupboard', type=int, default=50, help="cupboard ingredients per user")
+    parser.add_argument('--repeat', type=int, default=50, help="runs of each query")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    os.environ['DATABASE_URL'] = f"sqlite:///{path}"
+
+    from flask_migrate import upgrade
+    from app import create_app, db
+
+    app = create_app()
+    try:
+        with app.app_context():
+            upgrade(directory=MIGRATIONS, revision=BEFORE_REVISION)
+            with db.engine.begin() as conn:
+                seed(conn, args)
+            with db.engine.connect() as conn:
+                before = measure(conn, args)
+
+            upgrade(directory=MIGRATIONS)
+            with db.engine.connect() as conn:
+                after = measure(conn, args)
+            db.engine.dispose()
+    finally:
+        os.remove(path)
+
+    print(f"\n{args.users} users, {args.users * args.recipes} recipes, {args.ingredients} ingredients\n")
+    for name in QUERIES:
+        (plan_before, ms_before), (plan_after, ms_after) = before[name], after[name]
+        print(f"{name}: {ms_before:.3f} ms -> {ms_after:.3f} ms ({ms_before / ms_after:.1f}x)")
+        print(f"    before: {plan_before}")
+        print(f"    after:  {plan_after}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,404 @@
+"""
+Load test every API endpoint against a freshly seeded database.
+
+By default requests go through the Flask test client one at a time, which also counts
+the SQL statements each request runs. With --url, requests are sent concurrently to a
+running server instead, which must use the same DATABASE_URL and JWT_SECRET_KEY as
+this process so it sees the seeded data and accepts the generated tokens.
+
+Reports p50/p95/p99 latency, throughput and statements per request for each endpoint,
+and can save the results as JSON and compare them with a previous run. With
+--check-budgets, it exits with an error if any request exceeds its route's query budget,
+emptying the in-process caches before each endpoint so cold requests are checked too.
+
+Usage (from /backend):
+    python -m benchmarks.load --requests 100 --output before.json
+    python -m benchmarks.load --requests 100 --compare before.json
+    python -m benchmarks.load --database sqlite:////tmp/bench.db --url http://localhost:5000 --concurrency 8
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from benchmarks.seed import add_arguments, create_app_for, seed, WORDS
+
+class Context:
+    """
+    State shared by the scenarios: the seeded data, an access token per user and
+    counters used to generate unique names.
+    """
+    def __init__(self, data: dict, tokens: dict, rng: random.Random):
+        self.data = data
+        self.tokens = tokens
+        self.rng = rng
+        self.counter = 0
+
+    def user(self):
+        """Returns a random seeded user's ID, data and auth header."""
+        user_id = self.rng.choice(list(self.data["users"]))
+        return user_id, self.data["users"][user_id], {"Authorization": f"Bearer {self.tokens[user_id]}"}
+
+    def ingredient_ids(self, k: int):
+        """Returns k random ingredient IDs."""
+        return self.rng.sample(list(self.data["ingredients"]), k)
+
+    def unique(self, prefix: str):
+        """Returns a name that hasn't been used by this run."""
+        self.counter += 1
+        return f"{prefix}-{os.getpid()}-{time.time_ns()}-{self.counter}"
+
+# each scenario returns the (method, path, JSON body, headers) of a request
+def _register(ctx):
+    return "POST", "/auth/register", {"username": ctx.unique("user"), "password": "benchmark"}, {}
+
+def _login(ctx):
+    _, user, _ = ctx.user()
+    return "POST", "/auth/login", {"username": user["username"], "password": "benchmark"}, {}
+
+def _get_cupboard(ctx):
+    return "GET", "/cupboard/", None, ctx.user()[2]
+
+def _add_to_cupboard(ctx):
+    return "POST", "/cupboard/", {"id": ctx.ingredient_ids(1)[0]}, ctx.user()[2]
+
+def _batch_update_cupboard(ctx):
+    _, user, headers = ctx.user()
+    remove = ctx.rng.sample(user["cupboard"], min(5, len(user["cupboard"])))
+    return "POST", "/cupboard/batch", {"add": ctx.ingredient_ids(10), "remove": remove}, headers
+
+def _delete_from_cupboard(ctx):
+    _, user, headers = ctx.user()
+    ing_id = user["cupboard"].pop() if user["cupboard"] else ctx.ingredient_ids(1)[0]
+    return "DELETE", f"/cupboard/{ing_id}", None, headers
+
+def _get_ingredient(ctx):
+    name = ctx.data["ingredients"][ctx.ingredient_ids(1)[0]]
+    return "GET", f"/ingredients/{urllib.request.quote(name)}", None, ctx.user()[2]
+
+def _get_ingredients_batch(ctx):
+    ids = ",".join(map(str, ctx.ingredient_ids(min(30, len(ctx.data["ingredients"])))))
+    return "GET", f"/ingredients/batch?ids={ids}", None, ctx.user()[2]
+
+def _search_ingredients(ctx):
+    name = ctx.data["ingredients"][ctx.ingredient_ids(1)[0]]
+    return "GET", f"/ingredients/search?q={urllib.request.quote(name[:4])}", None, ctx.user()[2]
+
+def _add_ingredient(ctx):
+    return "POST", "/ingredients/", {"name": ctx.unique("ingredient"), "category": "OTHER"}, ctx.user()[2]
+
+def _get_recipes(ctx):
+    return "GET", "/recipes/", None, ctx.user()[2]
+
+def _get_recipes_page(ctx):
+    return "GET", "/recipes/?limit=50", None, ctx.user()[2]
+
+def _get_recipes_ndjson(ctx):
+    return "GET", "/recipes/?format=ndjson", None, ctx.user()[2]
+
+def _get_recipes_titles(ctx):
+    return "GET", "/recipes/?fields=id,title", None, ctx.user()[2]
+
+def _get_recipes_filtered(ctx):
+    return "GET", "/recipes/?max_ingredients=8&exclude_categories=MEAT,FISH", None, ctx.user()[2]
+
+def _get_recipe(ctx):
+    _, user, headers = ctx.user()
+    recipe_id = ctx.rng.choice(user["recipes"]) if user["recipes"] else 0
+    return "GET", f"/recipes/{recipe_id}", None, headers
+
+def _get_recipes_batch(ctx):
+    _, user, headers = ctx.user()
+    # a week of meals, plus an ID no user has
+    ids = ctx.rng.sample(user["recipes"], min(21, len(user["recipes"]))) + [0]
+    return "GET", f"/recipes/batch?ids={','.join(map(str, ids))}", None, headers
+
+def _get_similar_recipes(ctx):
+    _, user, headers = ctx.user()
+    recipe_id = ctx.rng.choice(user["recipes"]) if user["recipes"] else 0
+    return "GET", f"/recipes/{recipe_id}/similar", None, headers
+
+def _get_cookable_recipes(ctx):
+    return "GET", "/recipes/cookable", None, ctx.user()[2]
+
+def _search_recipes(ctx):
+    return "GET", f"/recipes/search?q={ctx.rng.choice(WORDS)}", None, ctx.user()[2]
+
+def _recipe_body(ctx):
+    return {"title": ctx.unique("recipe"), "method": "Mix and bake.", "ingredient_ids": ctx.ingredient_ids(8)}
+
+def _create_recipe(ctx):
+    return "POST", "/recipes/", _recipe_body(ctx), ctx.user()[2]
+
+def _bulk_create_recipes(ctx):
+    return "POST", "/recipes/bulk", [_recipe_body(ctx) for _ in range(20)], ctx.user()[2]
+
+def _shopping_list(ctx):
+    _, user, headers = ctx.user()
+    recipe_ids = ctx.rng.sample(user["recipes"], min(7, len(user["recipes"])))
+    return "POST", "/recipes/shopping-list", {"recipe_ids": recipe_ids or [0]}, headers
+
+def _update_recipe(ctx):
+    _, user, headers = ctx.user()
+    recipe_id = ctx.rng.choice(user["recipes"]) if user["recipes"] else 0
+    return "PUT", f"/recipes/{recipe_id}", {"ingredient_ids": ctx.ingredient_ids(8)}, headers
+
+def _delete_recipe(ctx):
+    _, user, headers = ctx.user()
+    recipe_id = user["recipes"].pop() if user["recipes"] else 0
+    return "DELETE", f"/recipes/{recipe_id}", None, headers
+
+def _export_backup(ctx):
+    return "GET", "/export", None, ctx.user()[2]
+
+def _sync_changes(ctx):
+    return "GET", "/sync", None, ctx.user()[2]
+
+def _sync_changes_since(ctx):
+    from datetime import timedelta
+    from app.models import utcnow
+    from app.sync import SyncToken
+
+    # versions that never match, so the changes of the last minute are queried
+    token = SyncToken(utcnow() - timedelta(minutes=1), -1, -1).encode()
+    return "GET", f"/sync?since={token}", None, ctx.user()[2]
+
+SCENARIOS = {
+    "auth.register": _register,
+    "auth.login": _login,
+    "cupboard.get_cupboard": _get_cupboard,
+    "cupboard.add_to_cupboard": _add_to_cupboard,
+    "cupboard.batch_update_cupboard": _batch_update_cupboard,
+    "cupboard.delete_from_cupboard": _delete_from_cupboard,
+    "ingredients.get_ingredient": _get_ingredient,
+    "ingredients.get_ingredients_batch": _get_ingredients_batch,
+    "ingredients.search_ingredients": _search_ingredients,
+    "ingredients.add_ingredient": _add_ingredient,
+    "recipes.get_recipes": _get_recipes,
+    "recipes.get_recipes[limit=50]": _get_recipes_page,
+    "recipes.get_recipes[ndjson]": _get_recipes_ndjson,
+    "recipes.get_recipes[fields=id,title]": _get_recipes_titles,
+    "recipes.get_recipes[no meat or fish]": _get_recipes_filtered,
+    "recipes.get_recipe": _get_recipe,
+    "recipes.get_recipes_batch": _get_recipes_batch,
+    "recipes.get_similar_recipes": _get_similar_recipes,
+    "recipes.get_cookable_recipes": _get_cookable_recipes,
+    "recipes.search_user_recipes": _search_recipes,
+    "recipes.create_recipe": _create_recipe,
+    "recipes.bulk_create_recipes": _bulk_create_recipes,
+    "recipes.get_shopping_list": _shopping_list,
+    "recipes.update_recipe": _update_recipe,
+    "recipes.delete_recipe": _delete_recipe,
+    "backup.export_backup": _export_backup,
+    "sync.sync_changes": _sync_changes,
+    "sync.sync_changes[since]": _sync_changes_since,
+}
+
+def percentile(sorted_values: list, p: float):
+    """Returns the nearest-rank p-th percentile of a sorted list."""
+    index = max(0, min(len(sorted_values) - 1, round(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+def summarise(latencies: list, errors: int, statements: list, elapsed: float, over_budget: int = 0):
+    """
+    Summarise one endpoint's results.
+
+    Parameters:
+        - latencies (list[float]): Latency of each request in seconds.
+        - errors (int): Number of requests that failed with a 5xx or no response.
+        - statements (list[int]): SQL statements run by each request, empty if unknown.
+        - elapsed (float): Wall clock time of the whole run in seconds.
+        - over_budget (int): Number of requests that exceeded their route's query budget.
+
+    Returns:
+        - A dict of the endpoint's statistics.
+    """
+    values = sorted(latencies)
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p95_ms": round(percentile(values, 95) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+        "mean_ms": round(sum(values) / len(values) * 1000, 3),
+        "throughput_rps": round(len(values) / elapsed, 1),
+        "statements_per_request": round(sum(statements) / len(statements), 2) if statements else None,
+        "over_budget": over_budget,
+    }
+
+def reset_caches(app):
+    """
+    Empty the app's in-process caches, so the next request runs as it would in a freshly
+    started worker. The seeding and earlier scenarios would otherwise have warmed them.
+    """
+    from app.catalog import ingredient_catalog
+    from app.ingredient_index import ingredient_index
+    from app.recipe_index import recipe_indexes
+    from app.search import _fts_tables
+    from app.similarity import similarity_indexes
+
+    with app.app_context():
+        ingredient_catalog.clear()
+        ingredient_index.clear()
+        recipe_indexes.clear()
+        similarity_indexes.clear()
+    _fts_tables.clear()
+
+def run_local(app, ctx: Context, scenario, requests: int):
+    """
+    Sends requests through the test client, counting the SQL statements each one runs
+    and, in testing mode, the requests that exceed their route's query budget.
+    """
+    from sqlalchemy import event
+    from app import db
+    from app.query_stats import QueryBudgetExceeded
+
+    count = [0]
+    def on_execute(*_):
+        count[0] += 1
+
+    client = app.test_client()
+    latencies, statements, errors, over_budget = [], [], 0, 0
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', on_execute)
+    try:
+        start = time.perf_counter()
+        for _ in range(requests):
+            method, path, body, headers = scenario(ctx)
+            before = count[0]
+            sent = time.perf_counter()
+            try:
+                response = client.open(path, method=method, json=body, headers=headers)
+                response.get_data()
+                errors += response.status_code >= 500
+            except QueryBudgetExceeded as e:
+                over_budget += 1
+                print(f"  {e}")
+            latencies.append(time.perf_counter() - sent)
+            statements.append(count[0] - before)
+        elapsed = time.perf_counter() - start
+    finally:
+        event.remove(engine, 'before_cursor_execute', on_execute)
+    return summarise(latencies, errors, statements, elapsed, over_budget)
+
+def run_remote(url: str, ctx: Context, scenario, requests: int, concurrency: int):
+    """Sends requests to a running server from a pool of threads."""
+    # build every request up front so the scenarios' state isn't shared between threads
+    prepared = [scenario(ctx) for _ in range(requests)]
+
+    def send(request):
+        method, path, body, headers = request
+        data = json.dumps(body).encode() if body is not None else None
+        req = urllib.request.Request(
+            url.rstrip('/') + path, data=data, method=method,
+            headers={"Content-Type": "application/json", **headers}
+        )
+        sent = time.perf_counter()
+        try:
+            with urllib.request.urlopen(req) as response:
+                response.read()
+            failed = False
+        except urllib.error.HTTPError as e:
+            e.read()
+            failed = e.code >= 500
+        except urllib.error.URLError:
+            failed = True
+        return time.perf_counter() - sent, failed
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(send, prepared))
+    elapsed = time.perf_counter() - start
+    return summarise([latency for latency, _ in results], sum(failed for _, failed in results), [], elapsed)
+
+def compare(results: dict, baseline_path: str):
+    """Prints each endpoint's p95 latency and statement count against a previous run."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)["endpoints"]
+    print(f"\nCompared with {baseline_path}:")
+    for name, stats in results.items():
+        old = baseline.get(name)
+        if not old:
+            print(f"{name:<40} new")
+            continue
+        change = (stats["p95_ms"] / old["p95_ms"] - 1) * 100 if old["p95_ms"] else 0
+        line = f"{name:<40} p95 {old['p95_ms']:>9.2f} -> {stats['p95_ms']:>9.2f} ms ({change:+.0f}%)"
+        if stats["statements_per_request"] is not None and old.get("statements_per_request") is not None:
+            line += f"  sql {old['statements_per_request']} -> {stats['statements_per_request']}"
+        print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database', help="SQLAlchemy URL of the database to seed (default: a temporary SQLite file)")
+    add_arguments(parser)
+    parser.add_argument('--requests', type=int, default=50, help="requests per endpoint")
+    parser.add_argument('--only', nargs='+', help="only run endpoints whose name contains one of these")
+    parser.add_argument('--url', help="base URL of a running server to test instead of the test client")
+    parser.add_argument('--concurrency', type=int, default=4, help="concurrent requests with --url")
+    parser.add_argument('--check-budgets', action='store_true',
+                        help="fail if any request exceeds its route's query budget (test client only)")
+    parser.add_argument('--output', help="file to save the results to as JSON")
+    parser.add_argument('--compare', help="JSON results of a previous run to compare with")
+    args = parser.parse_args()
+
+    path = None
+    if not args.database:
+        fd, path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        args.database = f"sqlite:///{path}"
+
+    try:
+        app = create_app_for(args.database)
+        # in testing mode requests over their query budget raise QueryBudgetExceeded
+        app.testing = args.check_budgets
+        data = seed(app, args)
+
+        from flask_jwt_extended import create_access_token
+        with app.app_context():
+            tokens = {user_id: create_access_token(identity=str(user_id)) for user_id in data["users"]}
+        ctx = Context(data, tokens, random.Random(args.seed))
+
+        results = {}
+        for name, scenario in SCENARIOS.items():
+            if args.only and not any(pattern in name for pattern in args.only):
+                continue
+            if args.url:
+                results[name] = run_remote(args.url, ctx, scenario, args.requests, args.concurrency)
+            else:
+                if args.check_budgets:
+                    # budgets must hold for the first request a cold worker serves too
+                    reset_caches(app)
+                results[name] = run_local(app, ctx, scenario, args.requests)
+            stats = results[name]
+            sql = stats["statements_per_request"]
+            print(
+                f"{name:<40} p50 {stats['p50_ms']:>8.2f}  p95 {stats['p95_ms']:>8.2f}  "
+                f"p99 {stats['p99_ms']:>8.2f} ms  {stats['throughput_rps']:>8.1f} req/s"
+                + (f"  {sql:>6} sql/req" if sql is not None else "")
+                + (f"  {stats['errors']} errors" if stats["errors"] else "")
+                + (f"  {stats['over_budget']} over budget" if stats["over_budget"] else "")
+            )
+    finally:
+        if path:
+            os.remove(path)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                "meta": {key: value for key, value in vars(args).items() if key not in ('output', 'compare')},
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "endpoints": results,
+            }, f, indent=2)
+    if args.compare:
+        compare(results, args.compare)
+    if any(stats["over_budget"] for stats in results.values()):
+        sys.exit("Some endpoints exceeded their query budgets")
+
+if __name__ == "__main__":
+    main()
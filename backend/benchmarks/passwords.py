@@ -0,0 +1,55 @@
+"""
+Benchmark login throughput for each password hash method and cost.
+
+Each method's password checks are timed in a single process, giving logins per second
+per core, then spread over a process pool like the app's PASSWORD_HASH_WORKERS.
+
+Usage (from /backend):
+    python -m benchmarks.passwords --logins 20 --workers 4
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from werkzeug.security import generate_password_hash, check_password_hash
+
+METHODS = [
+    "scrypt:16384:8:1",
+    "scrypt:32768:8:1",
+    "scrypt:65536:8:1",
+    "pbkdf2:sha256:300000",
+    "pbkdf2:sha256:600000",
+    "pbkdf2:sha256:1000000",
+]
+
+def _check(pwhash: str):
+    """Checks the benchmark password, the unit of work of a single login."""
+    return check_password_hash(pwhash, "correct horse battery staple")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--logins', type=int, default=20, help="password checks per method")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="hashing pool size")
+    parser.add_argument('--methods', nargs='+', default=METHODS)
+    args = parser.parse_args()
+
+    print(f"{'method':<24}{'ms/login':>10}{'logins/s/core':>15}{f'logins/s ({args.workers} procs)':>24}")
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for method in args.methods:
+            pwhash = generate_password_hash("correct horse battery staple", method=method)
+
+            start = time.perf_counter()
+            for _ in range(args.logins):
+                _check(pwhash)
+            single = (time.perf_counter() - start) / args.logins
+
+            # warm the pool up so process start up isn't timed
+            list(pool.map(_check, [pwhash] * args.workers))
+            start = time.perf_counter()
+            list(pool.map(_check, [pwhash] * args.logins))
+            pooled = args.logins / (time.perf_counter() - start)
+
+            print(f"{method:<24}{single * 1000:>10.1f}{1 / single:>15.1f}{pooled:>24.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Seed a database with reproducible synthetic users, ingredients, recipes and cupboards.
+
+The database is migrated to head first. Ingredients cover every CategoryEnum value,
+and every user shares one password so seeding doesn't spend its time hashing.
+
+Usage (from /backend):
+    python -m benchmarks.seed --database sqlite:////tmp/bench.db --users 100 --recipes 200
+"""
+import argparse
+import os
+import random
+import time
+
+MIGRATIONS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'migrations')
+PASSWORD = "benchmark"
+
+WORDS = [
+    "red", "green", "smoked", "fresh", "dried", "sweet", "wild", "baby", "black", "white",
+    "onion", "pepper", "chicken", "salmon", "cheese", "apple", "rice", "bread", "basil",
+    "tomato", "garlic", "butter", "lemon", "bean", "potato", "pasta", "chilli", "honey",
+]
+METHOD_SENTENCES = [
+    "Preheat the oven and line a tray.",
+    "Fry the onions gently until soft.",
+    "Season well and simmer for twenty minutes.",
+    "Stir in the herbs just before serving.",
+    "Roast until golden and crisp at the edges.",
+    "Whisk everything together until smooth.",
+]
+
+def add_arguments(parser: argparse.ArgumentParser):
+    """
+    Add the data size options shared by the benchmarks that seed a database.
+
+    Parameters:
+        - parser (ArgumentParser): The parser to add the options to.
+    """
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--ingredients', type=int, default=2000)
+    parser.add_argument('--recipes', type=int, default=100, help="recipes per user")
+    parser.add_argument('--recipe-size', type=int, default=8, help="ingredients per recipe")
+    parser.add_argument('--cupboard', type=int, default=40, help="cupboard ingredients per user")
+    parser.add_argument('--seed', type=int, default=42)
+
+def create_app_for(database_url: str):
+    """
+    Create the app against the given database, migrated to head.
+
+    Parameters:
+        - database_url (str): SQLAlchemy URL of the database to use.
+
+    Returns:
+        - The Flask app.
+    """
+    os.environ['DATABASE_URL'] = database_url
+    # benchmark with the engine options and pragmas deployments use
+    os.environ.setdefault('APP_ENV', 'production')
+    os.environ.setdefault('SECRET_KEY', 'benchmark')
+    os.environ.setdefault('JWT_SECRET_KEY', 'benchmark-jwt-secret-key-of-sufficient-length')
+
+    from flask_migrate import upgrade
+    from app import create_app
+
+    app = create_app()
+    with app.app_context():
+        upgrade(directory=MIGRATIONS)
+    return app
+
+def seed(app, args):
+    """
+    Insert the synthetic data with batched inserts.
+
+    Parameters:
+        - app (Flask): The app whose database to seed.
+        - args (Namespace): The data sizes, see add_arguments.
+
+    Returns:
+        - A dict with "ingredients", mapping ingredient IDs to names, and "users",
+          mapping user IDs to their "username" and "recipes" and "cupboard" IDs.
+    """
+    from sqlalchemy import insert
+    from werkzeug.security import generate_password_hash
+    from app import db
+    from app.enums import CategoryEnum
+    from app.models import User, Ingredient, Recipe, RecipeIngredient, UserIngredient
+    from app.summaries import rebuild_recipe_summaries
+
+    rng = random.Random(args.seed)
+    categories = list(CategoryEnum)
+
+    with app.app_context():
+        names = set()
+        while len(names) < args.ingredients:
+            names.add(" ".join(rng.sample(WORDS, rng.randint(1, 3))) + f" {len(names)}")
+        ingredient_ids = db.session.scalars(
+            insert(Ingredient).returning(Ingredient.id, sort_by_parameter_order=True),
+            [{"name": name, "category": categories[i % len(categories)]} for i, name in enumerate(sorted(names))]
+        ).all()
+
+        pwhash = generate_password_hash(PASSWORD, method=app.config['PASSWORD_HASH_METHOD'])
+        start = db.session.query(db.func.count(User.id)).scalar()
+        usernames = [f"bench{start + i}" for i in range(args.users)]
+        user_ids = db.session.scalars(
+            insert(User).returning(User.id, sort_by_parameter_order=True),
+            [{"username": username, "password_hash": pwhash} for username in usernames]
+        ).all()
+
+        data = {"ingredients": dict(zip(ingredient_ids, sorted(names))), "users": {}}
+        for user_id, username in zip(user_ids, usernames):
+            recipe_ids = db.session.scalars(
+                insert(Recipe).returning(Recipe.id, sort_by_parameter_order=True),
+                [{
+                    "title": " ".join(rng.sample(WORDS, 3)).capitalize(),
+                    "method": " ".join(rng.choices(METHOD_SENTENCES, k=rng.randint(3, 8))),
+                    "user_id": user_id,
+                } for _ in range(args.recipes)]
+            ).all()
+            recipe_ings = [
+                {"recipe_id": recipe_id, "ingredient_id": ing_id}
+                for recipe_id in recipe_ids
+                for ing_id in rng.sample(ingredient_ids, args.recipe_size)
+            ]
+            if recipe_ings:
+                db.session.execute(insert(RecipeIngredient), recipe_ings)
+
+            cupboard = rng.sample(ingredient_ids, args.cupboard)
+            if cupboard:
+                db.session.execute(insert(UserIngredient), [
+                    {"user_id": user_id, "ingredient_id": ing_id} for ing_id in cupboard
+                ])
+            rebuild_recipe_summaries(user_id)
+            data["users"][user_id] = {
+                "username": username, "recipes": list(recipe_ids), "cupboard": cupboard
+            }
+        db.session.commit()
+    return data
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database', required=True, help="SQLAlchemy URL of the database to seed")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    app = create_app_for(args.database)
+    seed(app, args)
+    print(
+        f"Seeded {args.users} users, {args.ingredients} ingredients and "
+        f"{args.users * args.recipes} recipes in {time.perf_counter() - start:.1f}s, "
+        f"every user's password is '{PASSWORD}'"
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark JSON encoding and response compression of a large recipe library.
+
+A single user's library is seeded, 5000 recipes by default, and the get_recipes
+payload is encoded with Flask's default provider and the app's FastJSONProvider, with
+and without orjson, then compressed at several levels. Finally whole get_recipes
+requests are timed with and without Accept-Encoding.
+
+Usage (from /backend):
+    python -m benchmarks.serialization --recipes 5000 --repeat 20
+"""
+import argparse
+import gzip
+import os
+import tempfile
+import time
+import zlib
+from benchmarks.seed import add_arguments, create_app_for, seed
+
+def _time(func, repeat: int):
+    """Returns the mean time of func in seconds and its last result."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - start) / repeat, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_arguments(parser)
+    parser.set_defaults(users=1, recipes=5000)
+    parser.add_argument('--repeat', type=int, default=20, help="runs of each measurement")
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    try:
+        app = create_app_for(f"sqlite:///{path}")
+        data = seed(app, args)
+        user_id = next(iter(data["users"]))
+
+        from flask.json.provider import DefaultJSONProvider
+        from flask_jwt_extended import create_access_token
+        from app import serialization
+        from app.api.recipes import _fetch_recipe_page
+
+        with app.app_context():
+            results = _fetch_recipe_page(user_id, 0, None)
+        print(f"{len(results)} recipes\n")
+
+        encoders = {"flask default": DefaultJSONProvider(app)}
+        if serialization.orjson is not None:
+            encoders["fast (orjson)"] = serialization.FastJSONProvider(app)
+        encoders["fast (stdlib)"] = serialization.FastJSONProvider(app)
+
+        print(f"{'encoder':<20}{'ms':>10}{'bytes':>12}")
+        for name, provider in encoders.items():
+            orjson = serialization.orjson
+            if name == "fast (stdlib)":
+                serialization.orjson = None
+            try:
+                with app.app_context():
+                    elapsed, response = _time(lambda: provider.response(results).get_data(), args.repeat)
+            finally:
+                serialization.orjson = orjson
+            # every encoder produces the same JSON, so any body will do for compression
+            body = response
+            print(f"{name:<20}{elapsed * 1000:>10.2f}{len(response):>12}")
+
+        print(f"\n{'compression':<20}{'ms':>10}{'bytes':>12}{'ratio':>8}")
+        compressors = {
+            "gzip level 1": lambda: gzip.compress(body, 1, mtime=0),
+            "gzip level 6": lambda: gzip.compress(body, 6, mtime=0),
+            "gzip level 9": lambda: gzip.compress(body, 9, mtime=0),
+            "deflate level 6": lambda: zlib.compress(body, 6),
+        }
+        for name, compress in compressors.items():
+            elapsed, compressed = _time(compress, args.repeat)
+            print(f"{name:<20}{elapsed * 1000:>10.2f}{len(compressed):>12}{len(body) / len(compressed):>8.1f}")
+
+        with app.app_context():
+            token = create_access_token(identity=str(user_id))
+        client = app.test_client()
+        print(f"\n{'GET /recipes/':<20}{'ms':>10}{'bytes':>12}")
+        for name, encoding in [("identity", None), ("gzip", "gzip")]:
+            headers = {"Authorization": f"Bearer {token}"}
+            if encoding:
+                headers["Accept-Encoding"] = encoding
+            elapsed, response = _time(lambda: client.get("/recipes/", headers=headers), args.repeat)
+            print(f"{name:<20}{elapsed * 1000:>10.2f}{len(response.data):>12}")
+    finally:
+        os.remove(path)
+
+if __name__ == "__main__":
+    main()
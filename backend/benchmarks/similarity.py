@@ -0,0 +1,100 @@
+"""
+Benchmark the MinHash LSH similar recipes index against exact Jaccard similarity.
+
+Recipes are generated in families, each a variation of a base set of ingredients, so
+every recipe has some genuinely similar neighbours. For sampled recipes the top k from
+the index are compared with the exact top k from comparing every recipe, reporting
+recall, recall of neighbours above the LSH threshold and per query latency for each
+split of the 64 hashes into bands.
+
+Usage (from /backend):
+    python -m benchmarks.similarity --recipes 100000 --queries 200 --k 10
+"""
+import argparse
+import random
+import time
+from collections import Counter
+from app.similarity import SimilarityIndex, jaccard
+
+# (bands, rows per band) splits of the 64 hashes
+CONFIGS = [(32, 2), (16, 4), (8, 8)]
+
+def generate(args, rng: random.Random):
+    """Returns (recipe ID, ingredient ID) rows of recipes generated in families."""
+    ingredients = range(1, args.ingredients + 1)
+    rows = []
+    recipe_id = 0
+    while recipe_id < args.recipes:
+        base = rng.sample(ingredients, args.recipe_size)
+        for _ in range(min(args.family_size, args.recipes - recipe_id)):
+            recipe_id += 1
+            ing_ids = list(base)
+            for _ in range(rng.randint(0, args.recipe_size // 2)):
+                ing_ids[rng.randrange(len(ing_ids))] = rng.choice(ingredients)
+            rows.extend((recipe_id, ing_id) for ing_id in set(ing_ids))
+    return rows
+
+def exact_similar(recipes: dict, recipe_id: int, k: int):
+    """Returns the exact top k by comparing the recipe with every other recipe."""
+    ing_ids = recipes[recipe_id]
+    scored = [
+        (other, jaccard(ing_ids, other_ids))
+        for other, other_ids in recipes.items() if other != recipe_id
+    ]
+    scored = [item for item in scored if item[1] > 0]
+    scored.sort(key=lambda item: (-item[1], item[0]))
+    return scored[:k]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--recipes', type=int, default=20000)
+    parser.add_argument('--ingredients', type=int, default=2000)
+    parser.add_argument('--recipe-size', type=int, default=8, help="ingredients per recipe")
+    parser.add_argument('--family-size', type=int, default=20, help="recipes varying the same base")
+    parser.add_argument('--queries', type=int, default=100)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    rows = generate(args, rng)
+    recipes = {}
+    for recipe_id, ing_id in rows:
+        recipes.setdefault(recipe_id, set()).add(ing_id)
+    recipes = {recipe_id: frozenset(ing_ids) for recipe_id, ing_ids in recipes.items()}
+    queries = rng.sample(list(recipes), min(args.queries, len(recipes)))
+
+    start = time.perf_counter()
+    exact = {recipe_id: exact_similar(recipes, recipe_id, args.k) for recipe_id in queries}
+    exact_ms = (time.perf_counter() - start) / len(queries) * 1000
+    print(f"{len(recipes)} recipes, {len(queries)} queries, k={args.k}\n")
+    print(f"{'method':<16}{'build s':>9}{'ms/query':>10}{'recall@k':>10}{'recall>=t':>11}{'threshold':>11}")
+    print(f"{'exact':<16}{'':>9}{exact_ms:>10.3f}{1:>10.3f}{1:>11.3f}{'':>11}")
+
+    for bands, rows_per_band in CONFIGS:
+        threshold = (1 / bands) ** (1 / rows_per_band)
+        start = time.perf_counter()
+        index = SimilarityIndex(0, rows, bands, rows_per_band)
+        build = time.perf_counter() - start
+
+        found = total = found_above = total_above = 0
+        start = time.perf_counter()
+        results = {recipe_id: index.similar(recipe_id, args.k) for recipe_id in queries}
+        query_ms = (time.perf_counter() - start) / len(queries) * 1000
+        for recipe_id in queries:
+            # the index scores candidates exactly, so ties count as found whichever recipe it is
+            expected = Counter(similarity for _, similarity in exact[recipe_id])
+            actual = Counter(similarity for _, similarity in results[recipe_id])
+            found += sum((expected & actual).values())
+            total += len(exact[recipe_id])
+            above = Counter({s: n for s, n in expected.items() if s >= threshold})
+            found_above += sum((above & actual).values())
+            total_above += sum(above.values())
+
+        print(
+            f"{f'lsh {bands}x{rows_per_band}':<16}{build:>9.2f}{query_ms:>10.3f}"
+            f"{found / max(total, 1):>10.3f}{found_above / max(total_above, 1):>11.3f}{threshold:>11.2f}"
+        )
+
+if __name__ == "__main__":
+    main()
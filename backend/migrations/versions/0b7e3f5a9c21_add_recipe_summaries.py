@@ -0,0 +1,41 @@
+"""Add recipe summaries
+
+Revision ID: 0b7e3f5a9c21
+Revises: f9d2c6b1a374
+Create Date: 2026-10-18 16:48:33.150826
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0b7e3f5a9c21'
+down_revision = 'f9d2c6b1a374'
+branch_labels = None
+depends_on = None
+
+CATEGORIES = [
+    'meat', 'fish', 'dairy', 'vegetables', 'fruits', 'freezer',
+    'bread', 'carbs', 'snacks', 'herbs_spices', 'condiments', 'other',
+]
+
+
+def upgrade():
+    # existing recipes are summarised by running `flask summaries rebuild` after upgrading
+    op.create_table('recipe_summaries',
+    sa.Column('recipe_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('ingredient_count', sa.Integer(), nullable=False),
+    sa.Column('ingredient_ids', sa.JSON(), nullable=False),
+    *[sa.Column(f'{category}_count', sa.Integer(), nullable=False) for category in CATEGORIES],
+    sa.ForeignKeyConstraint(['recipe_id'], ['recipes.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('recipe_id')
+    )
+    op.create_index('ix_recipe_summaries_user_id_ingredient_count', 'recipe_summaries', ['user_id', 'ingredient_count'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_recipe_summaries_user_id_ingredient_count', table_name='recipe_summaries')
+    op.drop_table('recipe_summaries')
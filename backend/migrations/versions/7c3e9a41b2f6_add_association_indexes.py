@@ -0,0 +1,40 @@
+"""Add association indexes
+
+Revision ID: 7c3e9a41b2f6
+Revises: d258abdd7dfb
+Create Date: 2026-10-18 10:12:31.482915
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c3e9a41b2f6'
+down_revision = 'd258abdd7dfb'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # remove duplicate pairs, keeping the oldest row, so the unique indexes can be built
+    op.execute(
+        'DELETE FROM user_ingredients WHERE id NOT IN '
+        '(SELECT MIN(id) FROM user_ingredients GROUP BY user_id, ingredient_id)'
+    )
+    op.execute(
+        'DELETE FROM recipe_ingredients WHERE id NOT IN '
+        '(SELECT MIN(id) FROM recipe_ingredients GROUP BY recipe_id, ingredient_id)'
+    )
+
+    op.create_index('ix_user_ingredients_user_id_ingredient_id', 'user_ingredients', ['user_id', 'ingredient_id'], unique=True)
+    op.create_index('ix_recipe_ingredients_recipe_id_ingredient_id', 'recipe_ingredients', ['recipe_id', 'ingredient_id'], unique=True)
+    op.create_index(op.f('ix_recipes_user_id'), 'recipes', ['user_id'], unique=False)
+    op.create_index('ix_ingredients_lower_name_category', 'ingredients', [sa.text('lower(name)'), 'category'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_ingredients_lower_name_category', table_name='ingredients')
+    op.drop_index(op.f('ix_recipes_user_id'), table_name='recipes')
+    op.drop_index('ix_recipe_ingredients_recipe_id_ingredient_id', table_name='recipe_ingredients')
+    op.drop_index('ix_user_ingredients_user_id_ingredient_id', table_name='user_ingredients')
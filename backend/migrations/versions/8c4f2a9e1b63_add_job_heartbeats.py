@@ -0,0 +1,29 @@
+"""Add job heartbeats and progress
+
+Revision ID: 8c4f2a9e1b63
+Revises: 5d1a8e2c7f40
+Create Date: 2026-10-18 19:21:07.532914
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c4f2a9e1b63'
+down_revision = '5d1a8e2c7f40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('jobs', sa.Column('progress', sa.JSON(), nullable=True))
+    op.add_column('jobs', sa.Column('attempts', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('jobs', sa.Column('heartbeat_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('jobs', schema=None) as batch_op:
+        batch_op.drop_column('heartbeat_at')
+        batch_op.drop_column('attempts')
+        batch_op.drop_column('progress')
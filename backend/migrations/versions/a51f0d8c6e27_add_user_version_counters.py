@@ -0,0 +1,28 @@
+"""Add user version counters
+
+Revision ID: a51f0d8c6e27
+Revises: 7c3e9a41b2f6
+Create Date: 2026-10-18 11:03:54.271806
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a51f0d8c6e27'
+down_revision = '7c3e9a41b2f6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('recipes_version', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('cupboard_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('cupboard_version')
+        batch_op.drop_column('recipes_version')
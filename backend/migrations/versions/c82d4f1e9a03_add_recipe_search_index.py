@@ -0,0 +1,58 @@
+"""Add recipe search index
+
+Revision ID: c82d4f1e9a03
+Revises: a51f0d8c6e27
+Create Date: 2026-10-18 12:20:07.913442
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c82d4f1e9a03'
+down_revision = 'a51f0d8c6e27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # full-text search uses SQLite's FTS5, other databases fall back to LIKE queries
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    # external content table, so the text is only stored once in recipes
+    op.execute(
+        "CREATE VIRTUAL TABLE recipes_fts USING fts5("
+        "title, method, content='recipes', content_rowid='id', tokenize='porter unicode61')"
+    )
+    op.execute(
+        "CREATE TRIGGER recipes_fts_insert AFTER INSERT ON recipes BEGIN "
+        "INSERT INTO recipes_fts (rowid, title, method) VALUES (new.id, new.title, new.method); "
+        "END"
+    )
+    op.execute(
+        "CREATE TRIGGER recipes_fts_delete AFTER DELETE ON recipes BEGIN "
+        "INSERT INTO recipes_fts (recipes_fts, rowid, title, method) "
+        "VALUES ('delete', old.id, old.title, old.method); "
+        "END"
+    )
+    op.execute(
+        "CREATE TRIGGER recipes_fts_update AFTER UPDATE OF title, method ON recipes BEGIN "
+        "INSERT INTO recipes_fts (recipes_fts, rowid, title, method) "
+        "VALUES ('delete', old.id, old.title, old.method); "
+        "INSERT INTO recipes_fts (rowid, title, method) VALUES (new.id, new.title, new.method); "
+        "END"
+    )
+    # index the existing recipes
+    op.execute("INSERT INTO recipes_fts (recipes_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    op.execute("DROP TRIGGER recipes_fts_update")
+    op.execute("DROP TRIGGER recipes_fts_delete")
+    op.execute("DROP TRIGGER recipes_fts_insert")
+    op.execute("DROP TABLE recipes_fts")
@@ -0,0 +1,46 @@
+"""Add sync change tracking
+
+Revision ID: f9d2c6b1a374
+Revises: e4b7a2d95c18
+Create Date: 2026-10-18 15:12:07.904215
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f9d2c6b1a374'
+down_revision = 'e4b7a2d95c18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # added in place rather than in batch mode, which would rebuild recipes without its
+    # search triggers. Existing rows get the epoch, so they're only in full syncs.
+    op.add_column('recipes', sa.Column('updated_at', sa.DateTime(), server_default='1970-01-01 00:00:00', nullable=False))
+    op.add_column('user_ingredients', sa.Column('updated_at', sa.DateTime(), server_default='1970-01-01 00:00:00', nullable=False))
+    op.create_index('ix_recipes_user_id_updated_at', 'recipes', ['user_id', 'updated_at'], unique=False)
+    op.create_index('ix_user_ingredients_user_id_updated_at', 'user_ingredients', ['user_id', 'updated_at'], unique=False)
+
+    op.create_table('tombstones',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=20), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_tombstones_user_id_deleted_at', 'tombstones', ['user_id', 'deleted_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_tombstones_user_id_deleted_at', table_name='tombstones')
+    op.drop_table('tombstones')
+
+    op.drop_index('ix_user_ingredients_user_id_updated_at', table_name='user_ingredients')
+    op.drop_index('ix_recipes_user_id_updated_at', table_name='recipes')
+    op.drop_column('user_ingredients', 'updated_at')
+    op.drop_column('recipes', 'updated_at')
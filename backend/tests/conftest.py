@@ -0,0 +1,41 @@
+import pytest
+from app import create_app, db
+from app.models import CategoryEnum, Ingredient
+
+@pytest.fixture
+def app(tmp_path):
+    """An app on the testing profile with an empty in memory database."""
+    app = create_app('testing')
+    app.instance_path = str(tmp_path)
+    app.config['SECRET_KEY'] = 'testing'
+    app.config['JWT_SECRET_KEY'] = 'testing-jwt-secret-key-of-at-least-32-bytes'
+    app.config['JOB_DIR'] = str(tmp_path / 'jobs')
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def login(client):
+    """Registers and logs in a user, returning the headers that authenticate them."""
+    def login(username: str = 'alice', password: str = 'password'):
+        client.post('/auth/register', json={'username': username, 'password': password})
+        token = client.post('/auth/login', json={'username': username, 'password': password}).get_json()
+        return {'Authorization': f'Bearer {token}'}
+    return login
+
+@pytest.fixture
+def ingredients(app):
+    """Adds a handful of ingredients to the catalog, returning their IDs."""
+    with app.app_context():
+        rows = [Ingredient(name=name, category=CategoryEnum.VEGETABLES) for name in
+                ('onion', 'garlic', 'tomato', 'carrot', 'celery', 'pepper')]
+        db.session.add_all(rows)
+        db.session.commit()
+        return [row.id for row in rows]
@@ -0,0 +1,24 @@
+import json
+from app import db
+from app.backup import import_user
+from app.models import CategoryEnum, Ingredient, User
+
+def test_restore_matches_non_ascii_ingredient_names(app):
+    """Names are folded the same way on both sides, so an existing Édam is reused."""
+    with app.app_context():
+        user = User(username='alice', password_hash='x')
+        edam = Ingredient(name='Édam', category=CategoryEnum.DAIRY)
+        db.session.add_all([user, edam])
+        db.session.commit()
+        lines = [json.dumps(record) for record in (
+            {"type": "backup", "format": 1},
+            {"type": "ingredient", "id": 7, "name": "Édam", "category": "DAIRY"},
+            {"type": "ingredient", "id": 8, "name": "ÉDAM", "category": "DAIRY"},
+            {"type": "cupboard", "ingredient_id": 7},
+        )]
+        counts = import_user(user.id, lines)
+        db.session.commit()
+        names = [name for name, in db.session.query(Ingredient.name).order_by(Ingredient.id)]
+    assert counts["ingredients_created"] == 0
+    assert counts["cupboard"] == 1
+    assert names == ['Édam']
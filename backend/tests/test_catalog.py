@@ -0,0 +1,26 @@
+from app import create_app, db
+from app.catalog import ingredient_catalog
+from app.enums import CategoryEnum
+from app.ingredient_index import get_ingredient_index
+from app.models import Ingredient
+
+def test_apps_in_one_process_have_their_own_caches(app):
+    other = create_app('testing')
+    for current, name in ((app, 'onion'), (other, 'garlic')):
+        with current.app_context():
+            db.create_all()
+            db.session.add(Ingredient(name=name, category=CategoryEnum.VEGETABLES))
+            db.session.commit()
+
+    for current, name in ((app, 'onion'), (other, 'garlic'), (app, 'onion')):
+        with current.app_context():
+            assert ingredient_catalog.get_many([1])[1][1] == name
+            assert [found for _, found, _ in get_ingredient_index().search(name)] == [name]
+
+def test_name_lookups_fold_case_like_the_database(app):
+    with app.app_context():
+        db.session.add(Ingredient(name='Édam', category=CategoryEnum.DAIRY))
+        db.session.commit()
+        for name in ('Édam', 'ÉDAM', 'Édam'):
+            assert [row[1] for row in ingredient_catalog.find_by_name(name)] == ['Édam']
+        assert ingredient_catalog.find_by_name('édam') == []
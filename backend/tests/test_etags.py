@@ -0,0 +1,23 @@
+def test_etag_is_not_shared_between_users(client, login, ingredients):
+    alice = login('alice')
+    bob = login('bob')
+    for headers in (alice, bob):
+        client.post('/recipes/', json={'title': 'Soup', 'method': 'Simmer', 'ingredient_ids': ingredients[:2]}, headers=headers)
+
+    for path in ('/recipes/', '/cupboard/', '/recipes/cookable'):
+        response = client.get(path, headers=alice)
+        assert response.status_code == 200
+        assert 'Authorization' in response.vary
+
+        # bob is at the same versions, but alice's ETag mustn't match his response
+        response = client.get(path, headers={**bob, 'If-None-Match': response.headers['ETag']})
+        assert response.status_code == 200
+
+def test_etag_revalidates_for_the_same_user(client, login, ingredients):
+    alice = login('alice')
+    client.post('/recipes/', json={'title': 'Soup', 'method': 'Simmer', 'ingredient_ids': ingredients[:2]}, headers=alice)
+
+    etag = client.get('/recipes/', headers=alice).headers['ETag']
+    response = client.get('/recipes/', headers={**alice, 'If-None-Match': etag})
+    assert response.status_code == 304
+    assert 'Authorization' in response.vary
@@ -0,0 +1,55 @@
+import sys
+import threading
+from sqlalchemy import insert
+from app import db
+from app.enums import CategoryEnum
+from app.ingredient_index import IngredientIndex
+from app.models import Ingredient
+
+def _run_alongside_searches(index, work):
+    """Runs work while other threads search the index, returning the searches' errors."""
+    done = threading.Event()
+    errors = []
+
+    def search():
+        try:
+            while not done.is_set():
+                assert [name for _, name, _ in index.search('garlic')] == ['garlic']
+                index.search('onoin 12')
+        except Exception as e:
+            errors.append(e)
+
+    searchers = [threading.Thread(target=search) for _ in range(2)]
+    interval = sys.getswitchinterval()
+    # switch threads as often as possible to interleave the searches with the work
+    sys.setswitchinterval(1e-6)
+    try:
+        for thread in searchers:
+            thread.start()
+        work()
+    finally:
+        done.set()
+        for thread in searchers:
+            thread.join()
+        sys.setswitchinterval(interval)
+    return errors
+
+def test_search_is_consistent_while_ingredients_are_added():
+    index = IngredientIndex()
+    index.add(1, 'garlic', CategoryEnum.VEGETABLES)
+
+    def add():
+        for ing_id in range(2, 3000):
+            index.add(ing_id, f'onion {ing_id}', CategoryEnum.VEGETABLES)
+    assert not _run_alongside_searches(index, add)
+
+def test_search_is_consistent_while_refreshing(app):
+    with app.app_context():
+        db.session.execute(insert(Ingredient), [
+            {"name": f"onion {i}", "category": CategoryEnum.VEGETABLES} for i in range(20000)
+        ])
+        db.session.commit()
+        index = IngredientIndex()
+        index.add(20001, 'garlic', CategoryEnum.VEGETABLES)
+        assert not _run_alongside_searches(index, index.refresh)
+        assert len(index.names) == 20001
@@ -0,0 +1,68 @@
+import json
+import os
+import pytest
+from app import db, jobs
+from app.backup import _import_job
+from app.jobs import JobQueueFull, _run_job, job_path, prepare_job
+from app.models import Job, Recipe
+
+def _backup(ingredient_id: int):
+    lines = [
+        {"type": "backup", "format": 1},
+        {"type": "ingredient", "id": ingredient_id, "name": "onion", "category": "VEGETABLES"},
+        {"type": "recipe", "title": "Soup", "method": "Simmer", "ingredient_ids": [ingredient_id]},
+    ]
+    return "".join(json.dumps(line) + "\n" for line in lines).encode()
+
+def _queue_import(app, ingredient_id: int):
+    with app.app_context():
+        job = prepare_job(1, 'import')
+        with open(job_path(job.id, 'import.ndjson'), 'wb') as f:
+            f.write(_backup(ingredient_id))
+        db.session.commit()
+        return job.id
+
+def test_import_rerun_after_a_crash_restores_once(app, login, ingredients):
+    login()
+    job_id = _queue_import(app, ingredients[0])
+    with app.app_context():
+        # the process stops after restoring but before the job's result is committed
+        _import_job(job_id, 1, {}, lambda done, total=None: None)
+        db.session.rollback()
+        db.session.query(Job).filter_by(id=job_id).update({"attempts": 1})
+        db.session.commit()
+
+    _run_job(app, job_id)
+    with app.app_context():
+        job = db.session.get(Job, job_id)
+        assert job.status == 'succeeded'
+        assert job.result["recipes"] == 1
+        assert Recipe.query.count() == 1
+        assert not os.path.exists(job_path(job_id, 'import.ndjson'))
+
+def test_import_claimed_again_while_running_is_rolled_back(app, login, ingredients, monkeypatch):
+    login()
+    job_id = _queue_import(app, ingredients[0])
+
+    def requeued(*args):
+        result = _import_job(*args)
+        # another process recovered and claimed the job meanwhile
+        db.session.query(Job).filter_by(id=job_id).update({"attempts": Job.attempts + 1})
+        return result
+    monkeypatch.setitem(jobs._handlers, 'import', (requeued, None))
+
+    _run_job(app, job_id)
+    with app.app_context():
+        assert db.session.get(Job, job_id).status == 'running'
+        assert Recipe.query.count() == 0
+
+def test_running_jobs_do_not_fill_the_queue(app, login, monkeypatch):
+    login()
+    app.config['JOB_QUEUE_SIZE'] = 1
+    monkeypatch.setattr(jobs, '_scheduled', {100})
+    monkeypatch.setattr(jobs, '_running', {100: None})
+    with app.app_context():
+        prepare_job(1, 'export')
+        jobs._running.clear()
+        with pytest.raises(JobQueueFull):
+            prepare_job(1, 'export')
@@ -0,0 +1,93 @@
+import pytest
+from sqlalchemy import insert
+from app import db
+from app.api.utils import BATCH_MAX_IDS
+from app.enums import CategoryEnum
+from app.models import Ingredient
+
+# the caches each app keeps in app.extensions, dropped so requests are checked cold too
+CACHES = ('ingredient_catalog', 'ingredient_index', 'recipe_indexes', 'similarity_indexes')
+
+def _recipe(ctx, title='Stew'):
+    return {"title": title, "method": "Simmer for an hour.", "ingredient_ids": ctx["ingredients"][:8]}
+
+# endpoint to the (method, path, JSON body) of each request to check, the largest
+# requests the endpoint accepts where that's what drives its statement count
+CASES = {
+    'auth.register': lambda ctx: [('POST', '/auth/register', {"username": "bob", "password": "password"})],
+    'auth.login': lambda ctx: [('POST', '/auth/login', {"username": "alice", "password": "password"})],
+    'cupboard.get_cupboard': lambda ctx: [('GET', '/cupboard/', None)],
+    'cupboard.add_to_cupboard': lambda ctx: [('POST', '/cupboard/', {"id": ctx["ingredients"][-1]})],
+    'cupboard.batch_update_cupboard': lambda ctx: [('POST', '/cupboard/batch', {
+        "add": ctx["ingredients"][BATCH_MAX_IDS:2 * BATCH_MAX_IDS],
+        "remove": ctx["ingredients"][:BATCH_MAX_IDS],
+    })],
+    'cupboard.delete_from_cupboard': lambda ctx: [('DELETE', f'/cupboard/{ctx["ingredients"][0]}', None)],
+    'ingredients.search_ingredients': lambda ctx: [('GET', '/ingredients/search?q=onoin', None)],
+    'ingredients.get_ingredients_batch': lambda ctx: [
+        ('GET', '/ingredients/batch?ids=' + ','.join(map(str, ctx["ingredients"][:BATCH_MAX_IDS])), None),
+    ],
+    'ingredients.get_ingredient': lambda ctx: [('GET', '/ingredients/onion%201', None)],
+    'ingredients.add_ingredient': lambda ctx: [('POST', '/ingredients/', {"name": "Shallot", "category": "VEGETABLES"})],
+    'jobs.get_job': lambda ctx: [('GET', f'/jobs/{ctx["job"]}', None)],
+    'jobs.download_job_result': lambda ctx: [('GET', f'/jobs/{ctx["job"]}/download', None)],
+    'recipes.get_recipes': lambda ctx: [
+        ('GET', '/recipes/', None),
+        ('GET', '/recipes/?limit=1', None),
+        ('GET', '/recipes/?fields=id,title&max_ingredients=8&exclude_categories=MEAT', None),
+    ],
+    'recipes.get_recipe': lambda ctx: [('GET', f'/recipes/{ctx["recipes"][0]}', None)],
+    'recipes.get_recipes_batch': lambda ctx: [
+        ('GET', '/recipes/batch?ids=' + ','.join(map(str, ctx["recipes"] + list(range(10 ** 6, 10 ** 6 + BATCH_MAX_IDS - 3)))), None),
+    ],
+    'recipes.get_similar_recipes': lambda ctx: [('GET', f'/recipes/{ctx["recipes"][0]}/similar', None)],
+    'recipes.get_cookable_recipes': lambda ctx: [('GET', '/recipes/cookable', None)],
+    'recipes.search_user_recipes': lambda ctx: [('GET', '/recipes/search?q=simmer', None)],
+    'recipes.get_shopping_list': lambda ctx: [('POST', '/recipes/shopping-list', {"recipe_ids": ctx["recipes"]})],
+    'recipes.create_recipe': lambda ctx: [('POST', '/recipes/', _recipe(ctx, 'Soup'))],
+    'recipes.update_recipe': lambda ctx: [('PUT', f'/recipes/{ctx["recipes"][0]}', {
+        "title": "Curry", "method": "Fry, then simmer.", "ingredient_ids": ctx["ingredients"][4:12],
+    })],
+    'recipes.delete_recipe': lambda ctx: [('DELETE', f'/recipes/{ctx["recipes"][1]}', None)],
+    'sync.sync_changes': lambda ctx: [('GET', '/sync', None)],
+}
+
+@pytest.fixture
+def seeded(app, client, login):
+    """Seeds a user with recipes, a cupboard and a finished export job, then empties the caches."""
+    with app.app_context():
+        db.session.execute(insert(Ingredient), [
+            {"name": f"onion {i}", "category": CategoryEnum.VEGETABLES} for i in range(2 * BATCH_MAX_IDS + 10)
+        ])
+        db.session.commit()
+        ingredients = [ing_id for (ing_id,) in db.session.query(Ingredient.id).order_by(Ingredient.id)]
+    headers = login()
+    ctx = {"ingredients": ingredients}
+    client.post('/cupboard/batch', json={"add": ingredients[:BATCH_MAX_IDS]}, headers=headers)
+    ctx["recipes"] = [
+        client.post('/recipes/', json=_recipe(ctx, title), headers=headers).get_json()["id"]
+        for title in ('Stew', 'Broth', 'Chowder')
+    ]
+    ctx["job"] = client.post('/export', headers=headers).get_json()["id"]
+    for name in CACHES:
+        app.extensions.pop(name, None)
+    return ctx, headers
+
+def _budgeted_endpoints(app):
+    return {
+        endpoint for endpoint, view in app.view_functions.items()
+        if getattr(view, 'query_budget', None) is not None
+    }
+
+def test_every_budgeted_endpoint_is_checked(app):
+    assert _budgeted_endpoints(app) == set(CASES)
+
+@pytest.mark.parametrize('endpoint', sorted(CASES))
+def test_endpoint_stays_within_its_query_budget(app, client, seeded, endpoint):
+    ctx, headers = seeded
+    # in testing mode a request over its budget raises QueryBudgetExceeded, the
+    # first request of each is cold and the second warm
+    for method, path, body in CASES[endpoint](ctx):
+        for _ in range(2):
+            response = client.open(path, method=method, json=body, headers=headers)
+            assert response.status_code < 500, response.get_data(as_text=True)
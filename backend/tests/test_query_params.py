@@ -0,0 +1,27 @@
+import pytest
+
+@pytest.mark.parametrize('path', [
+    '/recipes/?limit=abc',
+    '/recipes/?after=abc',
+    '/recipes/?after=1.5',
+    '/recipes/1/similar?k=abc',
+    '/recipes/cookable?min_coverage=abc',
+    '/recipes/cookable?max_missing=abc',
+    '/recipes/cookable?limit=abc',
+    '/recipes/search?q=soup&limit=abc',
+    '/ingredients/search?q=oni&limit=abc',
+])
+def test_non_numeric_parameters_are_rejected(client, login, path):
+    response = client.get(path, headers=login())
+    assert response.status_code == 400
+    assert 'must be' in response.get_json()['error']
+
+def test_page_limit_is_applied(client, login, ingredients):
+    headers = login()
+    for title in ('one', 'two', 'three'):
+        client.post('/recipes/', json={'title': title, 'method': 'Cook', 'ingredient_ids': ingredients[:1]}, headers=headers)
+
+    response = client.get('/recipes/?limit=2', headers=headers)
+    assert response.status_code == 200
+    assert len(response.get_json()) == 2
+    assert response.headers['X-Next-Cursor']
@@ -0,0 +1,28 @@
+import random
+from app.similarity import EXACT_MAX_RECIPES, SimilarityIndex, jaccard
+
+def test_half_similar_recipe_is_returned(client, login, ingredients):
+    headers = login()
+    ids = []
+    for ing_ids in (ingredients[:4], ingredients[2:6], ingredients[:3] + ingredients[4:5]):
+        response = client.post('/recipes/', json={'title': 'Stew', 'method': 'Cook', 'ingredient_ids': ing_ids}, headers=headers)
+        ids.append(response.get_json()['id'])
+
+    similar = client.get(f'/recipes/{ids[0]}/similar', headers=headers).get_json()
+    # the second shares 2 of 6 ingredients, the third 3 of 5
+    assert [recipe['id'] for recipe in similar] == [ids[2], ids[1]]
+    assert similar[0]['similarity'] == 0.6
+
+def test_half_similar_recipes_are_found_in_large_libraries():
+    rng = random.Random(1)
+    library = {recipe_id: frozenset(rng.sample(range(1, 2000), 8)) for recipe_id in range(1, 4 * EXACT_MAX_RECIPES)}
+    # give some recipes a neighbour sharing half their ingredients
+    queries = rng.sample(sorted(library), 100)
+    for neighbour, recipe_id in enumerate(queries, start=len(library) + 1):
+        ing_ids = sorted(library[recipe_id])
+        library[neighbour] = frozenset(ing_ids[:6] + rng.sample(range(2000, 3000), 2))
+        assert jaccard(library[recipe_id], library[neighbour]) >= 0.5
+
+    index = SimilarityIndex(0, [(recipe_id, ing_id) for recipe_id, ing_ids in library.items() for ing_id in ing_ids])
+    for neighbour, recipe_id in enumerate(queries, start=len(library) - len(queries) + 1):
+        assert neighbour in [other for other, _ in index.similar(recipe_id, 10)]
@@ -0,0 +1,36 @@
+from app.recipe_index import RecipeIndex, recipe_indexes
+from app.similarity import similarity_indexes
+from app.user_cache import VersionedUserCache
+
+def test_writes_update_cached_indexes_in_place(app, client, login, ingredients):
+    headers = login()
+    client.post('/cupboard/batch', json={'add': ingredients[:3]}, headers=headers)
+    first = client.post('/recipes/', json={'title': 'One', 'method': 'Cook', 'ingredient_ids': ingredients[:2]}, headers=headers).get_json()['id']
+    client.get('/recipes/cookable', headers=headers)
+    client.get(f'/recipes/{first}/similar', headers=headers)
+    with app.app_context():
+        cached = recipe_indexes.get(1), similarity_indexes.get(1)
+
+    second = client.post('/recipes/', json={'title': 'Two', 'method': 'Cook', 'ingredient_ids': ingredients[2:4]}, headers=headers).get_json()['id']
+    client.put(f'/recipes/{first}', json={'ingredient_ids': ingredients[4:5]}, headers=headers)
+    cookable = client.get('/recipes/cookable', headers=headers).get_json()
+    assert [(recipe['id'], recipe['missing_ingredient_ids']) for recipe in cookable] == [(second, [ingredients[3]])]
+    client.delete(f'/recipes/{second}', headers=headers)
+    assert client.get('/recipes/cookable', headers=headers).get_json() == []
+
+    with app.app_context():
+        assert (recipe_indexes.get(1), similarity_indexes.get(1)) == cached
+
+def test_least_recently_used_indexes_are_evicted(app, login):
+    for username in ('alice', 'bob', 'carol'):
+        login(username)
+    cache = VersionedUserCache('test_indexes', RecipeIndex, 'RECIPE_INDEX_CACHE_SIZE')
+    app.config['RECIPE_INDEX_CACHE_SIZE'] = 2
+    with app.app_context():
+        alice = cache.get(1)
+        cache.get(2)
+        assert cache.get(1) is alice
+        cache.get(3)
+        # bob was used least recently
+        assert cache.get(1) is alice
+        assert list(cache._indexes) == [3, 1]
@@ -1,5 +1,5 @@
 import { useEffect, useState } from 'react';
-import { deleteRecipe, getRecipes } from '../services/recipes';
+import { deleteRecipe, getRecipe, getRecipes } from '../services/recipes';
 import { Button, Alert, Card, Badge, Form, Row, Col } from 'react-bootstrap';
 import AddRecipeModal from './AddRecipeModal';
 import { getCupboard } from '../services/cupboard';
@@ -24,7 +24,8 @@ export default function Recipes() {
     useEffect(() => {
         async function loadRecipes() {
             try {
-                const recipeData = await getRecipes();
+                // the list doesn't show methods, so they're only fetched when a recipe is opened
+                const recipeData = await getRecipes({ fields: 'id,title,ingredients' });
                 if (recipeData.error) {
                     setError(`Error when loading recipes: ${recipeData.error}`);
                     return;
@@ -76,6 +77,26 @@ export default function Recipes() {
         setSortedRecipes(sorted);
     }, [sortBy, recipes]);
 
+    /**
+     * Fetches the method of a recipe, which the recipe list doesn't load, and then
+     * opens the recipe with the given setter.
+     * 
+     * @param {Object} recipe - The recipe from the list.
+     * @param {Function} open - Sets the recipe to show or edit.
+     */
+    async function openRecipe(recipe, open) {
+        try {
+            const fullRecipe = await getRecipe(recipe.id, { fields: 'method' });
+            if (fullRecipe.error) {
+                setError(fullRecipe.error);
+                return;
+            }
+            open({ ...recipe, method: fullRecipe.method });
+        } catch (err) {
+            setError("Unexpected error, please try again later");
+        }
+    }
+
     /**
      * Handles the deletion of the specific recipe. Calls the API
      * endpoint to delete it and updated the recipes object.
@@ -125,7 +146,7 @@ export default function Recipes() {
         <div className='row'>
             {sortedRecipes.map(recipe => (
                 <div className='col-md-4 mb-4' key={recipe.id}>
-                    <Card onClick={() => setRecipeToShow(recipe)} className='shadow-sm transition card-as-button'>
+                    <Card onClick={() => openRecipe(recipe, setRecipeToShow)} className='shadow-sm transition card-as-button'>
                         <Card.Img variant='top' src={'/recipe.png'} alt={recipe.title} className='w-50 align-self-center' />
                         <Card.Body>
                             <Card.Title>{recipe.title}</Card.Title>
@@ -140,7 +161,7 @@ export default function Recipes() {
                                 <span className='text-success fw-bold'>You have all the ingredients!</span>
                             )}
                             <div className='d-flex justify-content-end mt-2'>
-                                <Button size="sm" variant="outline-secondary" onClick={(e) => {e.stopPropagation(); setRecipeToEdit(recipe)}}>Edit</Button>
+                                <Button size="sm" variant="outline-secondary" onClick={(e) => {e.stopPropagation(); openRecipe(recipe, setRecipeToEdit)}}>Edit</Button>
                                 <Button size="sm" variant="outline-danger" className='ms-2' onClick={(e) => {e.stopPropagation(); handleDeleteRecipe(recipe.id)}}>Delete</Button>
                             </div>
                         </Card.Body>
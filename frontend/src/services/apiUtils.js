@@ -9,9 +9,12 @@ const BASE_URL = "http://localhost:5000";
  */
 export async function apiFetch(path, options = {}) {
     const token = localStorage.getItem('token');
+    // sent back after a write so the backend reads from the primary until the replica catches up
+    const writeToken = sessionStorage.getItem('writeToken');
     const headers = {
         'Content-Type': 'application/json',
         ...(token && { Authorization: `Bearer ${token}` }),
+        ...(writeToken && { 'X-Write-Token': writeToken }),
         ...options.headers
     };
 
@@ -20,6 +23,10 @@ export async function apiFetch(path, options = {}) {
         headers
     });
 
+    if (result.headers.get('X-Write-Token')) {
+        sessionStorage.setItem('writeToken', result.headers.get('X-Write-Token'));
+    }
+
     const data = await result.json();
 
     // if the JWT token is expired, remove it and redirect to login
@@ -24,6 +24,20 @@ export function addToCupboard(id) {
     });
 }
 
+/**
+ * Sends a batch add and remove cupboard request to the backend API.
+ * 
+ * @param {Array} add - The IDs of the ingredients to add.
+ * @param {Array} remove - The IDs of the ingredients to remove.
+ * @returns {Promise} - The response from the API.
+ */
+export function batchUpdateCupboard(add = [], remove = []) {
+    return apiFetch('/cupboard/batch', {
+        method: 'POST',
+        body: JSON.stringify({ add, remove })
+    });
+}
+
 /**
  * Sends a delete from cupboard request to the backend API.
  * 
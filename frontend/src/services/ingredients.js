@@ -11,6 +11,34 @@ export function getIngredient(name) {
     });
 }
 
+/**
+ * Sends a batch get ingredients request to the backend API, resolving many
+ * ingredients in one request.
+ * 
+ * @param {Array} ids - The IDs of the ingredients to get.
+ * @returns {Promise} - The response from the API, the ingredients keyed by ID and the missing IDs.
+ */
+export function getIngredientsBatch(ids) {
+    const query = new URLSearchParams({ ids: ids.join(',') }).toString();
+    return apiFetch(`/ingredients/batch?${query}`, {
+        method: 'GET'
+    });
+}
+
+/**
+ * Sends a search ingredients request to the backend API.
+ * 
+ * @param {String} q - The (partial) name of the ingredient to search for.
+ * @param {Object} params - Optional filters e.g. limit or category.
+ * @returns {Promise} - The response from the API.
+ */
+export function searchIngredients(q, params = {}) {
+    const query = new URLSearchParams({ q, ...params }).toString();
+    return apiFetch(`/ingredients/search?${query}`, {
+        method: 'GET'
+    });
+}
+
 /**
  * Sends a add ingredient request to the backend API.
  * 
@@ -0,0 +1,14 @@
+import { apiFetch } from "./apiUtils";
+
+/**
+ * Sends a request to the backend API for the status of a background job, e.g. one
+ * started by a backup import. Poll it until its status is succeeded or failed.
+ * 
+ * @param {Number} id - The ID of the job.
+ * @returns {Promise} - The response from the API.
+ */
+export function getJob(id) {
+    return apiFetch(`/jobs/${id}`, {
+        method: 'GET'
+    });
+}
@@ -3,14 +3,85 @@ import { apiFetch } from "./apiUtils";
 /**
  * Sends a get recipes request to the backend API.
  * 
+ * @param {Object} params - Optional parameters e.g. fields, limit or after.
  * @returns {Promise} - The response from the API.
  */
-export function getRecipes() {
-    return apiFetch('/recipes/', {
+export function getRecipes(params = {}) {
+    const query = new URLSearchParams(params).toString();
+    return apiFetch(`/recipes/${query ? `?${query}` : ''}`, {
+        method: 'GET'
+    });
+}
+
+/**
+ * Sends a get recipe request to the backend API.
+ * 
+ * @param {Integer} id - The ID of the recipe to get.
+ * @param {Object} params - Optional parameters e.g. fields.
+ * @returns {Promise} - The response from the API.
+ */
+export function getRecipe(id, params = {}) {
+    const query = new URLSearchParams(params).toString();
+    return apiFetch(`/recipes/${id}${query ? `?${query}` : ''}`, {
+        method: 'GET'
+    });
+}
+
+/**
+ * Sends a batch get recipes request to the backend API, resolving many recipes
+ * in one request.
+ * 
+ * @param {Array} ids - The IDs of the recipes to get.
+ * @param {Object} params - Optional parameters e.g. fields.
+ * @returns {Promise} - The response from the API, the recipes keyed by ID and the missing IDs.
+ */
+export function getRecipesBatch(ids, params = {}) {
+    const query = new URLSearchParams({ ids: ids.join(','), ...params }).toString();
+    return apiFetch(`/recipes/batch?${query}`, {
+        method: 'GET'
+    });
+}
+
+/**
+ * Sends a get cookable recipes request to the backend API.
+ * 
+ * @param {Object} params - Optional filters e.g. min_coverage, max_missing or limit.
+ * @returns {Promise} - The response from the API.
+ */
+export function getCookableRecipes(params = {}) {
+    const query = new URLSearchParams(params).toString();
+    return apiFetch(`/recipes/cookable${query ? `?${query}` : ''}`, {
         method: 'GET'
     });
 }
 
+/**
+ * Sends a search recipes request to the backend API.
+ * 
+ * @param {String} q - The search terms.
+ * @param {Object} params - Optional parameters e.g. limit.
+ * @returns {Promise} - The response from the API.
+ */
+export function searchRecipes(q, params = {}) {
+    const query = new URLSearchParams({ q, ...params }).toString();
+    return apiFetch(`/recipes/search?${query}`, {
+        method: 'GET'
+    });
+}
+
+/**
+ * Sends a shopping list request to the backend API.
+ * 
+ * @param {Array} recipeIds - The IDs of the recipes to shop for.
+ * @returns {Promise} - The response from the API.
+ */
+export function getShoppingList(recipeIds) {
+    return apiFetch('/recipes/shopping-list', {
+        method: 'POST',
+        body: JSON.stringify({ recipe_ids: recipeIds })
+    });
+}
+
 /**
  * Sends a add recipe request to the backend API.
  * 
@@ -24,6 +95,19 @@ export function createRecipe(data) {
     });
 }
 
+/**
+ * Sends a bulk add recipes request to the backend API.
+ * 
+ * @param {Array} recipes - The details of each recipe to add.
+ * @returns {Promise} - The response from the API.
+ */
+export function bulkCreateRecipes(recipes) {
+    return apiFetch('/recipes/bulk', {
+        method: 'POST',
+        body: JSON.stringify(recipes)
+    });
+}
+
 /**
  * Sends a edit recipe request to the backend API.
  * 
@@ -0,0 +1,15 @@
+import { apiFetch } from "./apiUtils";
+
+/**
+ * Sends a sync request to the backend API for the recipes and cupboard
+ * ingredients changed or deleted since the last sync.
+ * 
+ * @param {String} since - The token returned by the last sync, omit for everything.
+ * @returns {Promise} - The response from the API.
+ */
+export function syncChanges(since) {
+    const query = since ? `?${new URLSearchParams({ since })}` : '';
+    return apiFetch(`/sync${query}`, {
+        method: 'GET'
+    });
+}